@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Guest booking load test with injected client retries
+
+Books guest rides through POST /api/rides/guest against the MongoDB at
+MONGO_URL/DB_NAME with --concurrency clients. A share of the bookings
+(--retry-rate) behaves like a phone on a flaky mountain network: the
+response is "lost" and the request is sent again, and some of those
+retries are fired while the first attempt is still running.
+
+Runs once without and once with an Idempotency-Key per booking and
+reports rides created and notification jobs queued per booking, plus
+request latency. Notification jobs are counted, not delivered. Documents
+created by the run are removed.
+
+Usage (from backend/):
+    python benchmarks/idempotent_booking.py [--bookings 200] [--retry-rate 0.3]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+from pathlib import Path
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "benchmark")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx  # noqa: E402
+import numpy as np  # noqa: E402
+
+import server  # noqa: E402
+from notification_outbox import quoted_booking  # noqa: E402
+
+MAX_ATTEMPTS = 3
+
+
+async def client_booking(http, rng, booking, email, key, retry_rate, latencies):
+    """One logical booking, retried the way an unreliable client would"""
+    body = {**booking, "contact": {**booking["contact"], "email": email}}
+    headers = {"Idempotency-Key": key} if key else {}
+
+    async def attempt():
+        start = time.perf_counter()
+        response = await http.post("/api/rides/guest", json=body, headers=headers)
+        latencies.append(time.perf_counter() - start)
+        return response
+
+    requests = 0
+    for _ in range(MAX_ATTEMPTS):
+        if rng.random() < retry_rate / 2:
+            # Impatient retry while the first attempt is still in flight
+            responses = await asyncio.gather(attempt(), attempt())
+            requests += 2
+        else:
+            responses = [await attempt()]
+            requests += 1
+        if all(r.status_code == 409 for r in responses):
+            await asyncio.sleep(0.05)
+            continue
+        if rng.random() >= retry_rate:
+            break
+        # Response lost on the way back: the client does not know it succeeded
+    return requests
+
+
+async def run_mode(http, bookings, concurrency, retry_rate, with_keys, tag):
+    rng = random.Random(11)
+    email = f"bench+{tag}@example.com"
+    latencies = []
+    booking = await quoted_booking(http)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(n):
+        async with semaphore:
+            key = f"bench-{tag}-{n}" if with_keys else None
+            return await client_booking(http, rng, booking, email, key, retry_rate, latencies)
+
+    start = time.perf_counter()
+    requests = sum(await asyncio.gather(*(one(n) for n in range(bookings))))
+    elapsed = time.perf_counter() - start
+    rides = await server.db.rides.count_documents({"contact.email": email})
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1e3
+    return requests, rides, p50, p99, elapsed
+
+
+async def run(bookings, concurrency, retry_rate):
+    tag = uuid.uuid4().hex[:8]
+    queued = []
+
+    async def count_jobs(jobs, held=()):
+        queued.extend(jobs)
+
+    enqueue = server.notification_outbox.enqueue
+    server.notification_outbox.enqueue = count_jobs
+    await server.idempotency.setup()
+    await server.quote_signer.load_key()
+    transport = httpx.ASGITransport(app=server.app)
+
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+            print(f"{bookings} bookings, {concurrency} concurrent clients, "
+                  f"retry rate {retry_rate:.0%}")
+            print(f"{'mode':>10} {'requests':>9} {'rides':>6} {'jobs/booking':>13} "
+                  f"{'p50':>10} {'p99':>10}")
+
+            for name, with_keys in (("no key", False), ("key", True)):
+                queued.clear()
+                requests, rides, p50, p99, elapsed = await run_mode(
+                    http, bookings, concurrency, retry_rate, with_keys, f"{tag}-{name[:2]}"
+                )
+                print(f"{name:>10} {requests:>9} {rides:>6} {len(queued) / bookings:>13.2f} "
+                      f"{p50:>7.1f} ms {p99:>7.1f} ms")
+                if with_keys:
+                    assert rides == bookings, rides
+
+            print(f"\nIdempotency stats: {server.idempotency.stats()}")
+    finally:
+        server.notification_outbox.enqueue = enqueue
+        await server.http_pool.aclose()
+        await server.db.rides.delete_many({"contact.email": {"$regex": f"^bench\\+{tag}"}})
+        await server.db.idempotency_keys.delete_many({"key": {"$regex": f":bench-{tag}-"}})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Guest booking load test with injected retries")
+    parser.add_argument("--bookings", type=int, default=200, help="Logical bookings per mode")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent clients")
+    parser.add_argument("--retry-rate", type=float, default=0.3, help="Share of attempts whose response is lost")
+    args = parser.parse_args()
+    asyncio.run(run(args.bookings, args.concurrency, args.retry_rate))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Booking latency with inline notifications vs the notification outbox
+
+Starts local SMTP and Twilio stand-ins that answer after --delay seconds,
+then books guest rides through POST /api/rides/guest against the MongoDB
+at MONGO_URL/DB_NAME:
+
+    inline  every booking delivers its notifications before responding
+            (the behaviour before the outbox)
+    outbox  bookings only queue jobs; background workers deliver them
+
+Reports booking p50/p99 for both modes and how long the outbox workers
+took to drain the queue. Documents created by the run are removed.
+
+Usage (from backend/):
+    python benchmarks/notification_outbox.py [--bookings 50] [--delay 0.2]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "benchmark")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx  # noqa: E402
+import numpy as np  # noqa: E402
+
+import server  # noqa: E402
+from stand_ins import SMTPStandIn, TwilioStandIn, point_server_at  # noqa: E402
+
+BOOKING = {
+    "pickup": {"latitude": 46.2381, "longitude": 6.1089, "address": "Aéroport de Genève"},
+    "destination": {"latitude": 46.5197, "longitude": 6.6323, "address": "Lausanne Gare"},
+    "vehicle_type": "eco",
+    "distance_km": 62.0,
+    "contact": {"name": "Benchmark", "email": "client@example.com", "phone": "+41790000002"}
+}
+
+
+async def quoted_booking(http):
+    """BOOKING with a quote token, as the booking endpoints require"""
+    fields = ("pickup", "destination", "vehicle_type", "distance_km")
+    response = await http.post("/api/rides/calculate", json={k: BOOKING[k] for k in fields})
+    response.raise_for_status()
+    return {**BOOKING, "quote_token": response.json()["quote_token"]}
+
+
+async def deliver_inline(jobs, held=()):
+    """The pre-outbox path: send everything before the booking returns"""
+    async def send(channel, recipient, payload):
+        result = await server.NOTIFICATION_SENDERS[channel](recipient, **payload)
+        await server.store_notification(
+            channel, recipient, payload, result.get("status", "failed"),
+            result.get("error") or result.get("reason")
+        )
+    await asyncio.gather(*(send(*job) for job in jobs))
+
+
+async def book(http, bookings):
+    booking = await quoted_booking(http)
+    latencies, ride_ids = [], []
+    for _ in range(bookings):
+        start = time.perf_counter()
+        response = await http.post("/api/rides/guest", json=booking)
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+        ride_ids.append(response.json()["ride_id"])
+    return np.percentile(latencies, [50, 99]) * 1e3, ride_ids
+
+
+async def wait_for_drain(timeout=300):
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        jobs = (await server.notification_outbox.stats())["jobs"]
+        if not jobs.get("pending") and not jobs.get("processing"):
+            return time.perf_counter() - start
+        await asyncio.sleep(0.05)
+    raise TimeoutError("Outbox did not drain")
+
+
+async def run(bookings, delay):
+    smtp = SMTPStandIn(delay).start()
+    twilio = TwilioStandIn(delay).start()
+    point_server_at(server, smtp, twilio)
+    # The stand-in has no rate limit; do not pace SMS at a real account's rate
+    server.sms_dispatcher.bucket = server.TokenBucket(1000, 1000)
+
+    await server.quote_signer.load_key()
+    outbox = server.notification_outbox
+    transport = httpx.ASGITransport(app=server.app)
+    ride_ids = []
+    started_at = datetime.now(timezone.utc)
+
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+            print(f"{bookings} bookings, 4 notifications each, provider delay {delay * 1e3:.0f} ms")
+            print(f"{'mode':>8} {'p50':>10} {'p99':>10}")
+
+            enqueue = outbox.enqueue
+            outbox.enqueue = deliver_inline
+            (p50, p99), ids = await book(http, bookings)
+            outbox.enqueue = enqueue
+            ride_ids += ids
+            print(f"{'inline':>8} {p50:>7.1f} ms {p99:>7.1f} ms")
+
+            await outbox.setup()
+            outbox.start()
+            (p50, p99), ids = await book(http, bookings)
+            ride_ids += ids
+            print(f"{'outbox':>8} {p50:>7.1f} ms {p99:>7.1f} ms")
+
+            drained = await wait_for_drain()
+            print(f"\nOutbox drained {drained:.2f}s after the last booking "
+                  f"with {outbox.workers} workers")
+            print(f"Stand-ins received {smtp.messages} emails over {smtp.connections} "
+                  f"SMTP connections and {twilio.messages} SMS")
+    finally:
+        await outbox.stop()
+        await server.http_pool.aclose()
+        await server.db.rides.delete_many({"ride_id": {"$in": ride_ids}})
+        await server.db.notification_outbox.delete_many({"created_at": {"$gte": started_at}})
+        await server.db.notifications.delete_many({"created_at": {"$gte": started_at}})
+        smtp.shutdown()
+        twilio.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Booking latency with inline vs queued notifications")
+    parser.add_argument("--bookings", type=int, default=50, help="Bookings per mode")
+    parser.add_argument("--delay", type=float, default=0.2, help="Stand-in provider delay in seconds")
+    args = parser.parse_args()
+    asyncio.run(run(args.bookings, args.delay))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Keyset pagination benchmark for the ride history listing
+
+Seeds one user's rides in the MongoDB at MONGO_URL/DB_NAME at several
+history sizes and compares, for a page of --page rides:
+
+    full     the former .to_list(N) load of the whole history
+    skip     offset pagination to a page near the end (skip/limit)
+    cursor   paginate() to the same page through its keyset cursor
+
+Reports p50 latency and peak Python memory per request, and checks that
+walking every page with next_cursor returns each ride exactly once. The
+seeded documents are removed afterwards.
+
+Usage (from backend/):
+    python benchmarks/pagination.py [--page 50] [--repeat 20]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "benchmark")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+
+import server  # noqa: E402
+
+HISTORY_SIZES = [1_000, 10_000, 100_000]
+
+
+async def seed(user_id, count):
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    for offset in range(0, count, 5_000):
+        await server.db.rides.insert_many([
+            {
+                "ride_id": f"ride_{uuid.uuid4().hex[:12]}",
+                "user_id": user_id,
+                "status": "completed",
+                "vehicle_type": "eco",
+                "price": 80.0,
+                "pickup": {"address": "Gare Cornavin, Genève", "latitude": 46.2102, "longitude": 6.1424},
+                "destination": {"address": "Lausanne Gare", "latitude": 46.5167, "longitude": 6.6291},
+                # Pairs of rides share a timestamp so ties on created_at are exercised
+                "created_at": start + timedelta(minutes=(offset + n) // 2)
+            }
+            for n in range(min(5_000, count - offset))
+        ])
+
+
+async def measure(func, repeat):
+    latencies, peaks = [], []
+    for _ in range(repeat):
+        tracemalloc.start()
+        start = time.perf_counter()
+        await func()
+        latencies.append(time.perf_counter() - start)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return np.percentile(latencies, 50) * 1e3, max(peaks) / 1024
+
+
+async def walk_all(user_id, page):
+    seen, cursor = [], None
+    while True:
+        rides, cursor = await server.paginate(server.db.rides, {"user_id": user_id}, "ride_id", page, cursor)
+        seen += [ride["ride_id"] for ride in rides]
+        if cursor is None:
+            return seen
+
+
+async def run(page, repeat):
+    await server.db.rides.create_index([("user_id", 1), ("created_at", -1), ("ride_id", -1)])
+    query_sort = [("created_at", -1), ("ride_id", -1)]
+
+    print(f"page of {page} rides, p50 latency / peak memory per request")
+    print(f"{'history':>8} {'full':>22} {'skip (deep)':>22} {'cursor (deep)':>22}")
+
+    for size in HISTORY_SIZES:
+        user_id = f"user_bench_{uuid.uuid4().hex[:8]}"
+        try:
+            await seed(user_id, size)
+            query = {"user_id": user_id}
+
+            # Cursor pointing at the last full page
+            deep = size - 2 * page
+            anchor = await server.db.rides.find(query, {"_id": 0}).sort(query_sort).skip(deep - 1).limit(1).to_list(1)
+            cursor = server.encode_cursor(anchor[0], "ride_id")
+
+            async def full():
+                await server.db.rides.find(query, {"_id": 0}).sort(query_sort).to_list(size)
+
+            async def skip():
+                await server.db.rides.find(query, {"_id": 0}).sort(query_sort).skip(deep).limit(page).to_list(page)
+
+            async def keyset():
+                await server.paginate(server.db.rides, query, "ride_id", page, cursor)
+
+            results = [await measure(func, repeat if func is not full else max(1, repeat // 5))
+                       for func in (full, skip, keyset)]
+            print(f"{size:>8} " + " ".join(f"{ms:>8.2f} ms {kib:>8.0f} KiB" for ms, kib in results))
+
+            if size <= 10_000:
+                seen = await walk_all(user_id, page)
+                assert len(seen) == size and len(set(seen)) == size, (len(seen), len(set(seen)))
+        finally:
+            await server.db.rides.delete_many({"user_id": user_id})
+
+    print("\nFull walks with next_cursor returned every ride exactly once")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keyset vs offset pagination benchmark")
+    parser.add_argument("--page", type=int, default=50, help="Rides per page")
+    parser.add_argument("--repeat", type=int, default=20, help="Requests per measurement")
+    args = parser.parse_args()
+    asyncio.run(run(args.page, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
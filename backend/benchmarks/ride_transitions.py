@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Ride state machine benchmark
+
+Seeds pending rides in the MongoDB at MONGO_URL/DB_NAME and compares the
+former find_one + update_one driver handlers with transition_ride():
+
+- latency of a full accept -> en_route -> arrived -> start -> complete
+  lifecycle, one ride at a time
+- 100 drivers accepting the same pending ride concurrently, which must
+  produce exactly one assignment
+
+Side effects are left out of the timings. The seeded documents are
+removed afterwards.
+
+Usage (from backend/):
+    python benchmarks/ride_transitions.py [--rides 200] [--drivers 100]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "benchmark")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+from fastapi import HTTPException  # noqa: E402
+
+import server  # noqa: E402
+
+LIFECYCLE = ["accept", "en_route", "arrived", "start", "complete"]
+
+
+async def legacy_transition(ride_id, action, driver_id):
+    """Reference implementation: the former find-then-update handlers"""
+    transition = server.RIDE_TRANSITIONS[action]
+    query = {"ride_id": ride_id, "status": {"$in": list(transition.from_statuses)}}
+    if not transition.claims_ride:
+        query["driver_id"] = driver_id
+
+    ride = await server.db.rides.find_one(query, {"_id": 0})
+    if not ride:
+        raise HTTPException(status_code=404, detail=transition.not_found)
+
+    changes = {"status": transition.to_status}
+    if transition.claims_ride:
+        changes["driver_id"] = driver_id
+    if transition.timestamp_field:
+        changes[transition.timestamp_field] = datetime.now(timezone.utc)
+    await server.db.rides.update_one({"ride_id": ride_id}, {"$set": changes})
+
+
+async def seed(prefix, count):
+    ride_ids = [f"ride_{prefix}_{uuid.uuid4().hex[:10]}" for _ in range(count)]
+    await server.db.rides.insert_many([
+        {
+            "ride_id": ride_id,
+            "status": "pending",
+            "price": 80.0,
+            "pickup": {"address": "Gare Cornavin, Genève", "lat": 46.2102, "lon": 6.1424},
+            "created_at": datetime.now(timezone.utc)
+        }
+        for ride_id in ride_ids
+    ])
+    return ride_ids
+
+
+async def lifecycle_latency(transition, ride_ids):
+    latencies = {action: [] for action in LIFECYCLE}
+    for ride_id in ride_ids:
+        for action in LIFECYCLE:
+            start = time.perf_counter()
+            await transition(ride_id, action, "driver_bench")
+            latencies[action].append(time.perf_counter() - start)
+    return {action: np.percentile(values, 50) * 1e3 for action, values in latencies.items()}
+
+
+async def concurrent_accepts(transition, ride_id, drivers):
+    async def attempt(n):
+        try:
+            await transition(ride_id, "accept", f"driver_bench_{n}")
+            return True
+        except HTTPException:
+            return False
+
+    results = await asyncio.gather(*(attempt(n) for n in range(drivers)))
+    return sum(results)
+
+
+async def run(rides, drivers):
+    side_effects = {name: t.side_effects for name, t in server.RIDE_TRANSITIONS.items()}
+    for transition in server.RIDE_TRANSITIONS.values():
+        transition.side_effects = ()
+    prefix = uuid.uuid4().hex[:6]
+    await server.db.rides.create_index("ride_id")
+
+    try:
+        legacy = await lifecycle_latency(legacy_transition, await seed(prefix, rides))
+        atomic = await lifecycle_latency(server.transition_ride, await seed(prefix, rides))
+
+        print(f"{rides} ride lifecycles, p50 per transition")
+        print(f"{'transition':>10} {'find+update':>14} {'atomic':>12} {'ratio':>7}")
+        for action in LIFECYCLE:
+            print(f"{action:>10} {legacy[action]:>11.3f} ms {atomic[action]:>9.3f} ms "
+                  f"{atomic[action] / legacy[action]:>6.2f}x")
+
+        print(f"\n{drivers} concurrent accepts on one pending ride, 20 rounds")
+        for name, transition in (("find+update", legacy_transition), ("atomic", server.transition_ride)):
+            winners = [
+                await concurrent_accepts(transition, ride_id, drivers)
+                for ride_id in await seed(prefix, 20)
+            ]
+            print(f"{name:>12}: winners per ride min={min(winners)} max={max(winners)}")
+        assert all(count == 1 for count in winners), winners
+    finally:
+        for name, effects in side_effects.items():
+            server.RIDE_TRANSITIONS[name].side_effects = effects
+        await server.db.rides.delete_many({"ride_id": {"$regex": f"^ride_{prefix}_"}})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ride state machine benchmark")
+    parser.add_argument("--rides", type=int, default=200, help="Ride lifecycles per implementation")
+    parser.add_argument("--drivers", type=int, default=100, help="Concurrent accept attempts per ride")
+    args = parser.parse_args()
+    asyncio.run(run(args.rides, args.drivers))
+
+
+if __name__ == "__main__":
+    main()
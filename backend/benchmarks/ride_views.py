@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Ride view (projection profile) benchmark
+
+Seeds --rides realistic ride documents in the MongoDB at MONGO_URL/DB_NAME
+and, for each profile in RIDE_VIEWS, measures a 100-ride page the way the
+list endpoints serve it:
+
+    fetch    find() with the profile's projection, BSON decoded by the driver
+    encode   jsonable_encoder + JSON rendering, as FastAPI does for responses
+    bytes    size of the JSON payload
+
+The seeded documents are removed afterwards.
+
+Usage (from backend/):
+    python benchmarks/ride_views.py [--rides 2000] [--repeat 50]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "benchmark")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+import server  # noqa: E402
+
+PAGE = 100
+PLACES = [
+    ("Aéroport de Genève, Route de l'Aéroport 21, 1215 Le Grand-Saconnex", 46.2381, 6.1089),
+    ("Lausanne Gare, Place de la Gare 9, 1003 Lausanne", 46.5167, 6.6291),
+    ("Montreux, Grand-Rue 100, 1820 Montreux", 46.4312, 6.9107),
+    ("Verbier, Place Centrale, 1936 Verbier", 46.0961, 7.2286),
+    ("Zürich Flughafen, 8058 Zürich", 47.4582, 8.5555)
+]
+
+
+def make_ride(rng, tag, n):
+    (p_addr, p_lat, p_lon), (d_addr, d_lat, d_lon) = rng.sample(PLACES, 2)
+    created_at = datetime(2026, 6, 1, tzinfo=timezone.utc) + timedelta(minutes=n)
+    return {
+        "ride_id": f"ride_{tag}_{n:06d}",
+        "user_id": f"user_{tag}",
+        "pickup": {"latitude": p_lat, "longitude": p_lon, "address": p_addr},
+        "destination": {"latitude": d_lat, "longitude": d_lon, "address": d_addr},
+        "vehicle_type": rng.choice(["eco", "berline", "van", "bus"]),
+        "price": round(rng.uniform(40, 400), 2),
+        "distance_km": round(rng.uniform(5, 200), 1),
+        "duration_minutes": round(rng.uniform(10, 180), 1),
+        "price_source": "quote",
+        "tariff_version": 3,
+        "payment_method": "card",
+        "status": "pending",
+        "billing_type": "immediate",
+        "notes": "Deux valises et une paire de skis. Merci d'appeler à l'arrivée, interphone en panne.",
+        "scheduled_time": created_at + timedelta(hours=rng.randrange(1, 48)),
+        "created_at": created_at,
+        "contact": {
+            "name": "Camille Rochat",
+            "email": f"client.{n}@example.ch",
+            "phone": "+41 79 123 45 67"
+        }
+    }
+
+
+async def measure(query, projection, repeat):
+    fetch, encode, size = [], [], 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rides = await server.db.rides.find(query, projection).sort("created_at", -1).limit(PAGE).to_list(PAGE)
+        fetch.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        body = JSONResponse(content=jsonable_encoder({"rides": rides})).body
+        encode.append(time.perf_counter() - start)
+        size = len(body)
+    return np.percentile(fetch, 50) * 1e3, np.percentile(encode, 50) * 1e3, size
+
+
+async def run(rides, repeat):
+    tag = uuid.uuid4().hex[:8]
+    rng = random.Random(5)
+    await server.db.rides.insert_many([make_ride(rng, tag, n) for n in range(rides)])
+    query = {"user_id": f"user_{tag}"}
+
+    try:
+        print(f"page of {PAGE} rides out of {rides}, p50 over {repeat} requests")
+        print(f"{'view':>10} {'fetch':>10} {'encode':>10} {'bytes':>9} {'vs full':>8}")
+
+        results = {view: await measure(query, projection, repeat) for view, projection in server.RIDE_VIEWS.items()}
+        full_size = results["full"][2]
+        for view, (fetch, encode, size) in results.items():
+            print(f"{view:>10} {fetch:>7.2f} ms {encode:>7.2f} ms {size:>9} {size / full_size:>7.0%}")
+    finally:
+        await server.db.rides.delete_many(query)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ride projection profile benchmark")
+    parser.add_argument("--rides", type=int, default=2000, help="Rides to seed")
+    parser.add_argument("--repeat", type=int, default=50, help="Requests per view")
+    args = parser.parse_args()
+    asyncio.run(run(args.rides, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Session cache benchmark for authenticated endpoints
+
+Seeds a user and a session in the MongoDB at MONGO_URL/DB_NAME, then
+calls GET /api/auth/me through the ASGI app with and without the session
+cache and reports p50/p99 latency and the cache counters. The seeded
+documents are removed afterwards.
+
+Usage (from backend/):
+    python benchmarks/session_cache.py [--requests 2000]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "benchmark")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx  # noqa: E402
+import numpy as np  # noqa: E402
+
+import server  # noqa: E402
+
+
+async def seed():
+    user_id = f"user_bench_{uuid.uuid4().hex[:8]}"
+    token = f"bench_{uuid.uuid4().hex}"
+    await server.db.users.insert_one({
+        "user_id": user_id,
+        "email": f"{user_id}@example.com",
+        "name": "Benchmark Driver",
+        "role": "driver",
+        "account_type": "personal",
+        "created_at": datetime.now(timezone.utc)
+    })
+    await server.db.user_sessions.insert_one({
+        "user_id": user_id,
+        "session_token": token,
+        "expires_at": datetime.now(timezone.utc) + timedelta(hours=1),
+        "created_at": datetime.now(timezone.utc)
+    })
+    return user_id, token
+
+
+async def measure(http, token, requests):
+    headers = {"Authorization": f"Bearer {token}"}
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = await http.get("/api/auth/me", headers=headers)
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+    return np.percentile(latencies, [50, 99]) * 1e3
+
+
+async def run(requests):
+    user_id, token = await seed()
+    transport = httpx.ASGITransport(app=server.app)
+    enabled = server.session_cache
+
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+            print(f"{requests} requests to GET /api/auth/me")
+            print(f"{'mode':>10} {'p50':>10} {'p99':>10}")
+
+            server.session_cache = server.SessionCache(0, 0, 0)
+            p50, p99 = await measure(http, token, requests)
+            print(f"{'no cache':>10} {p50:>7.3f} ms {p99:>7.3f} ms")
+
+            server.session_cache = enabled
+            p50, p99 = await measure(http, token, requests)
+            print(f"{'cache':>10} {p50:>7.3f} ms {p99:>7.3f} ms")
+            print(f"\nCache stats: {enabled.stats()}")
+    finally:
+        server.session_cache = enabled
+        await server.db.user_sessions.delete_one({"session_token": token})
+        await server.db.users.delete_one({"user_id": user_id})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Session cache latency benchmark")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per mode")
+    args = parser.parse_args()
+    asyncio.run(run(args.requests))
+
+
+if __name__ == "__main__":
+    main()
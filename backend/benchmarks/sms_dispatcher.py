@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+SMS burst benchmark: unbounded sends vs the rate-limited SMSDispatcher
+
+Plugs an in-process stand-in provider into the dispatcher. Like Twilio,
+the stand-in accepts --rate messages per second and answers anything
+faster with a 429 and Retry-After. A burst of --messages SMS is sent:
+
+    unbounded   asyncio.gather straight to the provider (the old path)
+    dispatcher  send_sms_notification through SMSDispatcher
+
+Usage (from backend/):
+    python benchmarks/sms_dispatcher.py [--messages 40] [--rate 10]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "benchmark")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import server  # noqa: E402
+
+LATENCY = 0.05
+
+
+class StandInSMSProvider(server.SMSProvider):
+    """Accepts `rate` messages per second (one-second window), 429s the rest"""
+
+    name = "stand-in"
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.accepted = []
+        self.rejected = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def send(self, to_phone, message):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(LATENCY)
+            now = time.monotonic()
+            window = [t for t in self.accepted if t > now - 1]
+            if len(window) >= self.rate:
+                self.rejected += 1
+                return {"status": "rate_limited", "retry_after": window[0] + 1 - now}
+            self.accepted.append(now)
+            return {"status": "sent"}
+        finally:
+            self.in_flight -= 1
+
+
+async def burst(send, messages):
+    start = time.perf_counter()
+    results = await asyncio.gather(*(send(f"+4179{i:07d}", "Votre course est confirmée") for i in range(messages)))
+    elapsed = time.perf_counter() - start
+    return sum(r["status"] == "sent" for r in results), elapsed
+
+
+async def run(messages, rate):
+    print(f"Burst of {messages} SMS, provider limit {rate}/s")
+    print(f"{'mode':>11} {'sent':>6} {'429s':>6} {'in flight':>10} {'time':>8}")
+
+    provider = StandInSMSProvider(rate)
+    sent, elapsed = await burst(provider.send, messages)
+    print(f"{'unbounded':>11} {sent:>6} {provider.rejected:>6} {provider.max_in_flight:>10} {elapsed:>6.2f} s")
+
+    await asyncio.sleep(1)
+    provider = StandInSMSProvider(rate)
+    server.sms_dispatcher = server.SMSDispatcher(provider, rate, rate, server.SMS_MAX_IN_FLIGHT)
+    sent, elapsed = await burst(server.send_sms_notification, messages)
+    print(f"{'dispatcher':>11} {sent:>6} {provider.rejected:>6} {provider.max_in_flight:>10} {elapsed:>6.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SMS rate-limit benchmark")
+    parser.add_argument("--messages", type=int, default=40)
+    parser.add_argument("--rate", type=int, default=10, help="Provider messages per second")
+    args = parser.parse_args()
+    asyncio.run(run(args.messages, args.rate))
+
+
+if __name__ == "__main__":
+    main()
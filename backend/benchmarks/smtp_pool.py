@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+SMTP delivery benchmark: connection per message vs the SMTPPool
+
+Runs against the local SMTP stand-in (benchmarks/stand_ins.py), which
+waits --delay seconds before its greeting and after each DATA, like a
+remote server's handshake and queueing. Compares:
+
+    per-message  new connection, login and QUIT for every email
+                 (send_email_notification before the pool)
+    pool         send_email_notification on pooled sessions
+    batch        SMTPPool.send_many, several messages per session (how
+                 the notification outbox sends the emails of one lease)
+
+Usage (from backend/):
+    python benchmarks/smtp_pool.py [--messages 100] [--concurrency 10] [--delay 0.02]
+"""
+
+import argparse
+import asyncio
+import os
+import smtplib
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "benchmark")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import server  # noqa: E402
+from stand_ins import SMTPStandIn, TwilioStandIn, point_server_at  # noqa: E402
+
+
+def send_per_message(message):
+    with smtplib.SMTP(server.SMTP_HOST, server.SMTP_PORT) as connection:
+        connection.login(server.SMTP_USERNAME, server.SMTP_PASSWORD)
+        connection.send_message(message)
+
+
+async def run_mode(name, send, messages, concurrency, smtp):
+    connections, delivered = smtp.connections, smtp.messages
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            await send(i)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(messages)))
+    elapsed = time.perf_counter() - start
+    assert smtp.messages - delivered == messages
+    print(f"{name:>12} {elapsed:>8.2f} s {messages / elapsed:>9.1f} msg/s "
+          f"{smtp.connections - connections:>12}")
+
+
+async def run(messages, concurrency, delay):
+    smtp = SMTPStandIn(delay).start()
+    twilio = TwilioStandIn().start()
+    point_server_at(server, smtp, twilio)
+    email = lambda i: server.build_email(f"client{i}@example.com", f"Course {i}", "Confirmation")
+
+    print(f"{messages} emails, concurrency {concurrency}, stand-in delay {delay * 1e3:.0f} ms, "
+          f"pool size {server.smtp_pool.size}")
+    print(f"{'mode':>12} {'time':>10} {'throughput':>13} {'connections':>12}")
+
+    try:
+        await run_mode("per-message", lambda i: asyncio.to_thread(send_per_message, email(i)),
+                       messages, concurrency, smtp)
+
+        async def pooled(i):
+            result = await server.send_email_notification(f"client{i}@example.com", f"Course {i}", "Confirmation")
+            assert result == {"status": "sent"}, result
+        await run_mode("pool", pooled, messages, concurrency, smtp)
+
+        batch = max(1, messages // concurrency)
+        batches = [list(range(i, min(i + batch, messages))) for i in range(0, messages, batch)]
+        connections, delivered = smtp.connections, smtp.messages
+        start = time.perf_counter()
+        await asyncio.gather(*(server.smtp_pool.send_many([email(i) for i in chunk]) for chunk in batches))
+        elapsed = time.perf_counter() - start
+        assert smtp.messages - delivered == messages
+        print(f"{'batch':>12} {elapsed:>8.2f} s {messages / elapsed:>9.1f} msg/s "
+              f"{smtp.connections - connections:>12}")
+    finally:
+        await asyncio.to_thread(server.smtp_pool.close)
+        smtp.shutdown()
+        twilio.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SMTP connection pool benchmark")
+    parser.add_argument("--messages", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--delay", type=float, default=0.02, help="Stand-in delay in seconds")
+    args = parser.parse_args()
+    asyncio.run(run(args.messages, args.concurrency, args.delay))
+
+
+if __name__ == "__main__":
+    main()
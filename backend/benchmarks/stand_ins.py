@@ -0,0 +1,133 @@
+"""
+Local stand-ins for the SMTP server and the Twilio API
+
+Both answer like the real services after a configurable delay, run in
+background threads and count connections and delivered messages, so
+benchmarks can measure provider latency without sending anything.
+"""
+
+import json
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class SMTPStandInHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: EHLO, AUTH, MAIL, RCPT, DATA, RSET, NOOP, QUIT"""
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        stand_in = self.server
+        with stand_in.lock:
+            stand_in.connections += 1
+        time.sleep(stand_in.delay)
+        self.reply("220 stand-in ESMTP")
+
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip().upper()
+
+            if command.startswith(("EHLO", "HELO")):
+                self.reply("250-stand-in")
+                self.reply("250 AUTH PLAIN LOGIN")
+            elif command.startswith("AUTH"):
+                self.reply("235 Authentication successful")
+            elif command.startswith(("MAIL", "RCPT", "RSET", "NOOP")):
+                self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                time.sleep(stand_in.delay)
+                with stand_in.lock:
+                    stand_in.messages += 1
+                self.reply("250 Queued")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, delay=0.0):
+        super().__init__(("127.0.0.1", 0), SMTPStandInHandler)
+        self.delay = delay
+        self.connections = 0
+        self.messages = 0
+        self.lock = threading.Lock()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class TwilioStandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.server.delay)
+        with self.server.lock:
+            self.server.messages += 1
+        data = json.dumps({"sid": "SM_stand_in", "status": "queued"}).encode()
+        self.send_response(201)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class TwilioStandIn(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, delay=0.0):
+        super().__init__(("127.0.0.1", 0), TwilioStandInHandler)
+        self.delay = delay
+        self.connections = 0
+        self.messages = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+def point_server_at(server, smtp, twilio, admin_email="admin@romuo.ch", admin_phone="+41790000001"):
+    """Configure the server module to deliver to the stand-ins"""
+    server.SMTP_HOST = "127.0.0.1"
+    server.SMTP_PORT = smtp.port
+    server.SMTP_USERNAME = "romuo"
+    server.SMTP_PASSWORD = "secret"
+    server.SMTP_FROM = "noreply@romuo.ch"
+    server.SMTP_USE_TLS = False
+    server.TWILIO_API_URL = twilio.url
+    server.TWILIO_ACCOUNT_SID = "AC_stand_in"
+    server.TWILIO_AUTH_TOKEN = "secret"
+    server.TWILIO_FROM_NUMBER = "+41000000000"
+    server.ADMIN_NOTIFICATION_EMAIL = admin_email
+    server.ADMIN_NOTIFICATION_PHONE = admin_phone
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Zone matching benchmark for the Romuo.ch pricing engine
+
+Compares the scalar zone loop (haversine_distance/point_in_zone per zone)
+with the vectorized ZoneIndex kernel, both as a full scan and narrowed by
+the spatial grid, at 5, 500 and 50'000 zones, and checks that they all
+return the same matches. The grid column is match_fixed_zones as served,
+which loops over the candidates when there are fewer than
+ZONE_SCALAR_MAX_CANDIDATES; parity is checked on both of its paths.
+
+Usage (from backend/):
+    python benchmarks/zone_matching.py
+"""
+
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "benchmark")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+
+import server  # noqa: E402
+
+ZONE_COUNTS = [5, 500, 50_000]
+ROUTES = 200
+BATCH_SIZE = 200
+
+# Rough bounding box of Romandie + Zürich
+LAT_RANGE = (46.1, 47.6)
+LON_RANGE = (6.0, 8.7)
+
+
+def random_point(rng):
+    return rng.uniform(*LAT_RANGE), rng.uniform(*LON_RANGE)
+
+
+def make_zones(count, rng):
+    zones = list(server.DEFAULT_FIXED_ZONES[:count])
+    while len(zones) < count:
+        o_lat, o_lon = random_point(rng)
+        d_lat, d_lon = random_point(rng)
+        zones.append({
+            "zone_id": f"bench_{len(zones)}",
+            "name": f"Bench zone {len(zones)}",
+            "origin": {"lat": o_lat, "lon": o_lon, "radius_km": rng.uniform(0.5, 3)},
+            "destination": {"lat": d_lat, "lon": d_lon, "radius_km": rng.uniform(0.5, 3)},
+            "prices": {"eco": 50, "berline": 70, "van": 100, "bus": 150},
+            "bidirectional": rng.random() < 0.8,
+            "active": True
+        })
+    return zones
+
+
+def make_routes(zones, rng):
+    """Half the routes start inside a known zone so matches are exercised"""
+    routes = []
+    for i in range(ROUTES):
+        if i % 2 == 0:
+            zone = rng.choice(zones)
+            routes.append((zone["origin"]["lat"], zone["origin"]["lon"],
+                           zone["destination"]["lat"], zone["destination"]["lon"]))
+        else:
+            routes.append((*random_point(rng), *random_point(rng)))
+    return routes
+
+
+def scalar_matches(zones, p_lat, p_lon, d_lat, d_lon):
+    """Reference implementation: the original per-zone loop"""
+    matches = []
+    for zone in zones:
+        origin = zone["origin"]
+        destination = zone["destination"]
+        if (server.point_in_zone(p_lat, p_lon, origin) and
+                server.point_in_zone(d_lat, d_lon, destination)):
+            matches.append((zone["zone_id"], "forward"))
+        if zone.get("bidirectional", True):
+            if (server.point_in_zone(p_lat, p_lon, destination) and
+                    server.point_in_zone(d_lat, d_lon, origin)):
+                matches.append((zone["zone_id"], "reverse"))
+    return matches
+
+
+def full_scan_matches(p_lat, p_lon, d_lat, d_lon):
+    """Kernel over every zone, without the grid"""
+    forward, reverse = server.zone_index.match_masks(p_lat, p_lon, d_lat, d_lon)
+    idx = np.arange(len(server.zone_index.zones))
+    return server._collect_zone_matches(forward, reverse, idx)
+
+
+def as_ids(matches):
+    return [(m["zone"]["zone_id"], m["direction"]) for m in matches]
+
+
+def timed(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def run():
+    rng = random.Random(42)
+    print(f"{'zones':>8} {'scalar/quote':>14} {'full scan':>14} {'grid/quote':>14} {'batch/quote':>14}")
+
+    for count in ZONE_COUNTS:
+        zones = make_zones(count, rng)
+        routes = make_routes(zones, rng)
+        server.zone_index.set_zones(zones)
+
+        # Parity check against the scalar loop
+        scalar_limit = server.ZONE_SCALAR_MAX_CANDIDATES
+        for route in routes:
+            expected = scalar_matches(zones, *route)
+            assert as_ids(server.match_fixed_zones(*route)) == expected, route
+            assert as_ids(full_scan_matches(*route)) == expected, route
+            server.ZONE_SCALAR_MAX_CANDIDATES = 0
+            assert as_ids(server.match_fixed_zones(*route)) == expected, route
+            server.ZONE_SCALAR_MAX_CANDIDATES = scalar_limit
+
+        columns = np.array(routes[:BATCH_SIZE]).T
+        batched = server.match_fixed_zones_batch(*columns)
+        for route, matches in zip(routes, batched):
+            assert as_ids(matches) == scalar_matches(zones, *route), route
+
+        scalar_routes = routes[:10] if count > 1000 else routes
+        scalar = timed(lambda: [scalar_matches(zones, *r) for r in scalar_routes], 1) / len(scalar_routes)
+        full_scan = timed(lambda: [full_scan_matches(*r) for r in routes], 1) / len(routes)
+        grid = timed(lambda: [server.match_fixed_zones(*r) for r in routes], 3) / len(routes)
+        batch = timed(lambda: server.match_fixed_zones_batch(*columns), 3) / BATCH_SIZE
+
+        print(f"{count:>8} {scalar * 1e6:>11.1f} µs {full_scan * 1e6:>11.1f} µs "
+              f"{grid * 1e6:>11.1f} µs {batch * 1e6:>11.1f} µs")
+
+
+if __name__ == "__main__":
+    run()
@@ -1,8 +1,10 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Request, Response, Depends, Query
+from fastapi import FastAPI, APIRouter, HTTPException, Request, Response, Depends, Query, Header
 from fastapi.responses import JSONResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure, PyMongoError
 import os
 import logging
 from pathlib import Path
@@ -12,9 +14,24 @@ import uuid
 from datetime import datetime, timezone, timedelta
 import httpx
 import io
+import json
 import asyncio
+import math
 import smtplib
+import queue
+from concurrent.futures import ThreadPoolExecutor
+import importlib.util
+import jwt
+import hmac
+import hashlib
+import base64
+import secrets
+from types import MappingProxyType
+import time
+from collections import OrderedDict
+import numpy as np
 from email.message import EmailMessage
+from email.utils import parsedate_to_datetime
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -166,6 +183,141 @@ DISCOUNT_RATES = {
     "off_peak": 0.10,
 }
 
+DISCOUNT_LABELS = {
+    "youth": "Réduction jeunes (-26 ans)",
+    "ride_sharing": "Partage de course",
+    "off_peak": "Heure creuse",
+}
+
+# =============================================================================
+# TARIFF SNAPSHOT - Versioned rates compiled for the quote path
+# =============================================================================
+
+TARIFF_RATE_FIELDS = ("base_fare", "rate_per_km", "rate_per_minute")
+TARIFF_VEHICLE_FIELDS = ("name", "min_passengers", "max_passengers") + TARIFF_RATE_FIELDS
+
+class TariffSnapshot:
+    """Immutable, precompiled view of one tariff version.
+
+    VEHICLE_TYPES, PEAK_HOURS and DISCOUNT_RATES above are only the seed
+    for the first version stored in MongoDB; quotes read ``tariffs.current``
+    once and use its precomputed coefficients, peak-hour table and
+    discount label tuples.
+    """
+
+    __slots__ = (
+        "version", "loaded_at", "vehicle_types", "categories", "category_index",
+        "coefficients", "base_fare", "rate_per_km", "rate_per_minute",
+        "peak_hours", "peak_by_hour", "discount_rates", "discount_labels"
+    )
+
+    def __init__(self, version: int, vehicle_types: dict, peak_hours: dict, discount_rates: dict):
+        missing = set(DISCOUNT_LABELS) - set(discount_rates)
+        if missing:
+            raise ValueError(f"Missing discount rates: {', '.join(sorted(missing))}")
+        for vtype, vehicle in vehicle_types.items():
+            absent = [f for f in TARIFF_VEHICLE_FIELDS if f not in vehicle]
+            if absent:
+                raise ValueError(f"Vehicle type {vtype} is missing {', '.join(absent)}")
+        categories = tuple(vehicle_types.keys())
+        coefficients = {
+            vtype: tuple(float(vehicle_types[vtype][field]) for field in TARIFF_RATE_FIELDS)
+            for vtype in categories
+        }
+        peak_hours = {period: (int(start), int(end)) for period, (start, end) in peak_hours.items()}
+        values = {
+            "version": version,
+            "loaded_at": datetime.now(timezone.utc),
+            "vehicle_types": MappingProxyType({k: MappingProxyType(dict(v)) for k, v in vehicle_types.items()}),
+            "categories": categories,
+            "category_index": MappingProxyType({vtype: i for i, vtype in enumerate(categories)}),
+            "coefficients": MappingProxyType(coefficients),
+            "base_fare": np.array([coefficients[v][0] for v in categories]),
+            "rate_per_km": np.array([coefficients[v][1] for v in categories]),
+            "rate_per_minute": np.array([coefficients[v][2] for v in categories]),
+            "peak_hours": MappingProxyType(peak_hours),
+            "peak_by_hour": tuple(
+                any(start <= hour < end for start, end in peak_hours.values())
+                for hour in range(24)
+            ),
+            "discount_rates": MappingProxyType({k: float(v) for k, v in discount_rates.items()}),
+            "discount_labels": MappingProxyType({
+                discount_type: (discount_type, round(rate * 100), DISCOUNT_LABELS.get(discount_type, discount_type))
+                for discount_type, rate in discount_rates.items()
+            })
+        }
+        for array in ("base_fare", "rate_per_km", "rate_per_minute"):
+            values[array].flags.writeable = False
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("TariffSnapshot is immutable")
+
+    def discount_entry(self, discount_type: str) -> dict:
+        """Discount line as shown in price breakdowns"""
+        discount_type, percent, label = self.discount_labels[discount_type]
+        return {"type": discount_type, "percent": percent, "label": label}
+
+    def vehicle_list(self) -> List[dict]:
+        return [dict(vehicle) for vehicle in self.vehicle_types.values()]
+
+    def to_dict(self) -> dict:
+        return {
+            "version": self.version,
+            "loaded_at": self.loaded_at.isoformat(),
+            "vehicle_types": {k: dict(v) for k, v in self.vehicle_types.items()},
+            "peak_hours": {k: list(v) for k, v in self.peak_hours.items()},
+            "discount_rates": dict(self.discount_rates)
+        }
+
+class TariffStore:
+    """Holds the current TariffSnapshot and swaps it when a new version is published"""
+
+    def __init__(self):
+        self.current = TariffSnapshot(0, VEHICLE_TYPES, PEAK_HOURS, DISCOUNT_RATES)
+
+    async def seed(self):
+        """Store the built-in tariff as version 1 if MongoDB has none"""
+        await db.tariffs.create_index("version", unique=True)
+        if await db.tariffs.count_documents({}) == 0:
+            await self.publish(VEHICLE_TYPES, PEAK_HOURS, DISCOUNT_RATES)
+
+    async def reload(self):
+        """Swap to the latest stored version if it differs from the current one"""
+        latest = await db.tariffs.find_one({}, {"_id": 0, "version": 1}, sort=[("version", -1)])
+        if not latest or latest["version"] == self.current.version:
+            return
+
+        doc = await db.tariffs.find_one({"version": latest["version"]}, {"_id": 0})
+        self.current = TariffSnapshot(doc["version"], doc["vehicle_types"], doc["peak_hours"], doc["discount_rates"])
+        quote_cache.clear()
+        logger.info(f"Tariff version {doc['version']} loaded")
+
+    async def publish(self, vehicle_types: dict, peak_hours: dict, discount_rates: dict) -> int:
+        """Store a new tariff version and switch this worker to it"""
+        # Compile first so an invalid tariff is never stored
+        TariffSnapshot(0, vehicle_types, peak_hours, discount_rates)
+
+        counter = await db.settings.find_one_and_update(
+            {"key": "tariff_version"},
+            {"$inc": {"value": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        version = counter["value"]
+        await db.tariffs.insert_one({
+            "version": version,
+            "vehicle_types": vehicle_types,
+            "peak_hours": {k: list(v) for k, v in peak_hours.items()},
+            "discount_rates": discount_rates,
+            "created_at": datetime.now(timezone.utc)
+        })
+        await self.reload()
+        return version
+
+tariffs = TariffStore()
+
 # =============================================================================
 # HELPER FUNCTIONS
 # =============================================================================
@@ -182,16 +334,13 @@ def calculate_user_age(date_of_birth: str) -> int:
 
 def is_peak_hour(scheduled_time: datetime) -> bool:
     """Check if the given time is during peak hours"""
-    hour = scheduled_time.hour
-    for period, (start, end) in PEAK_HOURS.items():
-        if start <= hour < end:
-            return True
-    return False
+    return tariffs.current.peak_by_hour[scheduled_time.hour]
+
+EARTH_RADIUS_KM = 6371
 
 def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """Calculate the Haversine distance between two points in km"""
-    import math
-    R = 6371  # Earth's radius in km
+    R = EARTH_RADIUS_KM
     dLat = math.radians(lat2 - lat1)
     dLon = math.radians(lon2 - lon1)
     a = math.sin(dLat/2)**2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dLon/2)**2
@@ -203,44 +352,439 @@ def point_in_zone(lat: float, lon: float, zone_point: dict) -> bool:
     distance = haversine_distance(lat, lon, zone_point["lat"], zone_point["lon"])
     return distance <= zone_point.get("radius_km", 2)
 
-async def check_fixed_zone_price(pickup_lat: float, pickup_lon: float,
-                                  dest_lat: float, dest_lon: float,
-                                  vehicle_type: str) -> Optional[dict]:
-    """Check if a route matches a fixed price zone"""
-    # First check database zones
-    zones = await db.zones.find({"active": True}).to_list(100)
+def haversine_distance_np(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Vectorized haversine_distance; arguments broadcast like NumPy arrays"""
+    dLat = np.radians(lat2 - lat1)
+    dLon = np.radians(lon2 - lon1)
+    a = np.sin(dLat/2)**2 + np.cos(np.radians(lat1)) * np.cos(np.radians(lat2)) * np.sin(dLon/2)**2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1-a))
+    return EARTH_RADIUS_KM * c
 
-    # Add default zones if none in DB
-    if not zones:
-        zones = DEFAULT_FIXED_ZONES
+# =============================================================================
+# ROAD DISTANCE MATRIX - Offline cell-to-cell routing
+# =============================================================================
 
-    for zone in zones:
-        origin = zone["origin"]
-        destination = zone["destination"]
-
-        # Check forward direction
-        if (point_in_zone(pickup_lat, pickup_lon, origin) and
-            point_in_zone(dest_lat, dest_lon, destination)):
-            if vehicle_type in zone.get("prices", {}):
-                return {
-                    "zone_id": zone.get("zone_id"),
-                    "zone_name": zone.get("name"),
-                    "fixed_price": zone["prices"][vehicle_type],
-                    "direction": "forward"
-                }
-
-        # Check reverse direction if bidirectional
-        if zone.get("bidirectional", True):
-            if (point_in_zone(pickup_lat, pickup_lon, destination) and
-                point_in_zone(dest_lat, dest_lon, origin)):
-                if vehicle_type in zone.get("prices", {}):
-                    return {
-                        "zone_id": zone.get("zone_id"),
-                        "zone_name": zone.get("name"),
-                        "fixed_price": zone["prices"][vehicle_type],
-                        "direction": "reverse"
-                    }
+ROAD_MATRIX_PATH = os.environ.get("ROAD_MATRIX_PATH", str(ROOT_DIR / "data" / "road_matrix"))
+
+class RoadMatrix:
+    """Precomputed road distances and durations between Swiss grid cells.
+
+    Built offline by tools/build_road_matrix.py. The .npy files are
+    memory-mapped read-only on first use, so uvicorn workers share the same
+    pages and a lookup is two array reads.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.loaded = False
+        self.meta: Optional[dict] = None
+        self.distance_km = None
+        self.duration_min = None
+
+    def _load(self):
+        self.loaded = True
+        if not (self.path / "meta.json").exists():
+            logger.info(f"No road matrix at {self.path}, using distance approximation")
+            return
+
+        self.meta = json.loads((self.path / "meta.json").read_text())
+        self.distance_km = np.load(self.path / "distance_km.npy", mmap_mode="r")
+        self.duration_min = np.load(self.path / "duration_min.npy", mmap_mode="r")
+        logger.info(f"Road matrix loaded: {self.meta['rows']}x{self.meta['cols']} cells")
+
+    def available(self) -> bool:
+        if not self.loaded:
+            self._load()
+        return self.meta is not None
+
+    def cells(self, lat, lon) -> np.ndarray:
+        """Flat cell index for points (-1 outside the grid)"""
+        meta = self.meta
+        row = np.floor((np.asarray(lat, dtype=float) - meta["lat_min"]) / meta["cell_deg"]).astype(np.intp)
+        col = np.floor((np.asarray(lon, dtype=float) - meta["lon_min"]) / meta["cell_deg"]).astype(np.intp)
+        inside = (row >= 0) & (row < meta["rows"]) & (col >= 0) & (col < meta["cols"])
+        return np.where(inside, row * meta["cols"] + col, -1)
+
+    def lookup(self, pickup_lat, pickup_lon, dest_lat, dest_lon):
+        """Road distance (km) and duration (min) for one or many routes.
+
+        Returns NaN where the matrix has no answer: outside the grid,
+        unreachable cells, or pickup and destination in the same cell.
+        """
+        origin = self.cells(pickup_lat, pickup_lon)
+        target = self.cells(dest_lat, dest_lon)
+        known = (origin >= 0) & (target >= 0) & (origin != target)
+
+        distance = np.full(origin.shape, np.nan)
+        duration = np.full(origin.shape, np.nan)
+        distance[known] = self.distance_km[origin[known], target[known]]
+        duration[known] = self.duration_min[origin[known], target[known]]
+        return distance, duration
+
+road_matrix = RoadMatrix(ROAD_MATRIX_PATH)
+
+def estimate_route(pickup_lat: float, pickup_lon: float,
+                   dest_lat: float, dest_lon: float) -> tuple:
+    """Road distance (km) and duration (min, or None) for a route.
+
+    Uses the offline road matrix when available and falls back to the
+    haversine distance * 1.3 approximation otherwise.
+    """
+    if road_matrix.available():
+        distance, duration = road_matrix.lookup(pickup_lat, pickup_lon, dest_lat, dest_lon)
+        if not np.isnan(distance):
+            return float(distance), float(duration)
+
+    return haversine_distance(pickup_lat, pickup_lon, dest_lat, dest_lon) * 1.3, None  # Road distance approximation
+
+def estimate_routes(pickup_lat, pickup_lon, dest_lat, dest_lon) -> tuple:
+    """Vectorized estimate_route; durations are NaN where unknown"""
+    pickup_lat = np.asarray(pickup_lat, dtype=float)
+    pickup_lon = np.asarray(pickup_lon, dtype=float)
+    dest_lat = np.asarray(dest_lat, dtype=float)
+    dest_lon = np.asarray(dest_lon, dtype=float)
+
+    # Road distance approximation
+    approximation = haversine_distance_np(pickup_lat, pickup_lon, dest_lat, dest_lon) * 1.3
+    if not road_matrix.available():
+        return approximation, np.full(approximation.shape, np.nan)
+
+    distance, duration = road_matrix.lookup(pickup_lat, pickup_lon, dest_lat, dest_lon)
+    return np.where(np.isnan(distance), approximation, distance), duration
+
+# =============================================================================
+# FIXED ZONE INDEX - Process-local cache of active zones
+# =============================================================================
+
+ZONE_INDEX_REFRESH_SECONDS = int(os.environ.get("ZONE_INDEX_REFRESH_SECONDS", "30"))
+ZONE_GRID_CELL_DEG = float(os.environ.get("ZONE_GRID_CELL_DEG", "0.05"))
+# Below this many candidate zones a plain loop beats the NumPy kernel's call overhead
+ZONE_SCALAR_MAX_CANDIDATES = int(os.environ.get("ZONE_SCALAR_MAX_CANDIDATES", "64"))
+ZONE_CELL_KEY_OFFSET = 1 << 31
+
+def grid_cell(lat: float, lon: float) -> tuple:
+    """Uniform lat/lon grid cell containing a point"""
+    return (math.floor(lat / ZONE_GRID_CELL_DEG), math.floor(lon / ZONE_GRID_CELL_DEG))
+
+def grid_cells(lat, lon) -> tuple:
+    """Vectorized grid_cell: int64 arrays of lat and lon cell indices"""
+    lat_cell = np.floor(np.atleast_1d(np.asarray(lat, dtype=float)) / ZONE_GRID_CELL_DEG).astype(np.int64)
+    lon_cell = np.floor(np.atleast_1d(np.asarray(lon, dtype=float)) / ZONE_GRID_CELL_DEG).astype(np.int64)
+    return lat_cell, lon_cell
+
+def circle_cell_bounds(zone_point: dict) -> tuple:
+    """(lat_min, lon_min, lat_max, lon_max) cells of the rectangle covering a zone point's radius"""
+    lat, lon = zone_point["lat"], zone_point["lon"]
+    # Degree extent of the circle, padded so rounding never drops a cell
+    dlat = math.degrees(zone_point.get("radius_km", 2) / EARTH_RADIUS_KM) * 1.01
+    dlon = dlat / math.cos(math.radians(min(abs(lat) + dlat, 89.9)))
+    return grid_cell(lat - dlat, lon - dlon) + grid_cell(lat + dlat, lon + dlon)
+
+def circle_cells(zone_point: dict) -> List[tuple]:
+    """Grid cells overlapping a zone point's radius"""
+    lat_min, lon_min, lat_max, lon_max = circle_cell_bounds(zone_point)
+    return [
+        (i, j)
+        for i in range(lat_min, lat_max + 1)
+        for j in range(lon_min, lon_max + 1)
+    ]
+
+class ZoneIndex:
+    """In-memory snapshot of the active fixed price zones.
+
+    The quote path only reads ``zones``; MongoDB is hit at startup, after a
+    zone mutation and when another worker has bumped the shared version.
+    Zone centres and radii are also kept in NumPy arrays so a route can be
+    tested against many zones in a single array operation, and a uniform
+    grid over the origin and destination circles narrows each lookup to the
+    zones whose cells cover the pickup and destination points.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self.loaded_at: Optional[datetime] = None
+        self.set_zones(DEFAULT_FIXED_ZONES)
+
+    def set_zones(self, zones: List[dict]):
+        """Swap in a new zone list and rebuild the coordinate arrays"""
+        zones = tuple(zones)
+        self.origin_lat = np.array([z["origin"]["lat"] for z in zones], dtype=float)
+        self.origin_lon = np.array([z["origin"]["lon"] for z in zones], dtype=float)
+        self.origin_radius = np.array([z["origin"].get("radius_km", 2) for z in zones], dtype=float)
+        self.dest_lat = np.array([z["destination"]["lat"] for z in zones], dtype=float)
+        self.dest_lon = np.array([z["destination"]["lon"] for z in zones], dtype=float)
+        self.dest_radius = np.array([z["destination"].get("radius_km", 2) for z in zones], dtype=float)
+        self.bidirectional = np.array([z.get("bidirectional", True) for z in zones], dtype=bool)
+        self.origin_cells = np.array([circle_cell_bounds(z["origin"]) for z in zones], dtype=np.int64).reshape(-1, 4)
+        self.dest_cells = np.array([circle_cell_bounds(z["destination"]) for z in zones], dtype=np.int64).reshape(-1, 4)
+
+        self.origin_grid: Dict[tuple, set] = {}
+        self.dest_grid: Dict[tuple, set] = {}
+        for i, zone in enumerate(zones):
+            for cell in circle_cells(zone["origin"]):
+                self.origin_grid.setdefault(cell, set()).add(i)
+            for cell in circle_cells(zone["destination"]):
+                self.dest_grid.setdefault(cell, set()).add(i)
+
+        # Sorted table of packed cells -> zones touching them, for batch lookups
+        pickup_cells: Dict[int, set] = {}
+        for grid in (self.origin_grid, self.dest_grid):
+            for (i, j), members in grid.items():
+                pickup_cells.setdefault((i << 32) + (j + ZONE_CELL_KEY_OFFSET), set()).update(members)
+        keys = sorted(pickup_cells)
+        self.cell_keys = np.array(keys, dtype=np.int64)
+        self.cell_counts = np.array([len(pickup_cells[k]) for k in keys], dtype=np.intp)
+        self.cell_starts = np.cumsum(self.cell_counts) - self.cell_counts
+        self.cell_zones = np.array([z for k in keys for z in sorted(pickup_cells[k])], dtype=np.intp)
+        self.price_matrices: Dict[tuple, np.ndarray] = {}
+
+        self.zones = zones
+
+    def candidates(self, pickup_lat: float, pickup_lon: float,
+                   dest_lat: float, dest_lon: float) -> set:
+        """Indices of zones whose grid cells cover the route in either direction"""
+        pickup_cell = grid_cell(pickup_lat, pickup_lon)
+        dest_cell = grid_cell(dest_lat, dest_lon)
+        empty = set()
+        forward = self.origin_grid.get(pickup_cell, empty) & self.dest_grid.get(dest_cell, empty)
+        reverse = self.dest_grid.get(pickup_cell, empty) & self.origin_grid.get(dest_cell, empty)
+        return forward | reverse
+
+    def route_candidates(self, pickup_lat, pickup_lon, dest_lat, dest_lon) -> tuple:
+        """Vectorized candidates(): (route, zone) index pairs, ordered by route then zone.
+
+        Pickups are looked up in a sorted cell table, then each pair keeps
+        its zone if the pickup and destination cells fall in the zone's
+        origin and destination cell rectangles, in either direction. Where
+        cells are crowded (over ZONE_SCALAR_MAX_CANDIDATES zones per pickup
+        on average) intersecting the grid sets route by route is cheaper.
+        """
+        pickup_lat_cell, pickup_lon_cell = grid_cells(pickup_lat, pickup_lon)
+        dest_lat_cell, dest_lon_cell = grid_cells(dest_lat, dest_lon)
+        if not len(self.cell_keys):
+            return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+
+        keys = (pickup_lat_cell << 32) + (pickup_lon_cell + ZONE_CELL_KEY_OFFSET)
+        pos = np.minimum(np.searchsorted(self.cell_keys, keys), len(self.cell_keys) - 1)
+        counts = np.where(self.cell_keys[pos] == keys, self.cell_counts[pos], 0)
+        if counts.sum() > ZONE_SCALAR_MAX_CANDIDATES * len(keys):
+            pairs = [
+                (r, z)
+                for r, route in enumerate(zip(pickup_lat, pickup_lon, dest_lat, dest_lon))
+                for z in sorted(self.candidates(*route))
+            ]
+            return np.array(pairs, dtype=np.intp).reshape(-1, 2).T
+
+        route_ids = np.repeat(np.arange(len(keys)), counts)
+        within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        zone_ids = self.cell_zones[np.repeat(self.cell_starts[pos], counts) + within]
+
+        def inside(bounds, lat_cell, lon_cell):
+            return ((bounds[:, 0] <= lat_cell) & (lat_cell <= bounds[:, 2]) &
+                    (bounds[:, 1] <= lon_cell) & (lon_cell <= bounds[:, 3]))
+
+        origin, destination = self.origin_cells[zone_ids], self.dest_cells[zone_ids]
+        pickup = (pickup_lat_cell[route_ids], pickup_lon_cell[route_ids])
+        dest = (dest_lat_cell[route_ids], dest_lon_cell[route_ids])
+        keep = ((inside(origin, *pickup) & inside(destination, *dest)) |
+                (inside(destination, *pickup) & inside(origin, *dest)))
+        return route_ids[keep], zone_ids[keep]
+
+    def price_matrix(self, categories: tuple) -> np.ndarray:
+        """Fixed price per zone (rows) and vehicle category (columns), NaN where none"""
+        matrix = self.price_matrices.get(categories)
+        if matrix is None:
+            matrix = np.array([
+                [zone.get("prices", {}).get(vtype, np.nan) for vtype in categories]
+                for zone in self.zones
+            ], dtype=float).reshape(len(self.zones), len(categories))
+            self.price_matrices[categories] = matrix
+        return matrix
+
+    def match_scalar(self, pickup_lat: float, pickup_lon: float,
+                     dest_lat: float, dest_lon: float, idx: List[int]) -> List[dict]:
+        """Test one route against a few zones with point_in_zone, in idx order"""
+        matches = []
+        for i in idx:
+            zone = self.zones[i]
+            origin, destination = zone["origin"], zone["destination"]
+            if point_in_zone(pickup_lat, pickup_lon, origin) and point_in_zone(dest_lat, dest_lon, destination):
+                matches.append({"zone": zone, "direction": "forward"})
+            if (zone.get("bidirectional", True) and
+                    point_in_zone(pickup_lat, pickup_lon, destination) and
+                    point_in_zone(dest_lat, dest_lon, origin)):
+                matches.append({"zone": zone, "direction": "reverse"})
+        return matches
+
+    def match_masks(self, pickup_lat, pickup_lon, dest_lat, dest_lon,
+                    idx: np.ndarray = None, pairwise: bool = False):
+        """Test routes against zones in both directions.
+
+        Accepts scalars or 1-D arrays of routes and returns boolean
+        ``(forward, reverse)`` masks of shape ``(zones,)`` or
+        ``(routes, zones)``. ``idx`` restricts the test to those zone
+        indices; mask columns then follow ``idx``. With ``pairwise`` the
+        i-th route is only tested against zone ``idx[i]``.
+        """
+        if idx is None:
+            idx = slice(None)
+        origin_lat, origin_lon = self.origin_lat[idx], self.origin_lon[idx]
+        dest_zone_lat, dest_zone_lon = self.dest_lat[idx], self.dest_lon[idx]
+        origin_radius, dest_radius = self.origin_radius[idx], self.dest_radius[idx]
+
+        axis = ... if pairwise else (..., None)
+        pickup_lat = np.asarray(pickup_lat, dtype=float)[axis]
+        pickup_lon = np.asarray(pickup_lon, dtype=float)[axis]
+        dest_lat = np.asarray(dest_lat, dtype=float)[axis]
+        dest_lon = np.asarray(dest_lon, dtype=float)[axis]
+
+        pickup_at_origin = haversine_distance_np(pickup_lat, pickup_lon, origin_lat, origin_lon) <= origin_radius
+        dest_at_dest = haversine_distance_np(dest_lat, dest_lon, dest_zone_lat, dest_zone_lon) <= dest_radius
+        pickup_at_dest = haversine_distance_np(pickup_lat, pickup_lon, dest_zone_lat, dest_zone_lon) <= dest_radius
+        dest_at_origin = haversine_distance_np(dest_lat, dest_lon, origin_lat, origin_lon) <= origin_radius
+
+        forward = pickup_at_origin & dest_at_dest
+        reverse = self.bidirectional[idx] & pickup_at_dest & dest_at_origin
+        return forward, reverse
+
+    async def _stored_version(self) -> int:
+        meta = await db.settings.find_one({"key": "zones_version"}, {"_id": 0})
+        return meta["value"] if meta else 0
+
+    async def reload(self):
+        """Load active zones from the database and swap the snapshot"""
+        # Read the version first so the zones are at least as recent as it
+        version = await self._stored_version()
+        zones = await db.zones.find({"active": True}, {"_id": 0}).to_list(None)
+
+        # Add default zones if none in DB
+        self.set_zones(zones or DEFAULT_FIXED_ZONES)
+        self.version = version
+        self.loaded_at = datetime.now(timezone.utc)
+        quote_cache.clear()
+
+    async def invalidate(self):
+        """Bump the shared version after a zone write and reload locally"""
+        await db.settings.update_one(
+            {"key": "zones_version"},
+            {"$inc": {"value": 1}},
+            upsert=True
+        )
+        await self.reload()
+
+    async def refresh_if_stale(self):
+        """Reload when another worker has published a newer version"""
+        if await self._stored_version() != self.version:
+            await self.reload()
+
+    def status(self) -> dict:
+        return {
+            "version": self.version,
+            "loaded_at": self.loaded_at.isoformat() if self.loaded_at else None,
+            "zones": len(self.zones),
+            "worker_pid": os.getpid()
+        }
 
+zone_index = ZoneIndex()
+
+async def snapshot_refresher():
+    """Background task keeping this worker's zone index, tariff and revoked tokens in sync"""
+    while True:
+        await asyncio.sleep(ZONE_INDEX_REFRESH_SECONDS)
+        try:
+            await zone_index.refresh_if_stale()
+            await tariffs.reload()
+            if jwt_sessions.enabled:
+                await jwt_sessions.load_revoked()
+        except Exception as exc:
+            logger.warning(f"Snapshot refresh failed: {exc}")
+
+def _collect_zone_matches(forward: np.ndarray, reverse: np.ndarray, idx: np.ndarray) -> List[dict]:
+    """Turn one route's direction masks into ordered zone matches"""
+    matches = []
+    for i in np.flatnonzero(forward | reverse):
+        zone = zone_index.zones[idx[i]]
+        if forward[i]:
+            matches.append({"zone": zone, "direction": "forward"})
+        if reverse[i]:
+            matches.append({"zone": zone, "direction": "reverse"})
+    return matches
+
+def match_fixed_zones(pickup_lat: float, pickup_lon: float,
+                      dest_lat: float, dest_lon: float) -> List[dict]:
+    """Return every zone direction covering the route, in priority order"""
+    candidates = zone_index.candidates(pickup_lat, pickup_lon, dest_lat, dest_lon)
+    if not candidates:
+        return []
+
+    idx = sorted(candidates)
+    if len(idx) < ZONE_SCALAR_MAX_CANDIDATES:
+        return zone_index.match_scalar(pickup_lat, pickup_lon, dest_lat, dest_lon, idx)
+
+    idx = np.array(idx, dtype=np.intp)
+    forward, reverse = zone_index.match_masks(pickup_lat, pickup_lon, dest_lat, dest_lon, idx)
+    return _collect_zone_matches(forward, reverse, idx)
+
+def _zone_pairs(pickup_lat, pickup_lon, dest_lat, dest_lon) -> tuple:
+    """Candidate (route, zone) pairs of a batch and their direction masks"""
+    route_ids, zone_ids = zone_index.route_candidates(pickup_lat, pickup_lon, dest_lat, dest_lon)
+    forward, reverse = zone_index.match_masks(
+        np.asarray(pickup_lat, dtype=float)[route_ids],
+        np.asarray(pickup_lon, dtype=float)[route_ids],
+        np.asarray(dest_lat, dtype=float)[route_ids],
+        np.asarray(dest_lon, dtype=float)[route_ids],
+        zone_ids,
+        pairwise=True
+    )
+    return route_ids, zone_ids, forward, reverse
+
+def match_fixed_zones_batch(pickup_lat, pickup_lon, dest_lat, dest_lon) -> List[List[dict]]:
+    """match_fixed_zones for many routes at once (one array operation)"""
+    route_ids, zone_ids, forward, reverse = _zone_pairs(pickup_lat, pickup_lon, dest_lat, dest_lon)
+
+    results = [[] for _ in range(len(pickup_lat))]
+    for i in np.flatnonzero(forward | reverse):
+        zone = zone_index.zones[zone_ids[i]]
+        matches = results[route_ids[i]]
+        if forward[i]:
+            matches.append({"zone": zone, "direction": "forward"})
+        if reverse[i]:
+            matches.append({"zone": zone, "direction": "reverse"})
+    return results
+
+def fixed_zone_prices_batch(pickup_lat, pickup_lon, dest_lat, dest_lon, categories: tuple) -> tuple:
+    """select_fixed_zone for every route and vehicle category at once.
+
+    Returns ``(prices, zones)`` arrays of shape ``(routes, categories)``:
+    the fixed price (NaN when none) and the index in zone_index.zones of
+    the zone it comes from (-1 when none).
+    """
+    prices = np.full((len(pickup_lat), len(categories)), np.nan)
+    zones = np.full((len(pickup_lat), len(categories)), -1, dtype=np.intp)
+    route_ids, zone_ids, forward, reverse = _zone_pairs(pickup_lat, pickup_lon, dest_lat, dest_lon)
+    matched = forward | reverse
+    route_ids, zone_ids = route_ids[matched], zone_ids[matched]
+    pair_prices = zone_index.price_matrix(categories)[zone_ids]
+
+    for c in range(len(categories)):
+        priced = np.flatnonzero(~np.isnan(pair_prices[:, c]))
+        # Pairs are ordered by route, then zone: the first one per route wins
+        routes, first = np.unique(route_ids[priced], return_index=True)
+        prices[routes, c] = pair_prices[priced[first], c]
+        zones[routes, c] = zone_ids[priced[first]]
+    return prices, zones
+
+def select_fixed_zone(matches: List[dict], vehicle_type: str) -> Optional[dict]:
+    """Pick the first matched zone that has a price for the vehicle type"""
+    for match in matches:
+        zone = match["zone"]
+        if vehicle_type in zone.get("prices", {}):
+            return {
+                "zone_id": zone.get("zone_id"),
+                "zone_name": zone.get("name"),
+                "fixed_price": zone["prices"][vehicle_type],
+                "direction": match["direction"]
+            }
     return None
 
 def calculate_hybrid_price(
@@ -251,12 +795,15 @@ def calculate_hybrid_price(
     user_age: int = None,
     is_ride_sharing: bool = False,
     scheduled_time: datetime = None,
-    fixed_zone_price: float = None
+    fixed_zone_price: float = None,
+    tariff: TariffSnapshot = None
 ) -> dict:
     """Calculate intelligent price with zone pricing and discounts"""
-    vehicle = VEHICLE_TYPES.get(vehicle_type)
-    if not vehicle:
+    tariff = tariff or tariffs.current
+    coefficients = tariff.coefficients.get(vehicle_type)
+    if not coefficients:
         raise ValueError("Invalid vehicle type")
+    base_fare, rate_per_km, rate_per_minute = coefficients
 
     # Use fixed zone price if available
     if fixed_zone_price:
@@ -264,14 +811,14 @@ def calculate_hybrid_price(
         pricing_method = "fixed_zone"
     else:
         # Hybrid calculation: Base + Distance + Time
-        base_price = vehicle["base_fare"]
-        distance_price = distance_km * vehicle["rate_per_km"]
+        base_price = base_fare
+        distance_price = distance_km * rate_per_km
 
         # Estimate duration if not provided (assume 40 km/h average)
         if duration_minutes is None:
             duration_minutes = (distance_km / 40) * 60
 
-        time_price = duration_minutes * vehicle["rate_per_minute"]
+        time_price = duration_minutes * rate_per_minute
         base_price = base_price + distance_price + time_price
         pricing_method = "hybrid"
 
@@ -280,16 +827,16 @@ def calculate_hybrid_price(
     total_discount = 0
 
     if user_age and user_age < 26:
-        total_discount += DISCOUNT_RATES["youth"]
-        discounts.append({"type": "youth", "percent": 15, "label": "Réduction jeunes (-26 ans)"})
+        total_discount += tariff.discount_rates["youth"]
+        discounts.append(tariff.discount_entry("youth"))
 
     if is_ride_sharing:
-        total_discount += DISCOUNT_RATES["ride_sharing"]
-        discounts.append({"type": "ride_sharing", "percent": 25, "label": "Partage de course"})
+        total_discount += tariff.discount_rates["ride_sharing"]
+        discounts.append(tariff.discount_entry("ride_sharing"))
 
-    if scheduled_time and not is_peak_hour(scheduled_time):
-        total_discount += DISCOUNT_RATES["off_peak"]
-        discounts.append({"type": "off_peak", "percent": 10, "label": "Heure creuse"})
+    if scheduled_time and not tariff.peak_by_hour[scheduled_time.hour]:
+        total_discount += tariff.discount_rates["off_peak"]
+        discounts.append(tariff.discount_entry("off_peak"))
 
     # Maximum 50% discount
     total_discount = min(total_discount, 0.50)
@@ -297,7 +844,7 @@ def calculate_hybrid_price(
 
     return {
         "vehicle_type": vehicle_type,
-        "vehicle_name": vehicle["name"],
+        "vehicle_name": tariff.vehicle_types[vehicle_type]["name"],
         "distance_km": round(distance_km, 1),
         "duration_minutes": round(duration_minutes, 0) if duration_minutes else None,
         "base_price": round(base_price, 2),
@@ -308,18 +855,669 @@ def calculate_hybrid_price(
         "currency": "CHF"
     }
 
+def price_arrays(
+    base_fare: np.ndarray,
+    rate_per_km: np.ndarray,
+    rate_per_minute: np.ndarray,
+    distance_km: np.ndarray,
+    duration_minutes: np.ndarray,
+    fixed_zone_price: np.ndarray,
+    youth: np.ndarray,
+    hour: np.ndarray,
+    discount_rates: dict = None,
+    peak_hours: dict = None,
+    ride_sharing: np.ndarray = None
+) -> dict:
+    """Columnar core of calculate_hybrid_price.
+
+    All inputs are equal-length NumPy arrays. ``duration_minutes`` and
+    ``fixed_zone_price`` use NaN for "not set" and ``hour`` is the local
+    hour of the scheduled time, or -1 when there is none. Rates default to
+    the current tariff and ``ride_sharing`` to no shared rides.
+    """
+    discount_rates = discount_rates or tariffs.current.discount_rates
+    peak_hours = peak_hours or tariffs.current.peak_hours
+    distance = np.asarray(distance_km, dtype=float)
+    if ride_sharing is None:
+        ride_sharing = np.zeros(len(distance), dtype=bool)
+
+    # Use fixed zone price if available
+    fixed = np.asarray(fixed_zone_price, dtype=float)
+    is_fixed = ~np.isnan(fixed) & (fixed != 0)
+
+    # Estimate duration if not provided (assume 40 km/h average)
+    duration = np.asarray(duration_minutes, dtype=float)
+    duration = np.where(np.isnan(duration) & ~is_fixed, (distance / 40) * 60, duration)
+
+    # Hybrid calculation: Base + Distance + Time
+    hybrid = base_fare + distance * rate_per_km + duration * rate_per_minute
+    base_price = np.where(is_fixed, fixed, hybrid)
+
+    # Apply discounts
+    peak = np.zeros(len(distance), dtype=bool)
+    for start, end in peak_hours.values():
+        peak |= (start <= hour) & (hour < end)
+    off_peak = (hour >= 0) & ~peak
+
+    total_discount = np.zeros(len(distance))
+    total_discount = np.where(youth, total_discount + discount_rates["youth"], total_discount)
+    total_discount = np.where(ride_sharing, total_discount + discount_rates["ride_sharing"], total_discount)
+    total_discount = np.where(off_peak, total_discount + discount_rates["off_peak"], total_discount)
+
+    # Maximum 50% discount
+    total_discount = np.minimum(total_discount, 0.50)
+    final_price = base_price * (1 - total_discount)
+
+    return {
+        "distance_km": distance,
+        "duration_minutes": duration,
+        "base_price": base_price,
+        "final_price": final_price,
+        "total_discount": total_discount,
+        "is_fixed": is_fixed,
+        "youth": youth,
+        "ride_sharing": ride_sharing,
+        "off_peak": off_peak
+    }
+
+def calculate_hybrid_prices(
+    vehicle_types: List[str],
+    distance_km: List[float],
+    duration_minutes: List[Optional[float]],
+    user_ages: List[Optional[int]],
+    scheduled_times: List[Optional[datetime]],
+    fixed_zone_prices: List[Optional[float]],
+    ride_sharing: List[bool] = None
+) -> dict:
+    """Vectorized calculate_hybrid_price over many rides.
+
+    Takes one list entry per ride and returns NumPy columns; use
+    hybrid_price_row() to get the dict calculate_hybrid_price returns.
+    """
+    tariff = tariffs.current
+    codes = np.array([tariff.category_index[v] for v in vehicle_types], dtype=np.intp)
+    prices = price_arrays(
+        base_fare=tariff.base_fare[codes],
+        rate_per_km=tariff.rate_per_km[codes],
+        rate_per_minute=tariff.rate_per_minute[codes],
+        distance_km=np.asarray(distance_km, dtype=float),
+        duration_minutes=np.array([np.nan if d is None else d for d in duration_minutes], dtype=float),
+        fixed_zone_price=np.array([np.nan if p is None else p for p in fixed_zone_prices], dtype=float),
+        youth=np.array([bool(age and age < 26) for age in user_ages], dtype=bool),
+        hour=np.array([t.hour if t else -1 for t in scheduled_times]),
+        discount_rates=tariff.discount_rates,
+        peak_hours=tariff.peak_hours,
+        ride_sharing=np.array(ride_sharing, dtype=bool) if ride_sharing is not None else None
+    )
+    prices["vehicle_type"] = vehicle_types
+    prices["tariff"] = tariff
+    return prices
+
+def hybrid_price_row(prices: dict, i: int) -> dict:
+    """Build the calculate_hybrid_price dict for row i of calculate_hybrid_prices"""
+    tariff = prices["tariff"]
+    vehicle_type = prices["vehicle_type"][i]
+    duration_minutes = prices["duration_minutes"][i]
+
+    discounts = []
+    if prices["youth"][i]:
+        discounts.append(tariff.discount_entry("youth"))
+    if prices["ride_sharing"][i]:
+        discounts.append(tariff.discount_entry("ride_sharing"))
+    if prices["off_peak"][i]:
+        discounts.append(tariff.discount_entry("off_peak"))
+
+    return {
+        "vehicle_type": vehicle_type,
+        "vehicle_name": tariff.vehicle_types[vehicle_type]["name"],
+        "distance_km": round(float(prices["distance_km"][i]), 1),
+        "duration_minutes": None if math.isnan(duration_minutes) or not duration_minutes else round(float(duration_minutes), 0),
+        "base_price": round(float(prices["base_price"][i]), 2),
+        "final_price": round(float(prices["final_price"][i]), 2),
+        "total_discount_percent": round(float(prices["total_discount"][i]) * 100, 0),
+        "discounts_applied": discounts,
+        "pricing_method": "fixed_zone" if prices["is_fixed"][i] else "hybrid",
+        "currency": "CHF"
+    }
+
+def quote_ride(
+    vehicle_type: str,
+    pickup_lat: float,
+    pickup_lon: float,
+    dest_lat: float,
+    dest_lon: float,
+    distance_km: float,
+    duration_minutes: float = None,
+    num_passengers: int = 1,
+    user_age: int = None,
+    scheduled_time: datetime = None
+) -> dict:
+    """Price the requested vehicle and every vehicle category in one pass.
+
+    Zones are resolved once for the origin/destination pair; each category
+    then only costs a price calculation.
+    """
+    tariff = tariffs.current
+    if vehicle_type not in tariff.coefficients:
+        raise ValueError("Invalid vehicle type")
+
+    matches = match_fixed_zones(pickup_lat, pickup_lon, dest_lat, dest_lon)
+
+    fixed_zone = select_fixed_zone(matches, vehicle_type)
+    price_info = calculate_hybrid_price(
+        vehicle_type=vehicle_type,
+        distance_km=distance_km,
+        duration_minutes=duration_minutes,
+        num_passengers=num_passengers,
+        user_age=user_age,
+        scheduled_time=scheduled_time,
+        fixed_zone_price=fixed_zone["fixed_price"] if fixed_zone else None,
+        tariff=tariff
+    )
+
+    # Add zone info if applicable
+    if fixed_zone:
+        price_info["zone_id"] = fixed_zone["zone_id"]
+        price_info["zone_name"] = fixed_zone["zone_name"]
+
+    # Calculate all vehicle prices for comparison
+    all_prices = {}
+    for vtype in tariff.categories:
+        fz = select_fixed_zone(matches, vtype)
+        vp = calculate_hybrid_price(
+            vehicle_type=vtype,
+            distance_km=distance_km,
+            duration_minutes=duration_minutes,
+            fixed_zone_price=fz["fixed_price"] if fz else None,
+            tariff=tariff
+        )
+        all_prices[vtype] = vp["final_price"]
+
+    price_info["all_prices"] = all_prices
+
+    return price_info
+
+# Below this many quotes the NumPy pass costs more than quoting one by one
+QUOTE_BATCH_SCALAR_MAX = int(os.environ.get("QUOTE_BATCH_SCALAR_MAX", "32"))
+
+def quote_rides_batch(
+    vehicle_types: List[str],
+    pickup_lat: List[float],
+    pickup_lon: List[float],
+    dest_lat: List[float],
+    dest_lon: List[float],
+    distance_km: List[Optional[float]],
+    duration_minutes: List[Optional[float]],
+    scheduled_times: List[Optional[datetime]],
+    user_age: int = None
+) -> List[dict]:
+    """quote_ride for many routes with one zone pass and one pricing pass.
+
+    Results keep the input order; rows with an unknown vehicle type get an
+    ``error`` entry instead of a quote. Batches of fewer than
+    QUOTE_BATCH_SCALAR_MAX quotes are priced with quote_ride one by one.
+    """
+    tariff = tariffs.current
+    categories = tariff.categories
+    results = [{"error": "Invalid vehicle type"} for _ in vehicle_types]
+    valid = [i for i, v in enumerate(vehicle_types) if v in tariff.category_index]
+    if not valid:
+        return results
+
+    if len(valid) < QUOTE_BATCH_SCALAR_MAX:
+        for i in valid:
+            distance, duration = distance_km[i], duration_minutes[i]
+            if distance is None:
+                distance, estimated_duration = estimate_route(pickup_lat[i], pickup_lon[i], dest_lat[i], dest_lon[i])
+                if duration is None:
+                    duration = estimated_duration
+            results[i] = quote_ride(
+                vehicle_type=vehicle_types[i],
+                pickup_lat=pickup_lat[i],
+                pickup_lon=pickup_lon[i],
+                dest_lat=dest_lat[i],
+                dest_lon=dest_lon[i],
+                distance_km=distance,
+                duration_minutes=duration,
+                user_age=user_age,
+                scheduled_time=scheduled_times[i]
+            )
+        return results
+
+    # Road distance (and duration) estimate where none was provided
+    estimated_distance, estimated_duration = estimate_routes(pickup_lat, pickup_lon, dest_lat, dest_lon)
+    distance = np.array([np.nan if d is None else d for d in distance_km], dtype=float)
+    duration = np.array([np.nan if d is None else d for d in duration_minutes], dtype=float)
+    estimated = np.isnan(distance)
+    duration = np.where(estimated & np.isnan(duration), estimated_duration, duration)
+    distance = np.where(estimated, estimated_distance, distance)
+
+    fixed_prices, fixed_zones = fixed_zone_prices_batch(pickup_lat, pickup_lon, dest_lat, dest_lon, categories)
+
+    # Requested vehicles with discounts first, then every category for comparison
+    routes = np.array(valid, dtype=np.intp)
+    requested = np.array([tariff.category_index[vehicle_types[i]] for i in valid], dtype=np.intp)
+    row_routes = np.concatenate([routes, np.repeat(routes, len(categories))])
+    row_codes = np.concatenate([requested, np.tile(np.arange(len(categories)), len(valid))])
+    comparison = np.zeros(len(valid) * len(categories), dtype=bool)
+    prices = price_arrays(
+        base_fare=tariff.base_fare[row_codes],
+        rate_per_km=tariff.rate_per_km[row_codes],
+        rate_per_minute=tariff.rate_per_minute[row_codes],
+        distance_km=distance[row_routes],
+        duration_minutes=duration[row_routes],
+        fixed_zone_price=fixed_prices[row_routes, row_codes],
+        youth=np.concatenate([np.full(len(valid), bool(user_age and user_age < 26)), comparison]),
+        hour=np.concatenate([
+            np.array([scheduled_times[i].hour if scheduled_times[i] else -1 for i in valid]),
+            np.full(len(comparison), -1)
+        ]),
+        discount_rates=tariff.discount_rates,
+        peak_hours=tariff.peak_hours
+    )
+    prices["vehicle_type"] = [vehicle_types[i] for i in valid]
+    prices["tariff"] = tariff
+
+    # Python lists index far faster than NumPy scalars in the per-row loop
+    rows = {k: v[:len(valid)].tolist() if isinstance(v, np.ndarray) else v for k, v in prices.items()}
+    all_prices = prices["final_price"][len(valid):].reshape(len(valid), len(categories)).tolist()
+    for n, i in enumerate(valid):
+        price_info = hybrid_price_row(rows, n)
+
+        # Add zone info if applicable
+        zone = fixed_zones[i, requested[n]]
+        if zone >= 0:
+            price_info["zone_id"] = zone_index.zones[zone].get("zone_id")
+            price_info["zone_name"] = zone_index.zones[zone].get("name")
+
+        price_info["all_prices"] = {vtype: round(p, 2) for vtype, p in zip(categories, all_prices[n])}
+        results[i] = price_info
+
+    return results
+
 def get_suitable_vehicles(num_passengers: int):
     """Get vehicles suitable for the number of passengers"""
     suitable = []
-    for vehicle_id, vehicle in VEHICLE_TYPES.items():
+    for vehicle in tariffs.current.vehicle_list():
         if vehicle["min_passengers"] <= num_passengers <= vehicle["max_passengers"]:
             suitable.append(vehicle)
     return suitable
 
+# =============================================================================
+# QUOTE CACHE - Repeated quotes for the same route
+# =============================================================================
+
+QUOTE_CACHE_SIZE = int(os.environ.get("QUOTE_CACHE_SIZE", "10000"))
+QUOTE_CACHE_TTL_SECONDS = int(os.environ.get("QUOTE_CACHE_TTL_SECONDS", "300"))
+QUOTE_CACHE_SNAP_DEG = 0.0005  # ~50 m
+
+class QuoteCache:
+    """Bounded LRU cache with a TTL for quote_ride results"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: tuple) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return dict(entry[1])
+
+    def put(self, key: tuple, value: dict):
+        self._entries[key] = (time.monotonic() + self.ttl, dict(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None
+        }
+
+quote_cache = QuoteCache(QUOTE_CACHE_SIZE, QUOTE_CACHE_TTL_SECONDS)
+
+def quote_cache_key(
+    vehicle_type: str,
+    pickup_lat: float,
+    pickup_lon: float,
+    dest_lat: float,
+    dest_lon: float,
+    distance_km: Optional[float],
+    duration_minutes: Optional[float],
+    user_age: Optional[int],
+    scheduled_time: Optional[datetime]
+) -> tuple:
+    """Cache key: snapped coordinates plus everything else the price depends on"""
+    if scheduled_time is None:
+        time_bucket = None
+    else:
+        time_bucket = "peak" if is_peak_hour(scheduled_time) else "off_peak"
+
+    return (
+        round(pickup_lat / QUOTE_CACHE_SNAP_DEG),
+        round(pickup_lon / QUOTE_CACHE_SNAP_DEG),
+        round(dest_lat / QUOTE_CACHE_SNAP_DEG),
+        round(dest_lon / QUOTE_CACHE_SNAP_DEG),
+        vehicle_type,
+        distance_km,
+        duration_minutes,
+        time_bucket,
+        bool(user_age and user_age < 26),
+        zone_index.version,
+        tariffs.current.version
+    )
+
+# =============================================================================
+# QUOTE TOKENS - Signed prices carried from quote to booking
+# =============================================================================
+
+QUOTE_TOKEN_SECRET = os.environ.get("QUOTE_TOKEN_SECRET")
+QUOTE_TOKEN_TTL_SECONDS = int(os.environ.get("QUOTE_TOKEN_TTL_SECONDS", "900"))
+# Migration switch for clients released before quote tokens: when true, a
+# booking without a token is still priced from the client's price. Remove
+# once every client books with a quote_token.
+QUOTE_TOKEN_OPTIONAL = os.environ.get("QUOTE_TOKEN_OPTIONAL", "false").lower() == "true"
+QUOTE_TOKEN_COORD_DECIMALS = 5  # ~1 m
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+async def load_shared_secret(name: str) -> str:
+    """Random secret generated once and shared by all workers through db.settings"""
+    await db.settings.update_one(
+        {"key": name},
+        {"$setOnInsert": {"value": secrets.token_hex(32)}},
+        upsert=True
+    )
+    doc = await db.settings.find_one({"key": name})
+    return doc["value"]
+
+def quote_point(lat: float, lon: float) -> List[float]:
+    return [round(lat, QUOTE_TOKEN_COORD_DECIMALS), round(lon, QUOTE_TOKEN_COORD_DECIMALS)]
+
+class QuoteSigner:
+    """HMAC-SHA256 tokens binding a quoted price to its route, vehicle and expiry.
+
+    Tokens are verified from the key alone, so booking needs neither a
+    database lookup nor a second pricing run. Without QUOTE_TOKEN_SECRET
+    a key is generated once and shared by all workers through db.settings.
+    """
+
+    def __init__(self, secret: Optional[str] = None):
+        self.key = secret.encode() if secret else None
+
+    async def load_key(self):
+        if not self.key:
+            self.key = (await load_shared_secret("quote_token_secret")).encode()
+
+    def _signature(self, payload: str) -> str:
+        return _b64encode(hmac.new(self.key, payload.encode(), hashlib.sha256).digest())
+
+    def sign(self, claims: dict) -> tuple:
+        """Return (token, expires_at) for the given quote claims"""
+        expires_at = int(time.time()) + QUOTE_TOKEN_TTL_SECONDS
+        payload = _b64encode(json.dumps({**claims, "exp": expires_at}, separators=(",", ":")).encode())
+        return f"{payload}.{self._signature(payload)}", expires_at
+
+    def verify(self, token: str) -> dict:
+        """Return the claims of a valid token, raise ValueError otherwise"""
+        payload, _, signature = token.partition(".")
+        if not hmac.compare_digest(signature.encode(), self._signature(payload).encode()):
+            raise ValueError("bad signature")
+        try:
+            claims = json.loads(_b64decode(payload))
+        except ValueError:
+            raise ValueError("malformed token")
+        if claims["exp"] < time.time():
+            raise ValueError("quote expired, please request a new price")
+        return claims
+
+quote_signer = QuoteSigner(QUOTE_TOKEN_SECRET)
+
+def sign_quote(price_info: dict, calculation, user_id: Optional[str]) -> dict:
+    """Quote response with a token for booking at this price.
+
+    The token covers final_price for the quoted vehicle_type only;
+    all_prices is for comparison, and booking another category needs a
+    quote for that category.
+    """
+    token, expires_at = quote_signer.sign({
+        "vt": price_info["vehicle_type"],
+        "price": price_info["final_price"],
+        "dist": price_info["distance_km"],
+        "dur": price_info["duration_minutes"],
+        "pu": quote_point(calculation.pickup.latitude, calculation.pickup.longitude),
+        "de": quote_point(calculation.destination.latitude, calculation.destination.longitude),
+        "st": calculation.scheduled_time,
+        "tv": tariffs.current.version,
+        "uid": user_id
+    })
+    return {
+        **price_info,
+        "quote_token": token,
+        "quote_expires_at": datetime.fromtimestamp(expires_at, timezone.utc).isoformat()
+    }
+
+def booking_price(ride_data, user_id: Optional[str]) -> dict:
+    """Price fields for a new ride, taken from its quote token"""
+    if not ride_data.quote_token:
+        if not QUOTE_TOKEN_OPTIONAL or ride_data.price is None:
+            raise HTTPException(status_code=400, detail="A quote token is required, please request a price first")
+        return {
+            "price": ride_data.price,
+            "distance_km": ride_data.distance_km,
+            "duration_minutes": ride_data.duration_minutes,
+            "price_source": "client"
+        }
+
+    try:
+        quote = quote_signer.verify(ride_data.quote_token)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid quote: {exc}")
+
+    if quote["uid"] and quote["uid"] != user_id:
+        raise HTTPException(status_code=400, detail="Invalid quote: issued to another account")
+    if (quote["vt"] != ride_data.vehicle_type or
+            quote["st"] != ride_data.scheduled_time or
+            quote["pu"] != quote_point(ride_data.pickup.latitude, ride_data.pickup.longitude) or
+            quote["de"] != quote_point(ride_data.destination.latitude, ride_data.destination.longitude)):
+        raise HTTPException(status_code=400, detail="Invalid quote: does not match this ride")
+    if ride_data.price is not None and round(ride_data.price, 2) != quote["price"]:
+        raise HTTPException(status_code=400, detail="Invalid quote: price does not match the quoted price")
+
+    return {
+        "price": quote["price"],
+        "distance_km": quote["dist"],
+        "duration_minutes": quote["dur"],
+        "price_source": "quote",
+        "tariff_version": quote["tv"]
+    }
+
+# =============================================================================
+# HTTP CLIENT POOL - Keep-alive connections to external APIs
+# =============================================================================
+
+HTTP_CONNECT_TIMEOUT_SECONDS = float(os.environ.get("HTTP_CONNECT_TIMEOUT_SECONDS", "5"))
+HTTP_TIMEOUT_SECONDS = float(os.environ.get("HTTP_TIMEOUT_SECONDS", "15"))
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.environ.get("HTTP_MAX_CONNECTIONS_PER_HOST", "20"))
+HTTP_MAX_KEEPALIVE_PER_HOST = int(os.environ.get("HTTP_MAX_KEEPALIVE_PER_HOST", "10"))
+HTTP_KEEPALIVE_EXPIRY_SECONDS = float(os.environ.get("HTTP_KEEPALIVE_EXPIRY_SECONDS", "60"))
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+class HTTPPool:
+    """One long-lived httpx.AsyncClient per external host.
+
+    Keeping a client per host gives each API its own connection limit, so
+    a slow SMS provider cannot starve the login exchange. HTTP/2 is used
+    when the optional h2 package is installed.
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    def client(self, url: str) -> httpx.AsyncClient:
+        parsed = httpx.URL(url)
+        origin = f"{parsed.scheme}://{parsed.netloc.decode()}"
+        http_client = self._clients.get(origin)
+        if http_client is None or http_client.is_closed:
+            http_client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                timeout=httpx.Timeout(HTTP_TIMEOUT_SECONDS, connect=HTTP_CONNECT_TIMEOUT_SECONDS),
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS_PER_HOST,
+                    max_keepalive_connections=HTTP_MAX_KEEPALIVE_PER_HOST,
+                    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_SECONDS
+                )
+            )
+            self._clients[origin] = http_client
+        return http_client
+
+    async def aclose(self):
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for http_client in clients:
+            await http_client.aclose()
+
+http_pool = HTTPPool()
+
 # =============================================================================
 # NOTIFICATION HELPERS
 # =============================================================================
 
+NOTIFICATION_AUDIT_BATCH_SIZE = int(os.environ.get("NOTIFICATION_AUDIT_BATCH_SIZE", "100"))
+NOTIFICATION_AUDIT_FLUSH_SECONDS = float(os.environ.get("NOTIFICATION_AUDIT_FLUSH_SECONDS", "1"))
+NOTIFICATION_AUDIT_MAX_BUFFER = int(os.environ.get("NOTIFICATION_AUDIT_MAX_BUFFER", "5000"))
+NOTIFICATION_RETENTION_DAYS = int(os.environ.get("NOTIFICATION_RETENTION_DAYS", "90"))
+
+class BufferedWriter:
+    """Collects documents and writes them with insert_many(ordered=False).
+
+    A flush happens when batch_size documents are waiting or every
+    flush_seconds. add() waits while max_buffer documents are pending,
+    which slows producers down instead of growing memory when MongoDB
+    falls behind. Before start() (scripts, benchmarks) documents are
+    written one by one.
+    """
+
+    def __init__(self, collection: str, batch_size: int, flush_seconds: float, max_buffer: int):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.max_buffer = max_buffer
+        self._buffer: List[dict] = []
+        self._task: Optional[asyncio.Task] = None
+        self._flush_now: Optional[asyncio.Event] = None
+        self._space: Optional[asyncio.Event] = None
+        self._stopping = False
+        self.written = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+
+    def start(self):
+        self._stopping = False
+        self._flush_now = asyncio.Event()
+        self._space = asyncio.Event()
+        self._space.set()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flusher and write everything still buffered"""
+        if self._task is not None:
+            # Let a write in progress finish rather than cancelling it
+            self._stopping = True
+            self._flush_now.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+        if self._buffer:
+            logger.warning(f"{len(self._buffer)} {self.collection} documents could not be written on shutdown")
+
+    async def add(self, doc: dict):
+        if self._task is None:
+            await db[self.collection].insert_one(doc)
+            return
+
+        while len(self._buffer) >= self.max_buffer:
+            self._space.clear()
+            self._flush_now.set()
+            await self._space.wait()
+
+        self._buffer.append(doc)
+        if len(self._buffer) >= self.batch_size:
+            self._flush_now.set()
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._flush_now.wait(), self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_now.clear()
+            await self.flush()
+
+    async def flush(self):
+        while self._buffer:
+            # The batch stays buffered until the write returns, so an error
+            # or a cancellation mid-write never loses it
+            batch = self._buffer[:self.batch_size]
+            try:
+                await db[self.collection].insert_many(batch, ordered=False)
+                del self._buffer[:len(batch)]
+                self.written += len(batch)
+            except BulkWriteError as exc:
+                # Unordered: everything but the rejected documents was written
+                del self._buffer[:len(batch)]
+                self.written += exc.details.get("nInserted", 0)
+                logger.warning(f"{len(exc.details.get('writeErrors', []))} {self.collection} documents rejected")
+            except Exception as exc:
+                self.failed_flushes += 1
+                logger.warning(f"Flushing {self.collection} failed, will retry: {exc}")
+                break
+            finally:
+                self.flushes += 1
+                if self._space is not None and len(self._buffer) < self.max_buffer:
+                    self._space.set()
+
+    def stats(self) -> dict:
+        return {
+            "buffered": len(self._buffer),
+            "written": self.written,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes
+        }
+
+notification_audit = BufferedWriter(
+    "notifications",
+    NOTIFICATION_AUDIT_BATCH_SIZE,
+    NOTIFICATION_AUDIT_FLUSH_SECONDS,
+    NOTIFICATION_AUDIT_MAX_BUFFER
+)
+
 async def store_notification(
     channel: str,
     recipient: str,
@@ -338,69 +1536,631 @@ async def store_notification(
         "created_at": datetime.now(timezone.utc),
         "sent_at": datetime.now(timezone.utc) if status == "sent" else None
     }
-    await db.notifications.insert_one(notification_doc)
+    await notification_audit.add(notification_doc)
+
+SMTP_POOL_SIZE = int(os.environ.get("SMTP_POOL_SIZE", "2"))
+SMTP_TIMEOUT_SECONDS = float(os.environ.get("SMTP_TIMEOUT_SECONDS", "30"))
+SMTP_HEALTHCHECK_IDLE_SECONDS = float(os.environ.get("SMTP_HEALTHCHECK_IDLE_SECONDS", "30"))
+SMTP_MAX_IDLE_SECONDS = float(os.environ.get("SMTP_MAX_IDLE_SECONDS", "240"))
+
+class SMTPPool:
+    """Long-lived, authenticated SMTP sessions used from a dedicated thread pool.
+
+    smtplib is blocking, so every send runs on one of SMTP_POOL_SIZE
+    threads and never competes with asyncio.to_thread work. A session
+    idle for SMTP_HEALTHCHECK_IDLE_SECONDS is checked with NOOP before
+    use; one idle past SMTP_MAX_IDLE_SECONDS (servers drop those) is
+    replaced. A send that fails on a broken session reconnects and
+    retries once.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self.connects = 0
+        self.reconnects = 0
+
+    def _connect(self) -> smtplib.SMTP:
+        connection = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT_SECONDS)
+        if SMTP_USE_TLS:
+            connection.starttls()
+        connection.login(SMTP_USERNAME, SMTP_PASSWORD)
+        self.connects += 1
+        return connection
+
+    @staticmethod
+    def _close(connection: smtplib.SMTP):
+        try:
+            connection.quit()
+        except Exception:
+            connection.close()
+
+    def _acquire(self) -> smtplib.SMTP:
+        while True:
+            try:
+                connection, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+
+            idle = time.monotonic() - last_used
+            if idle > SMTP_MAX_IDLE_SECONDS:
+                self._close(connection)
+                continue
+            if idle > SMTP_HEALTHCHECK_IDLE_SECONDS:
+                try:
+                    if connection.noop()[0] != 250:
+                        raise smtplib.SMTPException("NOOP failed")
+                except (smtplib.SMTPException, OSError):
+                    connection.close()
+                    continue
+            return connection
+
+    def _send_batch(self, messages: List[EmailMessage]) -> List[Optional[str]]:
+        """Send messages over one session; returns an error (or None) per message"""
+        errors = []
+        connection = self._acquire()
+        try:
+            for message in messages:
+                try:
+                    connection.send_message(message)
+                    errors.append(None)
+                except (smtplib.SMTPServerDisconnected, OSError):
+                    # Stale session: reconnect once and retry this message
+                    connection.close()
+                    self.reconnects += 1
+                    connection = self._connect()
+                    connection.send_message(message)
+                    errors.append(None)
+                except smtplib.SMTPException as exc:
+                    connection.rset()
+                    errors.append(str(exc))
+        except Exception as exc:
+            connection.close()
+            if not errors:
+                raise
+            # The earlier messages went out: fail only the rest, so they are not resent
+            return errors + [str(exc)] * (len(messages) - len(errors))
+        self._idle.put((connection, time.monotonic()))
+        return errors
+
+    async def send_many(self, messages: List[EmailMessage]) -> List[Optional[str]]:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="smtp")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._send_batch, messages)
+
+    async def send(self, message: EmailMessage):
+        error = (await self.send_many([message]))[0]
+        if error:
+            raise smtplib.SMTPException(error)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        while True:
+            try:
+                connection, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(connection)
+
+smtp_pool = SMTPPool(SMTP_POOL_SIZE)
+
+def build_email(to_email: str, subject: str, body: str) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = SMTP_FROM
+    message["To"] = to_email
+    message["Subject"] = subject
+    message.set_content(body)
+    return message
+
+def smtp_configured() -> bool:
+    return bool(SMTP_HOST and SMTP_USERNAME and SMTP_PASSWORD and SMTP_FROM)
 
 async def send_email_notification(to_email: str, subject: str, body: str) -> dict:
     """Send an email notification via SMTP."""
-    if not (SMTP_HOST and SMTP_USERNAME and SMTP_PASSWORD and SMTP_FROM):
+    if not smtp_configured():
         return {"status": "skipped", "reason": "smtp_not_configured"}
 
-    def _send_email():
-        message = EmailMessage()
-        message["From"] = SMTP_FROM
-        message["To"] = to_email
-        message["Subject"] = subject
-        message.set_content(body)
-
-        with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:
-            if SMTP_USE_TLS:
-                server.starttls()
-            server.login(SMTP_USERNAME, SMTP_PASSWORD)
-            server.send_message(message)
-
     try:
-        await asyncio.to_thread(_send_email)
+        await smtp_pool.send(build_email(to_email, subject, body))
         return {"status": "sent"}
     except Exception as exc:
         return {"status": "failed", "error": str(exc)}
 
-async def send_sms_notification(to_phone: str, message: str) -> dict:
-    """Send an SMS notification via Twilio."""
-    if SMS_PROVIDER != "twilio":
-        return {"status": "skipped", "reason": "sms_provider_not_supported"}
-
-    if not (TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN and TWILIO_FROM_NUMBER):
-        return {"status": "skipped", "reason": "twilio_not_configured"}
-
-    url = f"https://api.twilio.com/2010-04-01/Accounts/{TWILIO_ACCOUNT_SID}/Messages.json"
-    payload = {
-        "To": to_phone,
-        "From": TWILIO_FROM_NUMBER,
-        "Body": message
-    }
+async def send_email_notifications(emails: List[dict]) -> List[dict]:
+    """Send several {to_email, subject, body} emails over one pooled session"""
+    if not smtp_configured():
+        return [{"status": "skipped", "reason": "smtp_not_configured"} for _ in emails]
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, data=payload, auth=(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN))
-            response.raise_for_status()
-        return {"status": "sent"}
+        errors = await smtp_pool.send_many([
+            build_email(email["to_email"], email["subject"], email["body"]) for email in emails
+        ])
     except Exception as exc:
-        return {"status": "failed", "error": str(exc)}
+        return [{"status": "failed", "error": str(exc)} for _ in emails]
+    return [{"status": "failed", "error": error} if error else {"status": "sent"} for error in errors]
 
-async def dispatch_notification(
-    channel: str,
-    recipient: str,
-    payload: dict,
-    send_func
-):
-    """Send and store notifications consistently."""
-    result = await send_func(recipient, **payload)
-    status = result.get("status", "failed")
-    error = result.get("error") or result.get("reason")
-    await store_notification(channel, recipient, payload, status, error)
+SMS_PROVIDER = os.environ.get("SMS_PROVIDER", "twilio")
+SMS_RATE_PER_SECOND = float(os.environ.get("SMS_RATE_PER_SECOND", "1"))
+SMS_BURST = int(os.environ.get("SMS_BURST", "1"))
+SMS_MAX_IN_FLIGHT = int(os.environ.get("SMS_MAX_IN_FLIGHT", "4"))
+SMS_RATE_LIMIT_RETRIES = int(os.environ.get("SMS_RATE_LIMIT_RETRIES", "3"))
+SMS_MAX_RETRY_AFTER_SECONDS = float(os.environ.get("SMS_MAX_RETRY_AFTER_SECONDS", "30"))
+
+def parse_retry_after(value: Optional[str], default: float = 1.0) -> float:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return default
+
+class SMSProvider:
+    """Interface for SMS backends used by SMSDispatcher.
+
+    send() returns {"status": "sent"}, {"status": "failed", "error": ...}
+    or {"status": "rate_limited", "retry_after": seconds}.
+    """
+
+    name = "base"
+
+    def configured(self) -> bool:
+        return True
+
+    async def send(self, to_phone: str, message: str) -> dict:
+        raise NotImplementedError
+
+class TwilioSMSProvider(SMSProvider):
+    name = "twilio"
+
+    def configured(self) -> bool:
+        return bool(TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN and TWILIO_FROM_NUMBER)
+
+    async def send(self, to_phone: str, message: str) -> dict:
+        url = f"{TWILIO_API_URL}/2010-04-01/Accounts/{TWILIO_ACCOUNT_SID}/Messages.json"
+        payload = {
+            "To": to_phone,
+            "From": TWILIO_FROM_NUMBER,
+            "Body": message
+        }
+
+        try:
+            response = await http_pool.client(url).post(url, data=payload, auth=(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN))
+            if response.status_code == 429:
+                return {"status": "rate_limited", "retry_after": parse_retry_after(response.headers.get("Retry-After"))}
+            response.raise_for_status()
+            return {"status": "sent"}
+        except Exception as exc:
+            return {"status": "failed", "error": str(exc)}
+
+SMS_PROVIDERS = {
+    "twilio": TwilioSMSProvider
+}
+
+class TokenBucket:
+    """Async token bucket; pause() blocks every caller, e.g. for Retry-After"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def acquire(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+
+class SMSDispatcher:
+    """Sends SMS within the provider's rate limit.
+
+    A token bucket paces requests to SMS_RATE_PER_SECOND (the account's
+    messages-per-second limit), a semaphore bounds requests in flight,
+    and a 429 pauses the bucket for Retry-After before retrying. Rate
+    limits that outlast SMS_RATE_LIMIT_RETRIES are reported as failures
+    and retried later by the outbox.
+    """
+
+    def __init__(self, provider: Optional[SMSProvider], rate: float, burst: int, max_in_flight: int):
+        self.provider = provider
+        self.bucket = TokenBucket(rate, burst)
+        self.max_in_flight = max_in_flight
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.sent = 0
+        self.rate_limited = 0
+
+    async def send(self, to_phone: str, message: str) -> dict:
+        if self.provider is None:
+            return {"status": "skipped", "reason": "sms_provider_not_supported"}
+        if not self.provider.configured():
+            return {"status": "skipped", "reason": f"{self.provider.name}_not_configured"}
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+
+        for _ in range(SMS_RATE_LIMIT_RETRIES + 1):
+            await self.bucket.acquire()
+            async with self._semaphore:
+                result = await self.provider.send(to_phone, message)
+
+            if result.get("status") != "rate_limited":
+                if result.get("status") == "sent":
+                    self.sent += 1
+                return result
+
+            self.rate_limited += 1
+            retry_after = min(result.get("retry_after", 1.0), SMS_MAX_RETRY_AFTER_SECONDS)
+            self.bucket.pause(retry_after)
+
+        return {"status": "failed", "error": "rate limited by SMS provider"}
+
+    def stats(self) -> dict:
+        return {
+            "provider": self.provider.name if self.provider else None,
+            "rate_per_second": self.bucket.rate,
+            "max_in_flight": self.max_in_flight,
+            "sent": self.sent,
+            "rate_limited": self.rate_limited
+        }
+
+sms_provider_class = SMS_PROVIDERS.get(SMS_PROVIDER)
+sms_dispatcher = SMSDispatcher(
+    sms_provider_class() if sms_provider_class else None,
+    SMS_RATE_PER_SECOND,
+    SMS_BURST,
+    SMS_MAX_IN_FLIGHT
+)
+
+async def send_sms_notification(to_phone: str, message: str) -> dict:
+    """Send an SMS notification through the rate-limited dispatcher."""
+    return await sms_dispatcher.send(to_phone, message)
+
+NOTIFICATION_SENDERS = {
+    "email": send_email_notification,
+    "sms": send_sms_notification
+}
+
+NOTIFICATION_WORKERS = int(os.environ.get("NOTIFICATION_WORKERS", "4"))
+NOTIFICATION_MAX_ATTEMPTS = int(os.environ.get("NOTIFICATION_MAX_ATTEMPTS", "5"))
+NOTIFICATION_RETRY_BASE_SECONDS = float(os.environ.get("NOTIFICATION_RETRY_BASE_SECONDS", "10"))
+NOTIFICATION_LEASE_SECONDS = float(os.environ.get("NOTIFICATION_LEASE_SECONDS", "120"))
+NOTIFICATION_POLL_SECONDS = float(os.environ.get("NOTIFICATION_POLL_SECONDS", "2"))
+NOTIFICATION_OUTBOX_RETENTION_DAYS = int(os.environ.get("NOTIFICATION_OUTBOX_RETENTION_DAYS", "7"))
+# Due email jobs a worker claims together and sends over one SMTP session
+NOTIFICATION_EMAIL_BATCH = int(os.environ.get("NOTIFICATION_EMAIL_BATCH", "20"))
+
+class NotificationOutbox:
+    """MongoDB-backed queue of notifications delivered by background workers.
+
+    Bookings only insert jobs. Workers claim jobs with find_one_and_update,
+    so several workers (and uvicorn processes) can share the queue. A
+    worker that claims an email also claims up to NOTIFICATION_EMAIL_BATCH
+    other due emails and sends them together with SMTPPool.send_many; each
+    job still gets its own outcome. A claim is a lease: a job left in
+    "processing" by a crashed worker becomes claimable again once the
+    lease expires.
+    Failed deliveries are retried with exponential backoff; the final
+    outcome is recorded with store_notification.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    async def setup(self):
+        await db.notification_outbox.create_index([("status", 1), ("next_attempt_at", 1)])
+        await db.notification_outbox.create_index(
+            "completed_at",
+            expireAfterSeconds=NOTIFICATION_OUTBOX_RETENTION_DAYS * 24 * 60 * 60
+        )
+
+    def start(self):
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    @staticmethod
+    def job_doc(channel: str, recipient: str, payload: dict, **extra) -> dict:
+        now = datetime.now(timezone.utc)
+        return {
+            "job_id": f"job_{uuid.uuid4().hex[:12]}",
+            "channel": channel,
+            "recipient": recipient,
+            "payload": payload,
+            "status": "pending",
+            "attempts": 0,
+            "next_attempt_at": now,
+            "created_at": now,
+            **extra
+        }
+
+    async def enqueue(self, jobs: List[tuple], held: List[tuple] = ()):
+        """Queue (channel, recipient, payload) notifications in one write.
+
+        ``held`` (channel, recipient, summary) entries are kept back for
+        the admin digest instead of being delivered on their own.
+        """
+        docs = [self.job_doc(*job) for job in jobs]
+        docs += [
+            self.job_doc(channel, recipient, {}, status="held", summary=summary)
+            for channel, recipient, summary in held
+        ]
+        if not docs:
+            return
+        await db.notification_outbox.insert_many(docs)
+        if jobs:
+            self.wake()
+        if held:
+            admin_digest.wake()
+
+    def wake(self):
+        if self._wakeup:
+            self._wakeup.set()
+
+    async def claim(self, channel: Optional[str] = None) -> Optional[dict]:
+        now = datetime.now(timezone.utc)
+        query = {"$or": [
+            {"status": "pending", "next_attempt_at": {"$lte": now}},
+            {"status": "processing", "locked_until": {"$lt": now}}
+        ]}
+        if channel:
+            query["channel"] = channel
+        return await db.notification_outbox.find_one_and_update(
+            query,
+            {
+                "$set": {"status": "processing", "locked_until": now + timedelta(seconds=NOTIFICATION_LEASE_SECONDS)},
+                "$inc": {"attempts": 1}
+            },
+            sort=[("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def claim_emails(self, first: dict) -> List[dict]:
+        """The claimed email job plus other due emails, one lease's batch"""
+        jobs = [first]
+        while len(jobs) < NOTIFICATION_EMAIL_BATCH:
+            job = await self.claim("email")
+            if job is None:
+                break
+            jobs.append(job)
+        return jobs
+
+    async def deliver(self, job: dict):
+        try:
+            result = await NOTIFICATION_SENDERS[job["channel"]](job["recipient"], **job["payload"])
+        except Exception as exc:
+            result = {"status": "failed", "error": str(exc)}
+        await self.record(job, result)
+
+    async def deliver_emails(self, jobs: List[dict]):
+        results = await send_email_notifications([
+            {"to_email": job["recipient"], **job["payload"]} for job in jobs
+        ])
+        await asyncio.gather(*(self.record(job, result) for job, result in zip(jobs, results)))
+
+    async def record(self, job: dict, result: dict):
+        """Reschedule a failed job, or store its final outcome"""
+        status = result.get("status", "failed")
+        error = result.get("error") or result.get("reason")
+        now = datetime.now(timezone.utc)
+
+        if status == "failed" and job["attempts"] < NOTIFICATION_MAX_ATTEMPTS:
+            delay = NOTIFICATION_RETRY_BASE_SECONDS * 2 ** (job["attempts"] - 1)
+            await db.notification_outbox.update_one(
+                {"job_id": job["job_id"]},
+                {"$set": {
+                    "status": "pending",
+                    "next_attempt_at": now + timedelta(seconds=delay),
+                    "last_error": error
+                }, "$unset": {"locked_until": ""}}
+            )
+            return
+
+        await db.notification_outbox.update_one(
+            {"job_id": job["job_id"]},
+            {"$set": {"status": status, "last_error": error, "completed_at": now},
+             "$unset": {"locked_until": ""}}
+        )
+        await store_notification(job["channel"], job["recipient"], job["payload"], status, error)
+
+    async def _worker(self):
+        while True:
+            try:
+                self._wakeup.clear()
+                job = await self.claim()
+                if job is None:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), NOTIFICATION_POLL_SECONDS)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                if job["channel"] == "email":
+                    await self.deliver_emails(await self.claim_emails(job))
+                else:
+                    await self.deliver(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning(f"Notification worker error: {exc}")
+                await asyncio.sleep(NOTIFICATION_POLL_SECONDS)
+
+    async def stats(self) -> dict:
+        counts = await db.notification_outbox.aggregate([
+            {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+        ]).to_list(None)
+        return {
+            "workers": len(self._tasks),
+            "jobs": {doc["_id"]: doc["count"] for doc in counts},
+            "admin_digest": await admin_digest.stats()
+        }
+
+notification_outbox = NotificationOutbox(NOTIFICATION_WORKERS)
+
+# Admin digest: 0 sends one admin email/SMS per ride (default)
+ADMIN_DIGEST_SECONDS = float(os.environ.get("ADMIN_DIGEST_SECONDS", "0"))
+ADMIN_DIGEST_MAX_RIDES = int(os.environ.get("ADMIN_DIGEST_MAX_RIDES", "20"))
+SMS_MAX_LENGTH = 1600
+
+class AdminDigest:
+    """Coalesces admin ride notifications into one summary per channel.
+
+    Rides are held in the outbox (status "held") and summarised once the
+    oldest has waited ADMIN_DIGEST_SECONDS or ADMIN_DIGEST_MAX_RIDES are
+    waiting. The summary is queued as an ordinary outbox job, so it gets
+    the same retries. update_many moves every held entry to exactly one
+    digest, even with several processes checking at once. Rides still
+    held when the digest is turned off, or when the process stops, are
+    flushed into a digest straight away rather than left behind.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    @property
+    def enabled(self) -> bool:
+        return ADMIN_DIGEST_SECONDS > 0
+
+    def start(self):
+        # Runs even when disabled, to flush rides held while it was enabled
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    def wake(self):
+        if self._wakeup:
+            self._wakeup.set()
+
+    async def _run(self):
+        while self.enabled:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), min(ADMIN_DIGEST_SECONDS, NOTIFICATION_POLL_SECONDS))
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.check()
+            except Exception as exc:
+                logger.warning(f"Admin digest check failed: {exc}")
+        await self.flush()
+
+    async def flush(self):
+        """Digest everything held now, whatever its age"""
+        try:
+            await self.check(force=True)
+        except Exception as exc:
+            logger.warning(f"Admin digest flush failed: {exc}")
+
+    async def check(self, force: bool = False):
+        """Send a digest for every admin recipient whose threshold is reached"""
+        held = await db.notification_outbox.aggregate([
+            {"$match": {"status": "held"}},
+            {"$group": {
+                "_id": {"channel": "$channel", "recipient": "$recipient"},
+                "count": {"$sum": 1},
+                "oldest": {"$min": "$created_at"}
+            }}
+        ]).to_list(None)
+
+        due_before = datetime.now(timezone.utc) - timedelta(seconds=ADMIN_DIGEST_SECONDS)
+        for group in held:
+            oldest = group["oldest"]
+            if oldest.tzinfo is None:
+                oldest = oldest.replace(tzinfo=timezone.utc)
+            if force or group["count"] >= ADMIN_DIGEST_MAX_RIDES or oldest <= due_before:
+                await self.send(group["_id"]["channel"], group["_id"]["recipient"])
+
+    async def send(self, channel: str, recipient: str):
+        digest_id = f"digest_{uuid.uuid4().hex[:12]}"
+        await db.notification_outbox.update_many(
+            {"status": "held", "channel": channel, "recipient": recipient},
+            {"$set": {"status": "digested", "digest_id": digest_id, "completed_at": datetime.now(timezone.utc)}}
+        )
+        entries = await db.notification_outbox.find(
+            {"digest_id": digest_id},
+            {"_id": 0, "summary": 1}
+        ).sort("created_at", 1).to_list(None)
+        if not entries:
+            return
+
+        count = len(entries)
+        lines = [entry["summary"] for entry in entries]
+        if channel == "email":
+            payload = {
+                "subject": f"{count} nouvelle(s) course(s)",
+                "body": f"{count} nouvelle(s) course(s) depuis le dernier résumé:\n\n" + "\n".join(lines)
+            }
+        else:
+            payload = {"message": truncate_sms(f"{count} nouvelle(s) course(s): " + "; ".join(lines))}
+
+        await db.notification_outbox.insert_one(
+            notification_outbox.job_doc(channel, recipient, payload, digest_id=digest_id, digest_of=count)
+        )
+        notification_outbox.wake()
+        logger.info(f"Admin {channel} digest for {count} rides queued")
+
+    async def stats(self) -> dict:
+        rides = await db.notification_outbox.count_documents({"status": "digested"})
+        digests = await db.notification_outbox.count_documents({"digest_of": {"$exists": True}})
+        return {
+            "enabled": self.enabled,
+            "held": await db.notification_outbox.count_documents({"status": "held"}),
+            "rides_digested": rides,
+            "digests_sent": digests,
+            "deliveries_saved": rides - digests
+        }
+
+admin_digest = AdminDigest()
+
+def ride_summary(ride_doc: dict) -> str:
+    return (
+        f"{ride_doc['ride_id']}: {ride_doc['pickup']['address']} → {ride_doc['destination']['address']} "
+        f"({ride_doc['vehicle_type']}, CHF {ride_doc['price']:.2f})"
+    )
+
+def truncate_sms(message: str) -> str:
+    if len(message) > SMS_MAX_LENGTH:
+        message = message[:SMS_MAX_LENGTH - 1] + "…"
+    return message
 
 async def notify_new_ride(ride_doc: dict, contact: Optional[dict] = None):
-    """Notify customer and admin about a new ride."""
+    """Queue customer and admin notifications about a new ride."""
     contact = contact or {}
     customer_name = contact.get("name") or "Client"
 
@@ -418,42 +2178,98 @@ async def notify_new_ride(ride_doc: dict, contact: Optional[dict] = None):
     customer_email = contact.get("email")
     customer_phone = contact.get("phone")
 
-    tasks = []
+    jobs = []
 
     if customer_email:
-        tasks.append(dispatch_notification(
+        jobs.append((
             "email",
             customer_email,
-            {"subject": email_subject, "body": f"Bonjour {customer_name},\n\n{message}\nMerci pour votre confiance.\nRomuo.ch"},
-            send_email_notification
+            {"subject": email_subject, "body": f"Bonjour {customer_name},\n\n{message}\nMerci pour votre confiance.\nRomuo.ch"}
         ))
 
     if customer_phone:
-        tasks.append(dispatch_notification(
+        jobs.append((
             "sms",
             customer_phone,
-            {"message": f"{customer_name}, votre course est confirmée. {message}"},
-            send_sms_notification
+            {"message": f"{customer_name}, votre course est confirmée. {message}"}
         ))
 
+    # Admin notifications go out immediately or wait for the next digest
+    held = []
+    summary = ride_summary(ride_doc)
+
     if ADMIN_NOTIFICATION_EMAIL:
-        tasks.append(dispatch_notification(
+        if admin_digest.enabled:
+            held.append(("email", ADMIN_NOTIFICATION_EMAIL, summary))
+        else:
+            jobs.append((
+                "email",
+                ADMIN_NOTIFICATION_EMAIL,
+                {"subject": f"Nouvelle course {ride_doc['ride_id']}", "body": message}
+            ))
+
+    if ADMIN_NOTIFICATION_PHONE:
+        if admin_digest.enabled:
+            held.append(("sms", ADMIN_NOTIFICATION_PHONE, summary))
+        else:
+            jobs.append((
+                "sms",
+                ADMIN_NOTIFICATION_PHONE,
+                {"message": f"Nouvelle course {ride_doc['ride_id']}: {pickup_address} → {destination_address}"}
+            ))
+
+    await notification_outbox.enqueue(jobs, held)
+
+async def notify_bulk_rides(ride_docs: List[dict]):
+    """Queue one confirmation per customer contact and per admin for a bulk booking."""
+    by_email: Dict[str, list] = {}
+    by_phone: Dict[str, list] = {}
+    for ride_doc in ride_docs:
+        contact = ride_doc.get("contact") or {}
+        if contact.get("email"):
+            by_email.setdefault(contact["email"], []).append(ride_doc)
+        if contact.get("phone"):
+            by_phone.setdefault(contact["phone"], []).append(ride_doc)
+
+    jobs = []
+    for email, rides in by_email.items():
+        customer_name = rides[0]["contact"].get("name") or "Client"
+        lines = "\n".join(ride_summary(ride) for ride in rides)
+        jobs.append((
             "email",
-            ADMIN_NOTIFICATION_EMAIL,
-            {"subject": f"Nouvelle course {ride_doc['ride_id']}", "body": message},
-            send_email_notification
+            email,
+            {
+                "subject": f"Confirmation de {len(rides)} réservation(s)",
+                "body": f"Bonjour {customer_name},\n\nVos {len(rides)} course(s) sont réservées:\n\n{lines}\n\nMerci pour votre confiance.\nRomuo.ch"
+            }
         ))
+    for phone, rides in by_phone.items():
+        message = f"{len(rides)} course(s) confirmée(s): " + "; ".join(ride_summary(ride) for ride in rides)
+        jobs.append(("sms", phone, {"message": truncate_sms(message)}))
 
+    # Admins get the batch as one message, or through the digest when enabled
+    held = []
+    summaries = [ride_summary(ride) for ride in ride_docs]
+    if ADMIN_NOTIFICATION_EMAIL:
+        if admin_digest.enabled:
+            held += [("email", ADMIN_NOTIFICATION_EMAIL, summary) for summary in summaries]
+        else:
+            jobs.append((
+                "email",
+                ADMIN_NOTIFICATION_EMAIL,
+                {"subject": f"{len(ride_docs)} nouvelle(s) course(s) (réservation groupée)", "body": "\n".join(summaries)}
+            ))
     if ADMIN_NOTIFICATION_PHONE:
-        tasks.append(dispatch_notification(
-            "sms",
-            ADMIN_NOTIFICATION_PHONE,
-            {"message": f"Nouvelle course {ride_doc['ride_id']}: {pickup_address} → {destination_address}"},
-            send_sms_notification
-        ))
+        if admin_digest.enabled:
+            held += [("sms", ADMIN_NOTIFICATION_PHONE, summary) for summary in summaries]
+        else:
+            jobs.append((
+                "sms",
+                ADMIN_NOTIFICATION_PHONE,
+                {"message": truncate_sms(f"{len(ride_docs)} nouvelle(s) course(s): " + "; ".join(summaries))}
+            ))
 
-    if tasks:
-        await asyncio.gather(*tasks)
+    await notification_outbox.enqueue(jobs, held)
 
 # =============================================================================
 # PYDANTIC MODELS
@@ -588,13 +2404,22 @@ class RideCalculation(BaseModel):
     num_passengers: int = 1
     scheduled_time: Optional[str] = None
 
+class RideCalculationBatch(BaseModel):
+    quotes: List[RideCalculation]
+
+class TariffUpdate(BaseModel):
+    vehicle_types: Optional[Dict[str, dict]] = None
+    peak_hours: Optional[Dict[str, List[int]]] = None
+    discount_rates: Optional[Dict[str, float]] = None
+
 class RideCreate(BaseModel):
     pickup: Location
     destination: Location
     vehicle_type: str
     distance_km: float
     duration_minutes: Optional[float] = None
-    price: float
+    price: Optional[float] = None
+    quote_token: Optional[str] = None
     payment_method: str = "cash"  # cash, card, invoice
     scheduled_time: Optional[str] = None
     notes: Optional[str] = None
@@ -610,12 +2435,20 @@ class GuestRideCreate(BaseModel):
     vehicle_type: str
     distance_km: float
     duration_minutes: Optional[float] = None
-    price: float
+    price: Optional[float] = None
+    quote_token: Optional[str] = None
     payment_method: str = "cash"  # cash, card, invoice
     scheduled_time: Optional[str] = None
     notes: Optional[str] = None
     contact: GuestContact
 
+class BulkRide(RideCreate):
+    contact: Optional[GuestContact] = None  # defaults to the booking account
+    reference: Optional[str] = None  # client reference echoed in the results
+
+class BulkRideCreate(BaseModel):
+    rides: List[BulkRide]
+
 class Ride(BaseModel):
     ride_id: str
     user_id: str
@@ -653,6 +2486,250 @@ async def get_session_token(request: Request) -> Optional[str]:
 
     return None
 
+SESSION_CACHE_SIZE = int(os.environ.get("SESSION_CACHE_SIZE", "10000"))
+SESSION_CACHE_TTL_SECONDS = int(os.environ.get("SESSION_CACHE_TTL_SECONDS", "30"))
+SESSION_CACHE_NEGATIVE_TTL_SECONDS = int(os.environ.get("SESSION_CACHE_NEGATIVE_TTL_SECONDS", "5"))
+
+class SessionCache:
+    """Bounded LRU cache of session token -> User (or the auth error it raised).
+
+    Entries live for SESSION_CACHE_TTL_SECONDS at most and never past the
+    session's own expiry. Changes made on this worker invalidate entries
+    explicitly; other workers see them once the TTL runs out.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, negative_ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._tokens_by_user: Dict[str, set] = {}
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, token: str):
+        """Cached User or HTTPException for the token, None on a miss"""
+        entry = self._entries.get(token)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                self._drop(token)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(token)
+        self.hits += 1
+        if isinstance(entry[1], HTTPException):
+            self.negative_hits += 1
+        return entry[1]
+
+    def put(self, token: str, user: User, session_expires_at: datetime):
+        ttl = min(self.ttl, (session_expires_at - datetime.now(timezone.utc)).total_seconds())
+        self._store(token, time.monotonic() + ttl, user)
+        self._tokens_by_user.setdefault(user.user_id, set()).add(token)
+
+    def put_error(self, token: str, error: HTTPException):
+        self._store(token, time.monotonic() + self.negative_ttl, error)
+
+    def _store(self, token: str, expires: float, value):
+        self._drop(token)
+        self._entries[token] = (expires, value)
+        while len(self._entries) > self.maxsize:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _drop(self, token: str):
+        entry = self._entries.pop(token, None)
+        if entry is not None and isinstance(entry[1], User):
+            tokens = self._tokens_by_user.get(entry[1].user_id)
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del self._tokens_by_user[entry[1].user_id]
+
+    def invalidate_token(self, token: str):
+        if token in self._entries:
+            self._drop(token)
+            self.invalidations += 1
+
+    def invalidate_user(self, user_id: str):
+        for token in list(self._tokens_by_user.get(user_id, ())):
+            self.invalidate_token(token)
+
+    def clear(self):
+        self._entries.clear()
+        self._tokens_by_user.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "users": len(self._tokens_by_user),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "negative_ttl_seconds": self.negative_ttl,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None
+        }
+
+session_cache = SessionCache(SESSION_CACHE_SIZE, SESSION_CACHE_TTL_SECONDS, SESSION_CACHE_NEGATIVE_TTL_SECONDS)
+
+# Stateless sessions: SESSION_MODE=jwt issues short-lived signed access
+# tokens plus a refresh token instead of user_sessions rows
+SESSION_MODE = os.environ.get("SESSION_MODE", "database")
+JWT_SECRET = os.environ.get("JWT_SECRET")
+JWT_ALGORITHM = "HS256"
+ACCESS_TOKEN_TTL_SECONDS = int(os.environ.get("ACCESS_TOKEN_TTL_SECONDS", "900"))
+REFRESH_TOKEN_TTL_DAYS = int(os.environ.get("REFRESH_TOKEN_TTL_DAYS", "7"))
+JWT_PROFILE_FIELDS = ("email", "name", "picture", "company_name", "vat_number",
+                      "gender", "date_of_birth", "phone")
+
+class JWTSessions:
+    """Issues and verifies signed access/refresh tokens.
+
+    Access tokens carry the user's profile, role and account_type, so
+    get_current_user trusts the signature alone. Only refresh and logout
+    touch MongoDB (db.revoked_tokens); recently revoked access tokens are
+    mirrored in memory by the snapshot refresher.
+    """
+
+    def __init__(self, secret: Optional[str] = None):
+        self.secret = secret
+        self.revoked: Dict[str, float] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return SESSION_MODE == "jwt"
+
+    async def setup(self):
+        if not self.secret:
+            self.secret = await load_shared_secret("jwt_secret")
+        await db.revoked_tokens.create_index("jti", unique=True)
+        await db.revoked_tokens.create_index("expires_at", expireAfterSeconds=0)
+        await self.load_revoked()
+
+    async def load_revoked(self):
+        """Mirror still-valid revoked access tokens in memory"""
+        now = datetime.now(timezone.utc)
+        revoked = {}
+        async for doc in db.revoked_tokens.find({"type": "access", "expires_at": {"$gt": now}}):
+            expires_at = doc["expires_at"]
+            if expires_at.tzinfo is None:
+                expires_at = expires_at.replace(tzinfo=timezone.utc)
+            revoked[doc["jti"]] = expires_at.timestamp()
+        self.revoked = revoked
+
+    def _encode(self, claims: dict, ttl: timedelta) -> str:
+        now = datetime.now(timezone.utc)
+        claims = {**claims, "jti": uuid.uuid4().hex, "iat": now, "exp": now + ttl}
+        return jwt.encode(claims, self.secret, algorithm=JWT_ALGORITHM)
+
+    def issue(self, user: dict) -> dict:
+        """Access and refresh tokens for a user document"""
+        access_token = self._encode({
+            "sub": user["user_id"],
+            "typ": "access",
+            "role": user.get("role", "passenger"),
+            "account_type": user.get("account_type", "personal"),
+            "created_at": user["created_at"].isoformat(),
+            **{field: user.get(field) for field in JWT_PROFILE_FIELDS}
+        }, timedelta(seconds=ACCESS_TOKEN_TTL_SECONDS))
+        refresh_token = self._encode(
+            {"sub": user["user_id"], "typ": "refresh"},
+            timedelta(days=REFRESH_TOKEN_TTL_DAYS)
+        )
+        return {
+            "access_token": access_token,
+            "refresh_token": refresh_token,
+            "expires_in": ACCESS_TOKEN_TTL_SECONDS
+        }
+
+    def decode(self, token: str, token_type: str) -> dict:
+        try:
+            claims = jwt.decode(token, self.secret, algorithms=[JWT_ALGORITHM])
+        except jwt.ExpiredSignatureError:
+            raise HTTPException(status_code=401, detail="Session expired")
+        except jwt.InvalidTokenError:
+            raise HTTPException(status_code=401, detail="Invalid session")
+        if claims.get("typ") != token_type:
+            raise HTTPException(status_code=401, detail="Invalid session")
+        return claims
+
+    def authenticate(self, token: str) -> User:
+        """User from an access token, without any database lookup"""
+        claims = self.decode(token, "access")
+        if claims["jti"] in self.revoked:
+            raise HTTPException(status_code=401, detail="Session revoked")
+        return User(
+            user_id=claims["sub"],
+            role=claims["role"],
+            account_type=claims["account_type"],
+            created_at=claims["created_at"],
+            **{field: claims.get(field) for field in JWT_PROFILE_FIELDS}
+        )
+
+    async def revoke(self, token: str):
+        """Add a token to the revocation list (ignores invalid tokens)"""
+        try:
+            claims = jwt.decode(token, self.secret, algorithms=[JWT_ALGORITHM])
+        except jwt.InvalidTokenError:
+            return
+        expires_at = datetime.fromtimestamp(claims["exp"], timezone.utc)
+        await db.revoked_tokens.update_one(
+            {"jti": claims["jti"]},
+            {"$setOnInsert": {"type": claims.get("typ"), "expires_at": expires_at}},
+            upsert=True
+        )
+        if claims.get("typ") == "access":
+            self.revoked[claims["jti"]] = expires_at.timestamp()
+
+    async def refresh(self, refresh_token: str) -> dict:
+        """Rotate a refresh token and issue new tokens from the current user document"""
+        claims = self.decode(refresh_token, "refresh")
+        revoked = await db.revoked_tokens.find_one_and_update(
+            {"jti": claims["jti"]},
+            {"$setOnInsert": {
+                "type": "refresh",
+                "expires_at": datetime.fromtimestamp(claims["exp"], timezone.utc)
+            }},
+            upsert=True
+        )
+        if revoked:
+            raise HTTPException(status_code=401, detail="Session revoked")
+
+        user_doc = await db.users.find_one({"user_id": claims["sub"]}, {"_id": 0})
+        if not user_doc:
+            raise HTTPException(status_code=404, detail="User not found")
+        return self.issue(user_doc)
+
+jwt_sessions = JWTSessions(JWT_SECRET)
+
+def set_session_cookies(response: Response, tokens: dict):
+    response.set_cookie(
+        key="session_token",
+        value=tokens["access_token"],
+        httponly=True,
+        secure=True,
+        samesite="none",
+        max_age=tokens["expires_in"],
+        path="/"
+    )
+    response.set_cookie(
+        key="refresh_token",
+        value=tokens["refresh_token"],
+        httponly=True,
+        secure=True,
+        samesite="none",
+        max_age=REFRESH_TOKEN_TTL_DAYS * 24 * 60 * 60,
+        path="/api/auth"
+    )
+
 async def get_current_user(request: Request) -> User:
     """Get current user from session token"""
     session_token = await get_session_token(request)
@@ -660,6 +2737,28 @@ async def get_current_user(request: Request) -> User:
     if not session_token:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
+    # Signed access tokens are verified from the signature; opaque tokens
+    # from before the switch still go through user_sessions
+    if jwt_sessions.enabled and session_token.count(".") == 2:
+        return jwt_sessions.authenticate(session_token)
+
+    cached = session_cache.get(session_token)
+    if isinstance(cached, HTTPException):
+        raise cached
+    if cached is not None:
+        return cached
+
+    try:
+        user, expires_at = await load_session_user(session_token)
+    except HTTPException as exc:
+        session_cache.put_error(session_token, exc)
+        raise
+
+    session_cache.put(session_token, user, expires_at)
+    return user
+
+async def load_session_user(session_token: str) -> tuple:
+    """Resolve a session token to (User, session expiry) from MongoDB"""
     session = await db.user_sessions.find_one(
         {"session_token": session_token},
         {"_id": 0}
@@ -683,7 +2782,7 @@ async def get_current_user(request: Request) -> User:
     if not user_doc:
         raise HTTPException(status_code=404, detail="User not found")
 
-    return User(**user_doc)
+    return User(**user_doc), expires_at
 
 async def get_optional_user(request: Request) -> Optional[User]:
     """Get current user if authenticated, None otherwise"""
@@ -704,10 +2803,15 @@ SMTP_PASSWORD = os.environ.get("SMTP_PASSWORD")
 SMTP_FROM = os.environ.get("SMTP_FROM")
 SMTP_USE_TLS = os.environ.get("SMTP_USE_TLS", "true").lower() == "true"
 
-SMS_PROVIDER = os.environ.get("SMS_PROVIDER", "twilio")
 TWILIO_ACCOUNT_SID = os.environ.get("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH_TOKEN = os.environ.get("TWILIO_AUTH_TOKEN")
 TWILIO_FROM_NUMBER = os.environ.get("TWILIO_FROM_NUMBER")
+TWILIO_API_URL = os.environ.get("TWILIO_API_URL", "https://api.twilio.com")
+
+AUTH_SESSION_DATA_URL = os.environ.get(
+    "AUTH_SESSION_DATA_URL",
+    "https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data"
+)
 
 def verify_admin_access(admin_password: str):
     """Simple admin verification"""
@@ -719,87 +2823,193 @@ def verify_admin_access(admin_password: str):
 # AUTH ROUTES
 # =============================================================================
 
-@api_router.post("/auth/session")
-async def create_session(request: Request, response: Response):
-    """Exchange session_id for session_token"""
-    session_id = request.headers.get("X-Session-ID")
+SESSION_EXCHANGE_CACHE_SECONDS = int(os.environ.get("SESSION_EXCHANGE_CACHE_SECONDS", "10"))
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution.
+
+    Callers that arrive while a call is running await the same task;
+    successful results are kept for ``ttl`` seconds and served to repeats.
+    Failures are not cached, so a retry after an error runs again.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._results: Dict[str, tuple] = {}
+
+    async def run(self, key: str, func):
+        now = time.monotonic()
+        cached = self._results.get(key)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+
+        # Shielded so a disconnecting caller does not cancel the shared call
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is None:
+            now = time.monotonic()
+            self._results = {k: v for k, v in self._results.items() if v[0] > now}
+            self._results[key] = (now + self.ttl, task.result())
+
+session_exchanges = SingleFlight(SESSION_EXCHANGE_CACHE_SECONDS)
+
+async def upsert_login_user(session_data: SessionDataResponse) -> dict:
+    """Find or create the user for a login in one atomic round trip"""
+    new_user = {
+        "user_id": f"user_{uuid.uuid4().hex[:12]}",
+        "email": session_data.email,
+        "name": session_data.name,
+        "picture": session_data.picture,
+        "role": "passenger",
+        "account_type": "personal",
+        "created_at": datetime.now(timezone.utc)
+    }
+    try:
+        return await db.users.find_one_and_update(
+            {"email": session_data.email},
+            {"$setOnInsert": new_user},
+            upsert=True,
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        # Lost a concurrent upsert race on the unique email index
+        return await db.users.find_one({"email": session_data.email}, {"_id": 0})
 
-    if not session_id:
-        raise HTTPException(status_code=400, detail="Session ID required")
+async def exchange_session(session_id: str) -> dict:
+    """Fetch the OAuth session data and create the user session for it.
 
-    async with httpx.AsyncClient() as client:
-        try:
-            auth_response = await client.get(
-                "https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data",
-                headers={"X-Session-ID": session_id}
-            )
-            auth_response.raise_for_status()
-            user_data = auth_response.json()
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"Authentication failed: {str(e)}")
+    A database-mode login is two sequential writes: the user upsert, then
+    the session insert, which needs the user_id the upsert returns. In
+    jwt mode the upsert is the only write.
+    """
+    try:
+        auth_response = await http_pool.client(AUTH_SESSION_DATA_URL).get(
+            AUTH_SESSION_DATA_URL,
+            headers={"X-Session-ID": session_id}
+        )
+        auth_response.raise_for_status()
+        user_data = auth_response.json()
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Authentication failed: {str(e)}")
 
     session_data = SessionDataResponse(**user_data)
+    user_doc = await upsert_login_user(session_data)
 
-    existing_user = await db.users.find_one(
-        {"email": session_data.email},
-        {"_id": 0}
-    )
-
-    if not existing_user:
-        user_id = f"user_{uuid.uuid4().hex[:12]}"
-        user_doc = {
-            "user_id": user_id,
+    if jwt_sessions.enabled:
+        tokens = jwt_sessions.issue(user_doc)
+        return {
+            "user_id": user_doc["user_id"],
             "email": session_data.email,
             "name": session_data.name,
             "picture": session_data.picture,
-            "role": "passenger",
-            "account_type": "personal",
-            "created_at": datetime.now(timezone.utc)
+            "session_token": tokens["access_token"],
+            "refresh_token": tokens["refresh_token"],
+            "expires_in": tokens["expires_in"]
         }
-        await db.users.insert_one(user_doc)
-    else:
-        user_id = existing_user["user_id"]
 
     session_doc = {
-        "user_id": user_id,
+        "user_id": user_doc["user_id"],
         "session_token": session_data.session_token,
         "expires_at": datetime.now(timezone.utc) + timedelta(days=7),
         "created_at": datetime.now(timezone.utc)
     }
     await db.user_sessions.insert_one(session_doc)
-
-    response.set_cookie(
-        key="session_token",
-        value=session_data.session_token,
-        httponly=True,
-        secure=True,
-        samesite="none",
-        max_age=7 * 24 * 60 * 60,
-        path="/"
-    )
+    session_cache.invalidate_token(session_data.session_token)
 
     return {
-        "user_id": user_id,
+        "user_id": user_doc["user_id"],
         "email": session_data.email,
         "name": session_data.name,
         "picture": session_data.picture,
         "session_token": session_data.session_token
     }
 
+@api_router.post("/auth/session")
+async def create_session(request: Request, response: Response):
+    """Exchange session_id for session_token"""
+    session_id = request.headers.get("X-Session-ID")
+
+    if not session_id:
+        raise HTTPException(status_code=400, detail="Session ID required")
+
+    # Retries and parallel tabs share one upstream call and one session write
+    result = await session_exchanges.run(session_id, lambda: exchange_session(session_id))
+
+    if "refresh_token" in result:
+        set_session_cookies(response, {
+            "access_token": result["session_token"],
+            "refresh_token": result["refresh_token"],
+            "expires_in": result["expires_in"]
+        })
+    else:
+        response.set_cookie(
+            key="session_token",
+            value=result["session_token"],
+            httponly=True,
+            secure=True,
+            samesite="none",
+            max_age=7 * 24 * 60 * 60,
+            path="/"
+        )
+
+    return result
+
 @api_router.get("/auth/me")
 async def get_me(current_user: User = Depends(get_current_user)):
     """Get current authenticated user"""
     return current_user
 
+@api_router.post("/auth/refresh")
+async def refresh_session(request: Request, response: Response):
+    """Exchange a refresh token for new access and refresh tokens (SESSION_MODE=jwt)"""
+    if not jwt_sessions.enabled:
+        raise HTTPException(status_code=404, detail="Token refresh is not enabled")
+
+    refresh_token = request.cookies.get("refresh_token")
+    if not refresh_token:
+        try:
+            refresh_token = (await request.json()).get("refresh_token")
+        except Exception:
+            refresh_token = None
+    if not refresh_token:
+        raise HTTPException(status_code=401, detail="Refresh token required")
+
+    tokens = await jwt_sessions.refresh(refresh_token)
+    set_session_cookies(response, tokens)
+    return {
+        "session_token": tokens["access_token"],
+        "refresh_token": tokens["refresh_token"],
+        "expires_in": tokens["expires_in"]
+    }
+
 @api_router.post("/auth/logout")
 async def logout(request: Request, response: Response):
     """Logout user"""
     session_token = await get_session_token(request)
 
     if session_token:
-        await db.user_sessions.delete_one({"session_token": session_token})
+        if jwt_sessions.enabled and session_token.count(".") == 2:
+            await jwt_sessions.revoke(session_token)
+        else:
+            await db.user_sessions.delete_one({"session_token": session_token})
+            session_cache.invalidate_token(session_token)
+
+    refresh_token = request.cookies.get("refresh_token")
+    if refresh_token and jwt_sessions.enabled:
+        await jwt_sessions.revoke(refresh_token)
 
     response.delete_cookie(key="session_token", path="/")
+    response.delete_cookie(key="refresh_token", path="/api/auth")
     return {"message": "Logged out successfully"}
 
 # =============================================================================
@@ -809,7 +3019,7 @@ async def logout(request: Request, response: Response):
 @api_router.get("/vehicles")
 async def get_vehicle_types():
     """Get all available vehicle types with pricing"""
-    return {"vehicles": list(VEHICLE_TYPES.values())}
+    return {"vehicles": tariffs.current.vehicle_list()}
 
 @api_router.get("/vehicles/suggest")
 async def suggest_vehicles(num_passengers: int = 1):
@@ -841,11 +3051,16 @@ async def suggest_vehicles(num_passengers: int = 1):
 @api_router.get("/zones")
 async def get_all_zones():
     """Get all fixed price zones"""
-    zones = await db.zones.find({"active": True}, {"_id": 0}).to_list(100)
+    zones = await db.zones.find({"active": True}, {"_id": 0}).to_list(None)
     if not zones:
         zones = DEFAULT_FIXED_ZONES
     return {"zones": zones}
 
+@api_router.get("/zones/index")
+async def get_zone_index_status():
+    """Report this worker's zone index version and last reload time"""
+    return zone_index.status()
+
 @api_router.post("/zones")
 async def create_zone(zone: ZoneCreate, admin_password: str):
     """Create a new fixed price zone"""
@@ -860,6 +3075,7 @@ async def create_zone(zone: ZoneCreate, admin_password: str):
     }
 
     await db.zones.insert_one(zone_doc)
+    await zone_index.invalidate()
     return {"zone_id": zone_id, "message": "Zone created successfully"}
 
 @api_router.put("/zones/{zone_id}")
@@ -875,6 +3091,7 @@ async def update_zone(zone_id: str, zone: ZoneCreate, admin_password: str):
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="Zone not found")
 
+    await zone_index.invalidate()
     return {"message": "Zone updated successfully"}
 
 @api_router.delete("/zones/{zone_id}")
@@ -890,38 +3107,332 @@ async def delete_zone(zone_id: str, admin_password: str):
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="Zone not found")
 
+    await zone_index.invalidate()
     return {"message": "Zone deleted successfully"}
 
+# =============================================================================
+# PAGINATION - Keyset cursors for list endpoints
+# =============================================================================
+
+MAX_PAGE_SIZE = int(os.environ.get("MAX_PAGE_SIZE", "1000"))
+
+def encode_cursor(doc: dict, id_field: str) -> str:
+    created_at = doc.get("created_at")
+    if isinstance(created_at, datetime):
+        created_at = created_at.isoformat()
+    return _b64encode(json.dumps([created_at, doc.get(id_field)]).encode())
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        created_at, doc_id = json.loads(_b64decode(cursor))
+        if created_at is not None:
+            created_at = datetime.fromisoformat(created_at)
+        return created_at, doc_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def keyset_filter(cursor: str, id_field: str, direction: int) -> dict:
+    """Documents strictly after the cursor in (created_at, id) order"""
+    created_at, doc_id = decode_cursor(cursor)
+    after = "$lt" if direction < 0 else "$gt"
+    same_time = {"created_at": created_at, id_field: {after: doc_id}}
+
+    # Documents without created_at sort as null: last when descending, first when ascending
+    if created_at is None:
+        if direction < 0:
+            return same_time
+        return {"$or": [{"created_at": {"$ne": None}}, same_time]}
+    if direction < 0:
+        return {"$or": [{"created_at": {"$lt": created_at}}, same_time, {"created_at": None}]}
+    return {"$or": [{"created_at": {"$gt": created_at}}, same_time]}
+
+async def paginate(
+    collection,
+    query: dict,
+    id_field: str,
+    limit: int,
+    cursor: Optional[str] = None,
+    direction: int = -1,
+    projection: Optional[dict] = None
+) -> tuple:
+    """One page of a (created_at, id) ordered listing and the cursor of the next one.
+
+    The id breaks created_at ties, so the order is stable and a page never
+    repeats or skips a document; each page is one bounded index range scan
+    whatever the collection size. ``next_cursor`` is None on the last page.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    if cursor:
+        after = keyset_filter(cursor, id_field, direction)
+        query = {"$and": [query, after]} if query else after
+
+    projection = projection or {"_id": 0}
+    if any(value for field, value in projection.items() if field != "_id"):
+        # Inclusion projections still need the sort keys for the next cursor
+        projection = {**projection, "created_at": 1, id_field: 1}
+
+    docs = await collection.find(query, projection).sort(
+        [("created_at", direction), (id_field, direction)]
+    ).limit(limit + 1).to_list(limit + 1)
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1], id_field)
+    return docs, next_cursor
+
+# =============================================================================
+# RIDE VIEWS - Projection profiles for ride listings
+# =============================================================================
+
+RIDE_SUMMARY_FIELDS = [
+    "ride_id", "status", "vehicle_type", "price", "distance_km", "driver_id",
+    "created_at", "scheduled_time", "pickup.address", "destination.address"
+]
+
+RIDE_DISPATCH_FIELDS = [
+    "ride_id", "user_id", "status", "vehicle_type", "price", "distance_km",
+    "duration_minutes", "driver_id", "payment_method", "billing_type", "notes",
+    "created_at", "scheduled_time", "assigned_at", "pickup", "destination",
+    "contact.name", "contact.phone"
+]
+
+# Projections pushed down to MongoDB, so unused fields are neither decoded nor sent
+RIDE_VIEWS = {
+    "summary": {"_id": 0, **{field: 1 for field in RIDE_SUMMARY_FIELDS}},
+    "dispatch": {"_id": 0, **{field: 1 for field in RIDE_DISPATCH_FIELDS}},
+    "full": {"_id": 0, "idempotency_key": 0}
+}
+
+def ride_projection(view: str) -> dict:
+    projection = RIDE_VIEWS.get(view)
+    if projection is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown view '{view}', expected one of: {', '.join(RIDE_VIEWS)}"
+        )
+    return projection
+
+# =============================================================================
+# IDEMPOTENCY KEYS - Safe client retries of booking requests
+# =============================================================================
+
+IDEMPOTENCY_KEY_HOURS = int(os.environ.get("IDEMPOTENCY_KEY_HOURS", "24"))
+IDEMPOTENCY_LOCK_SECONDS = int(os.environ.get("IDEMPOTENCY_LOCK_SECONDS", "30"))
+IDEMPOTENCY_CACHE_SIZE = int(os.environ.get("IDEMPOTENCY_CACHE_SIZE", "10000"))
+IDEMPOTENCY_COMPLETE_ATTEMPTS = int(os.environ.get("IDEMPOTENCY_COMPLETE_ATTEMPTS", "3"))
+IDEMPOTENCY_KEY_MIN_LENGTH = 16
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+IDEMPOTENCY_KEY_CHARS = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_")
+
+def request_fingerprint(payload: BaseModel) -> str:
+    """Stable hash of a request body, to detect a key reused for another request"""
+    body = json.dumps(payload.dict(), sort_keys=True, default=str)
+    return hashlib.sha256(body.encode()).hexdigest()
+
+def guest_idempotency_scope(contact: GuestContact) -> str:
+    """Guests have no account, so their keys are scoped by their normalised contact"""
+    email = (contact.email or "").strip().lower()
+    phone = "".join(c for c in contact.phone or "" if c.isdigit() or c == "+")
+    return "rides:guest:" + hashlib.sha256(f"{email}|{phone}".encode()).hexdigest()[:32]
+
+class IdempotencyStore:
+    """Runs a request at most once per Idempotency-Key and replays its response.
+
+    Keys are claimed in db.idempotency_keys (unique on key, expired by a
+    TTL index), so retries landing on any worker see the same claim. The
+    first request stores its response on the claim; replays return it
+    without running the handler again. A claim left "processing" by a
+    crashed request can be taken over after IDEMPOTENCY_LOCK_SECONDS, and
+    a failed request releases its claim so the client can retry.
+
+    Handlers tag what they create with claim_key() and pass a ``recover``
+    callback that rebuilds the response from it. It is consulted before a
+    taken-over claim runs the handler again and when a handler fails, so a
+    request whose side effects landed but whose claim was never completed
+    is replayed rather than executed twice.
+
+    Within one process, concurrent retries share the running call and
+    recent responses are served from memory without a database read.
+
+    Keys are scoped per caller (the account, or a guest's contact) and a
+    key replayed with a different request body is rejected, so one caller
+    never receives another's stored response.
+    """
+
+    def __init__(self, ttl_hours: int, lock_seconds: int, cache_size: int):
+        self.ttl = ttl_hours * 60 * 60
+        self.lock_seconds = lock_seconds
+        self.cache_size = cache_size
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._recent: OrderedDict = OrderedDict()
+        self._stats = {"executed": 0, "replayed_memory": 0, "replayed_db": 0, "conflicts": 0}
+
+    async def setup(self):
+        await db.idempotency_keys.create_index("key", unique=True)
+        await db.idempotency_keys.create_index("created_at", expireAfterSeconds=self.ttl)
+
+    @staticmethod
+    def claim_key(scope: str, key: Optional[str]) -> Optional[str]:
+        """Stored key of a request, for tagging the documents it creates"""
+        return f"{scope}:{key}" if key is not None else None
+
+    async def run(self, scope: str, key: Optional[str], fingerprint: str, func, recover=None) -> tuple:
+        """Return (response, replayed) for the request identified by scope and key"""
+        if key is None:
+            return await func(), False
+        if (not IDEMPOTENCY_KEY_MIN_LENGTH <= len(key) <= IDEMPOTENCY_KEY_MAX_LENGTH or
+                not IDEMPOTENCY_KEY_CHARS.issuperset(key)):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Idempotency-Key must be {IDEMPOTENCY_KEY_MIN_LENGTH} to "
+                       f"{IDEMPOTENCY_KEY_MAX_LENGTH} letters, digits, '-' or '_', such as a UUID"
+            )
+
+        full_key = self.claim_key(scope, key)
+        recent = self._recent.get(full_key)
+        if recent is not None and recent[0] > time.monotonic():
+            self._check_fingerprint(recent[1], fingerprint)
+            self._stats["replayed_memory"] += 1
+            return recent[2], True
+
+        task = self._inflight.get(full_key)
+        joined = task is not None
+        if joined:
+            self._stats["replayed_memory"] += 1
+        else:
+            task = asyncio.create_task(self._claim_and_run(full_key, fingerprint, func, recover))
+            self._inflight[full_key] = task
+            task.add_done_callback(lambda done: self._inflight.pop(full_key, None))
+
+        # Shielded so a client hanging up mid-booking does not abort it
+        response, replayed, stored_fingerprint = await asyncio.shield(task)
+        self._check_fingerprint(stored_fingerprint, fingerprint)
+        return response, replayed or joined
+
+    async def _claim_and_run(self, full_key: str, fingerprint: str, func, recover) -> tuple:
+        now = datetime.now(timezone.utc)
+        try:
+            await db.idempotency_keys.insert_one({
+                "key": full_key,
+                "fingerprint": fingerprint,
+                "status": "processing",
+                "created_at": now
+            })
+        except DuplicateKeyError:
+            # Only a retry of the same request may take over an abandoned claim
+            existing = await db.idempotency_keys.find_one_and_update(
+                {
+                    "key": full_key,
+                    "fingerprint": fingerprint,
+                    "status": "processing",
+                    "created_at": {"$lt": now - timedelta(seconds=self.lock_seconds)}
+                },
+                {"$set": {"created_at": now}}
+            )
+            if existing is None:
+                existing = await db.idempotency_keys.find_one({"key": full_key}, {"_id": 0})
+                if existing:
+                    self._check_fingerprint(existing["fingerprint"], fingerprint)
+                if existing and existing["status"] == "completed":
+                    self._stats["replayed_db"] += 1
+                    self._remember(full_key, existing["fingerprint"], existing["response"])
+                    return existing["response"], True, existing["fingerprint"]
+                self._stats["conflicts"] += 1
+                raise HTTPException(
+                    status_code=409,
+                    detail="A request with this Idempotency-Key is still being processed"
+                )
+
+            # The previous attempt may have booked before its claim was completed
+            response = await recover(full_key) if recover else None
+            if response is not None:
+                self._stats["replayed_db"] += 1
+                await self._complete(full_key, fingerprint, response)
+                return response, True, fingerprint
+
+        try:
+            response = await func()
+        except BaseException:
+            try:
+                recovered = await recover(full_key) if recover else None
+            except Exception as exc:
+                # Unknown outcome: keep the claim so a takeover checks again
+                logger.error(f"Idempotency claim {full_key} kept after a failed recovery: {exc}")
+                raise
+            if recovered is not None:
+                await self._complete(full_key, fingerprint, recovered)
+            else:
+                await db.idempotency_keys.delete_one({"key": full_key, "status": "processing"})
+            raise
+
+        self._stats["executed"] += 1
+        await self._complete(full_key, fingerprint, response)
+        return response, False, fingerprint
+
+    async def _complete(self, full_key: str, fingerprint: str, response: dict):
+        """Store the response on the claim, retrying transient failures"""
+        self._remember(full_key, fingerprint, response)
+        for attempt in range(IDEMPOTENCY_COMPLETE_ATTEMPTS):
+            try:
+                await db.idempotency_keys.update_one(
+                    {"key": full_key},
+                    {"$set": {"status": "completed", "response": response}}
+                )
+                return
+            except PyMongoError as exc:
+                if attempt + 1 == IDEMPOTENCY_COMPLETE_ATTEMPTS:
+                    # The claim stays "processing"; a takeover recovers the response
+                    logger.error(f"Idempotency claim {full_key} not completed: {exc}")
+                    return
+                await asyncio.sleep(0.1 * 2 ** attempt)
+
+    def _remember(self, full_key: str, fingerprint: str, response: dict):
+        self._recent[full_key] = (time.monotonic() + self.ttl, fingerprint, response)
+        self._recent.move_to_end(full_key)
+        while len(self._recent) > self.cache_size:
+            self._recent.popitem(last=False)
+
+    def _check_fingerprint(self, stored: str, fingerprint: str):
+        if stored != fingerprint:
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key was already used for a different request"
+            )
+
+    def stats(self) -> dict:
+        return {**self._stats, "cached_keys": len(self._recent), "inflight": len(self._inflight)}
+
+idempotency = IdempotencyStore(IDEMPOTENCY_KEY_HOURS, IDEMPOTENCY_LOCK_SECONDS, IDEMPOTENCY_CACHE_SIZE)
+
 # =============================================================================
 # RIDE/BOOKING ROUTES
 # =============================================================================
 
 @api_router.post("/rides/calculate")
 async def calculate_ride_price(calculation: RideCalculation, request: Request):
-    """Calculate ride price with hybrid pricing (base + km + time + zones)"""
-    vehicle = VEHICLE_TYPES.get(calculation.vehicle_type)
+    """Calculate ride price with hybrid pricing (base + km + time + zones)
+
+    The returned quote_token books final_price for this vehicle_type;
+    all_prices is informational.
+    """
+    vehicle = tariffs.current.vehicle_types.get(calculation.vehicle_type)
 
     if not vehicle:
         raise HTTPException(status_code=400, detail="Invalid vehicle type")
 
-    # Calculate distance if not provided
+    # Calculate distance (and duration) if not provided
     distance_km = calculation.distance_km
+    duration_minutes = calculation.duration_minutes
     if distance_km is None:
-        distance_km = haversine_distance(
+        distance_km, estimated_duration = estimate_route(
             calculation.pickup.latitude,
             calculation.pickup.longitude,
             calculation.destination.latitude,
             calculation.destination.longitude
-        ) * 1.3  # Road distance approximation
-
-    # Check for fixed zone pricing
-    fixed_zone = await check_fixed_zone_price(
-        calculation.pickup.latitude,
-        calculation.pickup.longitude,
-        calculation.destination.latitude,
-        calculation.destination.longitude,
-        calculation.vehicle_type
-    )
+        )
+        if duration_minutes is None:
+            duration_minutes = estimated_duration
 
     # Get user for potential discounts
     user = await get_optional_user(request)
@@ -937,138 +3448,390 @@ async def calculate_ride_price(calculation: RideCalculation, request: Request):
         except:
             pass
 
-    # Calculate price
-    price_info = calculate_hybrid_price(
+    cache_key = quote_cache_key(
+        calculation.vehicle_type,
+        calculation.pickup.latitude,
+        calculation.pickup.longitude,
+        calculation.destination.latitude,
+        calculation.destination.longitude,
+        calculation.distance_km,
+        calculation.duration_minutes,
+        user_age,
+        scheduled_time
+    )
+    user_id = user.user_id if user else None
+    price_info = quote_cache.get(cache_key)
+    if price_info is not None:
+        return sign_quote(price_info, calculation, user_id)
+
+    # Price the requested vehicle and all categories for comparison
+    price_info = quote_ride(
         vehicle_type=calculation.vehicle_type,
+        pickup_lat=calculation.pickup.latitude,
+        pickup_lon=calculation.pickup.longitude,
+        dest_lat=calculation.destination.latitude,
+        dest_lon=calculation.destination.longitude,
         distance_km=distance_km,
-        duration_minutes=calculation.duration_minutes,
+        duration_minutes=duration_minutes,
         num_passengers=calculation.num_passengers,
         user_age=user_age,
-        scheduled_time=scheduled_time,
-        fixed_zone_price=fixed_zone["fixed_price"] if fixed_zone else None
+        scheduled_time=scheduled_time
     )
+    quote_cache.put(cache_key, price_info)
 
-    # Add zone info if applicable
-    if fixed_zone:
-        price_info["zone_id"] = fixed_zone["zone_id"]
-        price_info["zone_name"] = fixed_zone["zone_name"]
+    return sign_quote(price_info, calculation, user_id)
 
-    # Calculate all vehicle prices for comparison
-    all_prices = {}
-    for vtype in VEHICLE_TYPES.keys():
-        fz = await check_fixed_zone_price(
-            calculation.pickup.latitude,
-            calculation.pickup.longitude,
-            calculation.destination.latitude,
-            calculation.destination.longitude,
-            vtype
-        )
-        vp = calculate_hybrid_price(
-            vehicle_type=vtype,
-            distance_km=distance_km,
-            duration_minutes=calculation.duration_minutes,
-            fixed_zone_price=fz["fixed_price"] if fz else None
+MAX_BATCH_QUOTES = int(os.environ.get("MAX_BATCH_QUOTES", "500"))
+
+@api_router.post("/rides/calculate/batch")
+async def calculate_ride_prices_batch(batch: RideCalculationBatch, request: Request):
+    """Calculate prices for many routes in one request (results in input order)"""
+    if len(batch.quotes) > MAX_BATCH_QUOTES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A batch can contain at most {MAX_BATCH_QUOTES} quotes"
         )
-        all_prices[vtype] = vp["final_price"]
 
-    price_info["all_prices"] = all_prices
+    # Get user for potential discounts
+    user = await get_optional_user(request)
+    user_age = None
+    if user and user.date_of_birth:
+        user_age = calculate_user_age(user.date_of_birth)
 
-    return price_info
+    # Parse scheduled times
+    scheduled_times = []
+    for calculation in batch.quotes:
+        scheduled_time = None
+        if calculation.scheduled_time:
+            try:
+                scheduled_time = datetime.fromisoformat(calculation.scheduled_time.replace('Z', '+00:00'))
+            except:
+                pass
+        scheduled_times.append(scheduled_time)
+
+    results = quote_rides_batch(
+        vehicle_types=[c.vehicle_type for c in batch.quotes],
+        pickup_lat=[c.pickup.latitude for c in batch.quotes],
+        pickup_lon=[c.pickup.longitude for c in batch.quotes],
+        dest_lat=[c.destination.latitude for c in batch.quotes],
+        dest_lon=[c.destination.longitude for c in batch.quotes],
+        distance_km=[c.distance_km for c in batch.quotes],
+        duration_minutes=[c.duration_minutes for c in batch.quotes],
+        scheduled_times=scheduled_times,
+        user_age=user_age
+    )
+
+    return {"results": results, "count": len(results)}
 
 @api_router.post("/rides")
 async def create_ride(
     ride_data: RideCreate,
-    current_user: User = Depends(get_current_user)
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None)
 ):
     """Create a new ride booking"""
-    ride_id = f"ride_{uuid.uuid4().hex[:12]}"
-
-    billing_type = "monthly" if current_user.account_type == "business" else "immediate"
+    scope = f"rides:{current_user.user_id}"
+    claim_key = idempotency.claim_key(scope, idempotency_key)
+
+    async def book():
+        pricing = booking_price(ride_data, current_user.user_id)
+        ride_id = f"ride_{uuid.uuid4().hex[:12]}"
+
+        billing_type = "monthly" if current_user.account_type == "business" else "immediate"
+
+        # Parse scheduled time
+        scheduled_time = None
+        if ride_data.scheduled_time:
+            try:
+                scheduled_time = datetime.fromisoformat(ride_data.scheduled_time.replace('Z', '+00:00'))
+            except:
+                pass
+
+        contact_details = {
+            "name": current_user.name,
+            "email": current_user.email,
+            "phone": current_user.phone
+        }
 
-    # Parse scheduled time
-    scheduled_time = None
-    if ride_data.scheduled_time:
-        try:
-            scheduled_time = datetime.fromisoformat(ride_data.scheduled_time.replace('Z', '+00:00'))
-        except:
-            pass
+        ride_doc = {
+            "ride_id": ride_id,
+            "user_id": current_user.user_id,
+            "pickup": ride_data.pickup.dict(),
+            "destination": ride_data.destination.dict(),
+            "vehicle_type": ride_data.vehicle_type,
+            **pricing,
+            "payment_method": ride_data.payment_method,
+            "status": "pending",
+            "billing_type": billing_type,
+            "notes": ride_data.notes,
+            "scheduled_time": scheduled_time,
+            "created_at": datetime.now(timezone.utc),
+            "contact": {k: v for k, v in contact_details.items() if v}
+        }
+        if claim_key:
+            ride_doc["idempotency_key"] = claim_key
 
-    contact_details = {
-        "name": current_user.name,
-        "email": current_user.email,
-        "phone": current_user.phone
-    }
+        await db.rides.insert_one(ride_doc)
+        await notify_new_ride(ride_doc, contact_details)
 
-    ride_doc = {
-        "ride_id": ride_id,
-        "user_id": current_user.user_id,
-        "pickup": ride_data.pickup.dict(),
-        "destination": ride_data.destination.dict(),
-        "vehicle_type": ride_data.vehicle_type,
-        "distance_km": ride_data.distance_km,
-        "duration_minutes": ride_data.duration_minutes,
-        "price": ride_data.price,
-        "payment_method": ride_data.payment_method,
-        "status": "pending",
-        "billing_type": billing_type,
-        "notes": ride_data.notes,
-        "scheduled_time": scheduled_time,
-        "created_at": datetime.now(timezone.utc),
-        "contact": {k: v for k, v in contact_details.items() if v}
-    }
+        return {
+            "ride_id": ride_id,
+            "status": "pending",
+            "billing_type": billing_type,
+            "message": "Ride booked successfully"
+        }
 
-    await db.rides.insert_one(ride_doc)
-    await notify_new_ride(ride_doc, contact_details)
+    async def recover(key: str) -> Optional[dict]:
+        ride = await db.rides.find_one({"idempotency_key": key}, {"_id": 0, "ride_id": 1, "billing_type": 1})
+        if ride:
+            return {
+                "ride_id": ride["ride_id"],
+                "status": "pending",
+                "billing_type": ride["billing_type"],
+                "message": "Ride booked successfully"
+            }
+        return None
 
-    return {
-        "ride_id": ride_id,
-        "status": "pending",
-        "billing_type": billing_type,
-        "message": "Ride booked successfully"
-    }
+    result, replayed = await idempotency.run(scope, idempotency_key, request_fingerprint(ride_data), book, recover)
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
 
 @api_router.post("/rides/guest")
-async def create_guest_ride(ride_data: GuestRideCreate):
+async def create_guest_ride(
+    ride_data: GuestRideCreate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None)
+):
     """Create a new ride booking for guest users"""
     if not ride_data.contact.email and not ride_data.contact.phone:
         raise HTTPException(status_code=400, detail="Email or phone is required for guest bookings")
+    scope = guest_idempotency_scope(ride_data.contact)
+    claim_key = idempotency.claim_key(scope, idempotency_key)
 
-    ride_id = f"ride_{uuid.uuid4().hex[:12]}"
+    async def book():
+        pricing = booking_price(ride_data, None)
+        ride_id = f"ride_{uuid.uuid4().hex[:12]}"
 
-    scheduled_time = None
-    if ride_data.scheduled_time:
-        try:
-            scheduled_time = datetime.fromisoformat(ride_data.scheduled_time.replace('Z', '+00:00'))
-        except:
-            pass
+        scheduled_time = None
+        if ride_data.scheduled_time:
+            try:
+                scheduled_time = datetime.fromisoformat(ride_data.scheduled_time.replace('Z', '+00:00'))
+            except:
+                pass
 
-    ride_doc = {
-        "ride_id": ride_id,
-        "user_id": f"guest_{uuid.uuid4().hex[:10]}",
-        "pickup": ride_data.pickup.dict(),
-        "destination": ride_data.destination.dict(),
-        "vehicle_type": ride_data.vehicle_type,
-        "distance_km": ride_data.distance_km,
-        "duration_minutes": ride_data.duration_minutes,
-        "price": ride_data.price,
-        "payment_method": ride_data.payment_method,
-        "status": "pending",
-        "billing_type": "immediate",
-        "notes": ride_data.notes,
-        "scheduled_time": scheduled_time,
-        "created_at": datetime.now(timezone.utc),
-        "contact": ride_data.contact.dict()
-    }
+        ride_doc = {
+            "ride_id": ride_id,
+            "user_id": f"guest_{uuid.uuid4().hex[:10]}",
+            "pickup": ride_data.pickup.dict(),
+            "destination": ride_data.destination.dict(),
+            "vehicle_type": ride_data.vehicle_type,
+            **pricing,
+            "payment_method": ride_data.payment_method,
+            "status": "pending",
+            "billing_type": "immediate",
+            "notes": ride_data.notes,
+            "scheduled_time": scheduled_time,
+            "created_at": datetime.now(timezone.utc),
+            "contact": ride_data.contact.dict()
+        }
+        if claim_key:
+            ride_doc["idempotency_key"] = claim_key
+
+        await db.rides.insert_one(ride_doc)
+        await notify_new_ride(ride_doc, ride_data.contact.dict())
+
+        return {
+            "ride_id": ride_id,
+            "status": "pending",
+            "message": "Ride booked successfully"
+        }
+
+    async def recover(key: str) -> Optional[dict]:
+        ride = await db.rides.find_one({"idempotency_key": key}, {"_id": 0, "ride_id": 1})
+        if ride:
+            return {"ride_id": ride["ride_id"], "status": "pending", "message": "Ride booked successfully"}
+        return None
 
-    await db.rides.insert_one(ride_doc)
-    await notify_new_ride(ride_doc, ride_data.contact.dict())
+    result, replayed = await idempotency.run(scope, idempotency_key, request_fingerprint(ride_data), book, recover)
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
 
+MAX_BULK_RIDES = int(os.environ.get("MAX_BULK_RIDES", "100"))
+
+def bulk_booking_response(bulk: BulkRideCreate, bulk_id: str, results: List[dict]) -> dict:
+    """Bulk booking response from one ``{ride_id, price}`` or ``{error}`` entry per ride"""
+    booked = sum(1 for result in results if "error" not in result)
     return {
-        "ride_id": ride_id,
-        "status": "pending",
-        "message": "Ride booked successfully"
+        "bulk_id": bulk_id,
+        "billing_type": "monthly",
+        "booked": booked,
+        "rejected": len(bulk.rides) - booked,
+        "results": [
+            {
+                "index": i,
+                "reference": ride.reference,
+                "status": "rejected" if "error" in results[i] else "pending",
+                **results[i]
+            }
+            for i, ride in enumerate(bulk.rides)
+        ],
+        "message": f"{booked} of {len(bulk.rides)} rides booked"
     }
 
+@api_router.post("/rides/bulk")
+async def create_rides_bulk(
+    bulk: BulkRideCreate,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None)
+):
+    """Book many rides at once for a business account (results in input order)
+
+    Rides with a quote token keep the quoted price; the others are priced
+    together with quote_rides_batch from server-side route estimates, so
+    their distance_km and duration_minutes are ignored. Valid rides are inserted with one
+    insert_many and confirmed with one message per contact; invalid rides
+    are reported in the results and not booked.
+    """
+    if current_user.account_type != "business":
+        raise HTTPException(status_code=403, detail="Bulk booking requires a business account")
+    if not bulk.rides:
+        raise HTTPException(status_code=400, detail="No rides to book")
+    if len(bulk.rides) > MAX_BULK_RIDES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A bulk booking can contain at most {MAX_BULK_RIDES} rides"
+        )
+    scope = f"rides_bulk:{current_user.user_id}"
+    claim_key = idempotency.claim_key(scope, idempotency_key)
+
+    async def book():
+        bulk_id = f"bulk_{uuid.uuid4().hex[:12]}"
+        user_age = None
+        if current_user.date_of_birth:
+            user_age = calculate_user_age(current_user.date_of_birth)
+
+        account_contact = {
+            "name": current_user.name,
+            "email": current_user.email,
+            "phone": current_user.phone
+        }
+
+        results: List[Optional[dict]] = [None] * len(bulk.rides)
+        pricing: List[Optional[dict]] = [None] * len(bulk.rides)
+        scheduled_times = []
+        unquoted = []
+        for i, ride in enumerate(bulk.rides):
+            scheduled_time = None
+            if ride.scheduled_time:
+                try:
+                    scheduled_time = datetime.fromisoformat(ride.scheduled_time.replace('Z', '+00:00'))
+                except:
+                    pass
+            scheduled_times.append(scheduled_time)
+
+            if ride.quote_token:
+                try:
+                    pricing[i] = booking_price(ride, current_user.user_id)
+                except HTTPException as exc:
+                    results[i] = {"error": exc.detail}
+            else:
+                unquoted.append(i)
+
+        if unquoted:
+            tariff_version = tariffs.current.version
+            quotes = quote_rides_batch(
+                vehicle_types=[bulk.rides[i].vehicle_type for i in unquoted],
+                pickup_lat=[bulk.rides[i].pickup.latitude for i in unquoted],
+                pickup_lon=[bulk.rides[i].pickup.longitude for i in unquoted],
+                dest_lat=[bulk.rides[i].destination.latitude for i in unquoted],
+                dest_lon=[bulk.rides[i].destination.longitude for i in unquoted],
+                # Client route metrics are only trusted when a signed quote covers them
+                distance_km=[None] * len(unquoted),
+                duration_minutes=[None] * len(unquoted),
+                scheduled_times=[scheduled_times[i] for i in unquoted],
+                user_age=user_age
+            )
+            for i, quote in zip(unquoted, quotes):
+                if "error" in quote:
+                    results[i] = {"error": quote["error"]}
+                else:
+                    pricing[i] = {
+                        "price": quote["final_price"],
+                        "distance_km": quote["distance_km"],
+                        "duration_minutes": quote["duration_minutes"],
+                        "price_source": "bulk_quote",
+                        "tariff_version": tariff_version
+                    }
+
+        created_at = datetime.now(timezone.utc)
+        ride_docs, positions = [], []
+        for i, ride in enumerate(bulk.rides):
+            if pricing[i] is None:
+                continue
+            contact = ride.contact.dict() if ride.contact else account_contact
+            ride_docs.append({
+                "ride_id": f"ride_{uuid.uuid4().hex[:12]}",
+                "user_id": current_user.user_id,
+                "bulk_id": bulk_id,
+                "bulk_index": i,
+                "pickup": ride.pickup.dict(),
+                "destination": ride.destination.dict(),
+                "vehicle_type": ride.vehicle_type,
+                **pricing[i],
+                "payment_method": ride.payment_method,
+                "status": "pending",
+                "billing_type": "monthly",
+                "notes": ride.notes,
+                "scheduled_time": scheduled_times[i],
+                "created_at": created_at,
+                "contact": {k: v for k, v in contact.items() if v}
+            })
+            if claim_key:
+                ride_docs[-1]["idempotency_key"] = claim_key
+            positions.append(i)
+
+        failed = set()
+        if ride_docs:
+            try:
+                await db.rides.insert_many(ride_docs, ordered=False)
+            except BulkWriteError as exc:
+                failed = {error["index"] for error in exc.details.get("writeErrors", [])}
+                logger.error(f"Bulk booking {bulk_id}: {len(failed)} rides not inserted")
+
+        booked = []
+        for n, (i, ride_doc) in enumerate(zip(positions, ride_docs)):
+            if n in failed:
+                results[i] = {"error": "Ride could not be saved"}
+            else:
+                results[i] = {"ride_id": ride_doc["ride_id"], "price": ride_doc["price"]}
+                booked.append(ride_doc)
+
+        if booked:
+            await notify_bulk_rides(booked)
+
+        return bulk_booking_response(bulk, bulk_id, results)
+
+    async def recover(key: str) -> Optional[dict]:
+        rides = await db.rides.find(
+            {"idempotency_key": key},
+            {"_id": 0, "ride_id": 1, "price": 1, "bulk_id": 1, "bulk_index": 1}
+        ).to_list(None)
+        if not rides:
+            return None
+        results = [{"error": "Ride was not booked"} for _ in bulk.rides]
+        for ride in rides:
+            results[ride["bulk_index"]] = {"ride_id": ride["ride_id"], "price": ride["price"]}
+        return bulk_booking_response(bulk, rides[0]["bulk_id"], results)
+
+    result, replayed = await idempotency.run(scope, idempotency_key, request_fingerprint(bulk), book, recover)
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
+
 @api_router.get("/rides/{ride_id}")
 async def get_ride(
     ride_id: str,
@@ -1092,15 +3855,17 @@ async def get_ride(
 @api_router.get("/rides/user/history")
 async def get_user_rides(
     current_user: User = Depends(get_current_user),
-    limit: int = 50
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    view: str = "summary"
 ):
-    """Get user's ride history"""
-    rides = await db.rides.find(
-        {"user_id": current_user.user_id},
-        {"_id": 0}
-    ).sort("created_at", -1).to_list(limit)
+    """Get user's ride history, newest first"""
+    rides, next_cursor = await paginate(
+        db.rides, {"user_id": current_user.user_id}, "ride_id", limit, cursor,
+        projection=ride_projection(view)
+    )
 
-    return {"rides": rides}
+    return {"rides": rides, "next_cursor": next_cursor}
 
 @api_router.post("/rides/{ride_id}/cancel")
 async def cancel_ride(
@@ -1181,7 +3946,7 @@ Date de réservation: {ride['created_at'].strftime('%d.%m.%Y %H:%M') if isinstan
 Départ: {ride['pickup']['address']}
 Arrivée: {ride['destination']['address']}
 
-Type de véhicule: {VEHICLE_TYPES.get(ride['vehicle_type'], {}).get('name', ride['vehicle_type'])}
+Type de véhicule: {tariffs.current.vehicle_types.get(ride['vehicle_type'], {}).get('name', ride['vehicle_type'])}
 Distance: {ride['distance_km']:.1f} km
 Mode de paiement: {ride['payment_method'].upper()}
 
@@ -1210,38 +3975,144 @@ www.romuo.ch | contact@romuo.ch
         }
     )
 
+# =============================================================================
+# RIDE STATE MACHINE - Atomic driver transitions
+# =============================================================================
+
+class RideTransition:
+    """One driver action: allowed source statuses, target status and side effects"""
+
+    def __init__(
+        self,
+        from_statuses: tuple,
+        to_status: str,
+        timestamp_field: Optional[str] = None,
+        claims_ride: bool = False,
+        not_found: str = "Ride not found",
+        side_effects: tuple = ()
+    ):
+        self.from_statuses = from_statuses
+        self.to_status = to_status
+        self.timestamp_field = timestamp_field
+        self.claims_ride = claims_ride
+        self.not_found = not_found
+        self.side_effects = side_effects
+
+async def count_driver_trip(ride: dict):
+    await db.drivers.update_one(
+        {"user_id": ride["driver_id"]},
+        {"$inc": {"total_trips": 1}}
+    )
+
+RIDE_TRANSITIONS = {
+    "accept": RideTransition(
+        ("pending",), "assigned", "assigned_at",
+        claims_ride=True,
+        not_found="Ride not found or already accepted"
+    ),
+    "en_route": RideTransition(
+        ("assigned",), "driver_en_route",
+        not_found="Ride not found or not assigned"
+    ),
+    "arrived": RideTransition(("driver_en_route",), "arrived"),
+    "start": RideTransition(
+        ("assigned", "driver_en_route", "arrived"), "in_progress", "picked_up_at"
+    ),
+    "complete": RideTransition(
+        ("in_progress", "arrived", "assigned", "driver_en_route"), "completed", "completed_at",
+        side_effects=(count_driver_trip,)
+    )
+}
+
+async def transition_ride(ride_id: str, action: str, driver_id: str) -> dict:
+    """Apply a transition in one conditional find_one_and_update; returns the updated ride.
+
+    The filter carries the expected status (and, after acceptance, the
+    assigned driver), so of several concurrent attempts exactly one
+    matches. Side effects run after the write and never undo it.
+    """
+    transition = RIDE_TRANSITIONS[action]
+    query = {"ride_id": ride_id, "status": {"$in": list(transition.from_statuses)}}
+    changes = {"status": transition.to_status}
+
+    if transition.claims_ride:
+        changes["driver_id"] = driver_id
+    else:
+        query["driver_id"] = driver_id
+    if transition.timestamp_field:
+        changes[transition.timestamp_field] = datetime.now(timezone.utc)
+
+    ride = await db.rides.find_one_and_update(
+        query,
+        {"$set": changes},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    if not ride:
+        raise HTTPException(status_code=404, detail=transition.not_found)
+
+    for side_effect in transition.side_effects:
+        try:
+            await side_effect(ride)
+        except Exception as exc:
+            logger.warning(f"Ride {ride_id} {action} side effect {side_effect.__name__} failed: {exc}")
+
+    return ride
+
 # =============================================================================
 # DRIVER ROUTES
 # =============================================================================
 
 @api_router.post("/user/toggle-role")
 async def toggle_user_role(
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user)
 ):
     """Toggle user role between passenger and driver"""
     new_role = "driver" if current_user.role == "passenger" else "passenger"
 
-    await db.users.update_one(
+    user_doc = await db.users.find_one_and_update(
         {"user_id": current_user.user_id},
-        {"$set": {"role": new_role}}
+        {"$set": {"role": new_role}},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
     )
+    session_cache.invalidate_user(current_user.user_id)
 
-    return {"role": new_role, "message": f"Switched to {new_role} mode"}
+    result = {"role": new_role, "message": f"Switched to {new_role} mode"}
+
+    # The role is part of the access token, so hand out a new one
+    session_token = await get_session_token(request)
+    if user_doc and jwt_sessions.enabled and session_token.count(".") == 2:
+        await jwt_sessions.revoke(session_token)
+        tokens = jwt_sessions.issue(user_doc)
+        set_session_cookies(response, tokens)
+        result.update({
+            "session_token": tokens["access_token"],
+            "refresh_token": tokens["refresh_token"],
+            "expires_in": tokens["expires_in"]
+        })
+
+    return result
 
 @api_router.get("/driver/pending-rides")
 async def get_pending_rides(
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    view: str = "dispatch"
 ):
-    """Get all pending rides for drivers"""
+    """Get pending rides for drivers, newest first"""
     if current_user.role != "driver":
         raise HTTPException(status_code=403, detail="Driver role required")
 
-    rides = await db.rides.find(
-        {"status": "pending"},
-        {"_id": 0}
-    ).sort("created_at", -1).to_list(100)
+    rides, next_cursor = await paginate(
+        db.rides, {"status": "pending"}, "ride_id", limit, cursor,
+        projection=ride_projection(view)
+    )
 
-    return {"rides": rides}
+    return {"rides": rides, "next_cursor": next_cursor}
 
 @api_router.get("/driver/active-ride")
 async def get_driver_active_ride(
@@ -1270,24 +4141,7 @@ async def accept_ride(
     if current_user.role != "driver":
         raise HTTPException(status_code=403, detail="Driver role required")
 
-    ride = await db.rides.find_one(
-        {"ride_id": ride_id, "status": "pending"},
-        {"_id": 0}
-    )
-
-    if not ride:
-        raise HTTPException(status_code=404, detail="Ride not found or already accepted")
-
-    await db.rides.update_one(
-        {"ride_id": ride_id},
-        {
-            "$set": {
-                "status": "assigned",
-                "driver_id": current_user.user_id,
-                "assigned_at": datetime.now(timezone.utc)
-            }
-        }
-    )
+    await transition_ride(ride_id, "accept", current_user.user_id)
 
     return {
         "message": "Ride accepted successfully",
@@ -1304,22 +4158,7 @@ async def driver_en_route(
     if current_user.role != "driver":
         raise HTTPException(status_code=403, detail="Driver role required")
 
-    ride = await db.rides.find_one(
-        {
-            "ride_id": ride_id,
-            "driver_id": current_user.user_id,
-            "status": "assigned"
-        },
-        {"_id": 0}
-    )
-
-    if not ride:
-        raise HTTPException(status_code=404, detail="Ride not found or not assigned")
-
-    await db.rides.update_one(
-        {"ride_id": ride_id},
-        {"$set": {"status": "driver_en_route"}}
-    )
+    await transition_ride(ride_id, "en_route", current_user.user_id)
 
     return {"message": "Status updated", "status": "driver_en_route"}
 
@@ -1332,22 +4171,7 @@ async def driver_arrived(
     if current_user.role != "driver":
         raise HTTPException(status_code=403, detail="Driver role required")
 
-    ride = await db.rides.find_one(
-        {
-            "ride_id": ride_id,
-            "driver_id": current_user.user_id,
-            "status": "driver_en_route"
-        },
-        {"_id": 0}
-    )
-
-    if not ride:
-        raise HTTPException(status_code=404, detail="Ride not found")
-
-    await db.rides.update_one(
-        {"ride_id": ride_id},
-        {"$set": {"status": "arrived"}}
-    )
+    await transition_ride(ride_id, "arrived", current_user.user_id)
 
     return {"message": "Arrived at pickup", "status": "arrived"}
 
@@ -1360,27 +4184,7 @@ async def start_ride(
     if current_user.role != "driver":
         raise HTTPException(status_code=403, detail="Driver role required")
 
-    ride = await db.rides.find_one(
-        {
-            "ride_id": ride_id,
-            "driver_id": current_user.user_id,
-            "status": {"$in": ["assigned", "driver_en_route", "arrived"]}
-        },
-        {"_id": 0}
-    )
-
-    if not ride:
-        raise HTTPException(status_code=404, detail="Ride not found")
-
-    await db.rides.update_one(
-        {"ride_id": ride_id},
-        {
-            "$set": {
-                "status": "in_progress",
-                "picked_up_at": datetime.now(timezone.utc)
-            }
-        }
-    )
+    await transition_ride(ride_id, "start", current_user.user_id)
 
     return {"message": "Ride started", "status": "in_progress"}
 
@@ -1393,33 +4197,7 @@ async def complete_ride(
     if current_user.role != "driver":
         raise HTTPException(status_code=403, detail="Driver role required")
 
-    ride = await db.rides.find_one(
-        {
-            "ride_id": ride_id,
-            "driver_id": current_user.user_id,
-            "status": {"$in": ["in_progress", "arrived", "assigned", "driver_en_route"]}
-        },
-        {"_id": 0}
-    )
-
-    if not ride:
-        raise HTTPException(status_code=404, detail="Ride not found")
-
-    await db.rides.update_one(
-        {"ride_id": ride_id},
-        {
-            "$set": {
-                "status": "completed",
-                "completed_at": datetime.now(timezone.utc)
-            }
-        }
-    )
-
-    # Update driver stats
-    await db.drivers.update_one(
-        {"user_id": current_user.user_id},
-        {"$inc": {"total_trips": 1}}
-    )
+    ride = await transition_ride(ride_id, "complete", current_user.user_id)
 
     return {
         "message": "Ride completed successfully",
@@ -1516,12 +4294,16 @@ async def update_driver_location(
 
 # Fleet Drivers CRUD
 @api_router.get("/admin/drivers")
-async def admin_get_drivers(admin_password: str):
-    """Get all fleet drivers"""
+async def admin_get_drivers(
+    admin_password: str,
+    limit: int = 500,
+    cursor: Optional[str] = None
+):
+    """Get fleet drivers, newest first"""
     verify_admin_access(admin_password)
 
-    drivers = await db.drivers.find({}, {"_id": 0}).to_list(500)
-    return {"drivers": drivers}
+    drivers, next_cursor = await paginate(db.drivers, {}, "driver_id", limit, cursor)
+    return {"drivers": drivers, "next_cursor": next_cursor}
 
 @api_router.post("/admin/drivers")
 async def admin_create_driver(driver: DriverCreate, admin_password: str):
@@ -1551,6 +4333,7 @@ async def admin_create_driver(driver: DriverCreate, admin_password: str):
             {"user_id": user_id},
             {"$set": {"role": "driver"}}
         )
+        session_cache.invalidate_user(user_id)
 
     driver_doc = {
         "driver_id": driver_id,
@@ -1575,14 +4358,16 @@ async def admin_update_driver(driver_id: str, update: DriverUpdate, admin_passwo
     update_data = {k: v for k, v in update.dict().items() if v is not None}
     update_data["updated_at"] = datetime.now(timezone.utc)
 
-    result = await db.drivers.update_one(
+    driver = await db.drivers.find_one_and_update(
         {"driver_id": driver_id},
-        {"$set": update_data}
+        {"$set": update_data},
+        projection={"_id": 0, "user_id": 1}
     )
 
-    if result.modified_count == 0:
+    if not driver:
         raise HTTPException(status_code=404, detail="Driver not found")
 
+    session_cache.invalidate_user(driver["user_id"])
     return {"message": "Driver updated successfully"}
 
 @api_router.delete("/admin/drivers/{driver_id}")
@@ -1590,11 +4375,16 @@ async def admin_delete_driver(driver_id: str, admin_password: str):
     """Delete a fleet driver"""
     verify_admin_access(admin_password)
 
-    result = await db.drivers.delete_one({"driver_id": driver_id})
+    driver = await db.drivers.find_one_and_delete(
+        {"driver_id": driver_id},
+        projection={"_id": 0, "user_id": 1}
+    )
 
-    if result.deleted_count == 0:
+    if not driver:
         raise HTTPException(status_code=404, detail="Driver not found")
 
+    session_cache.invalidate_user(driver["user_id"])
+
     return {"message": "Driver deleted successfully"}
 
 @api_router.post("/admin/drivers/{driver_id}/status")
@@ -1605,24 +4395,31 @@ async def admin_update_driver_status(driver_id: str, status: str, admin_password
     if status not in ["available", "busy", "offline"]:
         raise HTTPException(status_code=400, detail="Invalid status")
 
-    result = await db.drivers.update_one(
+    driver = await db.drivers.find_one_and_update(
         {"driver_id": driver_id},
-        {"$set": {"status": status, "updated_at": datetime.now(timezone.utc)}}
+        {"$set": {"status": status, "updated_at": datetime.now(timezone.utc)}},
+        projection={"_id": 0, "user_id": 1}
     )
 
-    if result.modified_count == 0:
+    if not driver:
         raise HTTPException(status_code=404, detail="Driver not found")
 
+    session_cache.invalidate_user(driver["user_id"])
+
     return {"message": f"Driver status updated to {status}"}
 
 # Fleet Vehicles CRUD
 @api_router.get("/admin/vehicles")
-async def admin_get_vehicles(admin_password: str):
-    """Get all fleet vehicles"""
+async def admin_get_vehicles(
+    admin_password: str,
+    limit: int = 500,
+    cursor: Optional[str] = None
+):
+    """Get fleet vehicles, newest first"""
     verify_admin_access(admin_password)
 
-    vehicles = await db.vehicles.find({}, {"_id": 0}).to_list(500)
-    return {"vehicles": vehicles}
+    vehicles, next_cursor = await paginate(db.vehicles, {}, "vehicle_id", limit, cursor)
+    return {"vehicles": vehicles, "next_cursor": next_cursor}
 
 @api_router.post("/admin/vehicles")
 async def admin_create_vehicle(vehicle: VehicleCreate, admin_password: str):
@@ -1679,12 +4476,16 @@ async def admin_delete_vehicle(vehicle_id: str, admin_password: str):
 
 # Admin Users
 @api_router.get("/admin/users")
-async def get_all_users(admin_password: str):
-    """Get all users"""
+async def get_all_users(
+    admin_password: str,
+    limit: int = 1000,
+    cursor: Optional[str] = None
+):
+    """Get users, newest first"""
     verify_admin_access(admin_password)
 
-    users = await db.users.find({}, {"_id": 0}).to_list(1000)
-    return {"users": users}
+    users, next_cursor = await paginate(db.users, {}, "user_id", limit, cursor)
+    return {"users": users, "next_cursor": next_cursor}
 
 # Admin Rides - Dispatch
 @api_router.get("/admin/rides")
@@ -1693,9 +4494,10 @@ async def get_all_rides(
     status: Optional[str] = None,
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
-    limit: int = 100
+    limit: int = 100,
+    cursor: Optional[str] = None
 ):
-    """Get all rides with optional filters"""
+    """Get rides with optional filters, newest first"""
     verify_admin_access(admin_password)
 
     query = {}
@@ -1719,29 +4521,34 @@ async def get_all_rides(
         except:
             pass
 
-    rides = await db.rides.find(query, {"_id": 0}).sort("created_at", -1).to_list(limit)
-    return {"rides": rides}
+    rides, next_cursor = await paginate(db.rides, query, "ride_id", limit, cursor)
+    return {"rides": rides, "next_cursor": next_cursor}
 
 @api_router.get("/admin/rides/pending")
-async def get_pending_rides_admin(admin_password: str):
-    """Get all pending rides for dispatch"""
+async def get_pending_rides_admin(
+    admin_password: str,
+    limit: int = 100,
+    cursor: Optional[str] = None
+):
+    """Get pending rides for dispatch, oldest first"""
     verify_admin_access(admin_password)
 
-    rides = await db.rides.find(
-        {"status": "pending"},
-        {"_id": 0}
-    ).sort("created_at", 1).to_list(100)
+    rides, next_cursor = await paginate(
+        db.rides, {"status": "pending"}, "ride_id", limit, cursor, direction=1
+    )
 
-    return {"rides": rides}
+    return {"rides": rides, "next_cursor": next_cursor}
 
 @api_router.get("/admin/rides/calendar")
 async def get_rides_calendar(
     admin_password: str,
     start: str,
-    end: str
+    end: str,
+    view: str = "dispatch"
 ):
     """Get rides for calendar view"""
     verify_admin_access(admin_password)
+    projection = ride_projection(view)
 
     try:
         start_date = datetime.fromisoformat(start.replace('Z', '+00:00'))
@@ -1756,7 +4563,7 @@ async def get_rides_calendar(
                 {"created_at": {"$gte": start_date, "$lte": end_date}}
             ]
         },
-        {"_id": 0}
+        projection
     ).to_list(500)
 
     # Format for calendar
@@ -1817,20 +4624,21 @@ async def admin_assign_driver(
     }
 
 @api_router.get("/admin/dispatch")
-async def get_dispatch_data(admin_password: str):
+async def get_dispatch_data(admin_password: str, view: str = "dispatch"):
     """Get all data needed for dispatch view"""
     verify_admin_access(admin_password)
+    projection = ride_projection(view)
 
     # Get pending rides
     pending_rides = await db.rides.find(
         {"status": "pending"},
-        {"_id": 0}
+        projection
     ).sort("created_at", 1).to_list(100)
 
     # Get active rides
     active_rides = await db.rides.find(
         {"status": {"$in": ["assigned", "driver_en_route", "arrived", "in_progress"]}},
-        {"_id": 0}
+        projection
     ).sort("created_at", -1).to_list(100)
 
     # Get all drivers with status
@@ -1914,6 +4722,59 @@ async def get_admin_stats(admin_password: str):
         }
     }
 
+@api_router.get("/admin/quote-cache")
+async def get_quote_cache_stats(admin_password: str):
+    """Get quote cache size and hit-rate counters for this worker"""
+    verify_admin_access(admin_password)
+    return {**quote_cache.stats(), "zone_version": zone_index.version, "worker_pid": os.getpid()}
+
+@api_router.get("/admin/notifications/outbox")
+async def get_notification_outbox_stats(admin_password: str):
+    """Get notification outbox job counts by status"""
+    verify_admin_access(admin_password)
+    return {
+        **await notification_outbox.stats(),
+        "audit_writer": notification_audit.stats(),
+        "sms_dispatcher": sms_dispatcher.stats()
+    }
+
+@api_router.get("/admin/session-cache")
+async def get_session_cache_stats(admin_password: str):
+    """Get session cache size and hit-rate counters for this worker"""
+    verify_admin_access(admin_password)
+    return {**session_cache.stats(), "worker_pid": os.getpid()}
+
+@api_router.get("/admin/idempotency")
+async def get_idempotency_stats(admin_password: str):
+    """Get Idempotency-Key replay counters for this worker"""
+    verify_admin_access(admin_password)
+    return {**idempotency.stats(), "worker_pid": os.getpid()}
+
+@api_router.get("/admin/tariffs")
+async def admin_get_tariff(admin_password: str):
+    """Get the tariff this worker is quoting with"""
+    verify_admin_access(admin_password)
+    return {**tariffs.current.to_dict(), "worker_pid": os.getpid()}
+
+@api_router.put("/admin/tariffs")
+async def admin_update_tariff(update: TariffUpdate, admin_password: str):
+    """Publish a new tariff version (fields not given are kept)"""
+    verify_admin_access(admin_password)
+
+    tariff = tariffs.current.to_dict()
+    for vehicle_type, rates in (update.vehicle_types or {}).items():
+        tariff["vehicle_types"].setdefault(vehicle_type, {"id": vehicle_type}).update(rates)
+    tariff["discount_rates"].update(update.discount_rates or {})
+    if update.peak_hours is not None:
+        tariff["peak_hours"] = update.peak_hours
+
+    try:
+        version = await tariffs.publish(tariff["vehicle_types"], tariff["peak_hours"], tariff["discount_rates"])
+    except (KeyError, ValueError, TypeError) as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid tariff: {exc}")
+
+    return {"message": "Tariff updated successfully", "version": version}
+
 # =============================================================================
 # TRACKING - Real-time position
 # =============================================================================
@@ -2011,6 +4872,54 @@ async def startup_event():
             await db.zones.insert_one(zone)
         logger.info("Initialized default fixed price zones")
 
+    try:
+        await db.users.create_index("email", unique=True)
+    except OperationFailure as exc:
+        logger.warning(f"Unique email index not created, duplicate accounts exist: {exc}")
+    await db.user_sessions.create_index("session_token")
+    await db.rides.create_index("ride_id")
+    await db.rides.create_index("bulk_id", sparse=True)
+    await db.rides.create_index("idempotency_key", sparse=True)
+
+    # Compound indexes matching the keyset pagination order (created_at, id)
+    await db.rides.create_index([("created_at", -1), ("ride_id", -1)])
+    await db.rides.create_index([("user_id", 1), ("created_at", -1), ("ride_id", -1)])
+    await db.rides.create_index([("status", 1), ("created_at", -1), ("ride_id", -1)])
+    await db.drivers.create_index([("created_at", -1), ("driver_id", -1)])
+    await db.vehicles.create_index([("created_at", -1), ("vehicle_id", -1)])
+    await db.users.create_index([("created_at", -1), ("user_id", -1)])
+    await idempotency.setup()
+
+    await zone_index.reload()
+    await tariffs.seed()
+    await tariffs.reload()
+    await quote_signer.load_key()
+    if jwt_sessions.enabled:
+        await jwt_sessions.setup()
+
+    # Open the pooled clients up front so the first login does not pay for it
+    http_pool.client(AUTH_SESSION_DATA_URL)
+    http_pool.client(TWILIO_API_URL)
+
+    await db.notifications.create_index(
+        "created_at",
+        expireAfterSeconds=NOTIFICATION_RETENTION_DAYS * 24 * 60 * 60
+    )
+    notification_audit.start()
+    await notification_outbox.setup()
+    notification_outbox.start()
+    admin_digest.start()
+    app.state.snapshot_task = asyncio.create_task(snapshot_refresher())
+    logger.info(f"Zone index loaded: {zone_index.status()}")
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    # Every background task must be finished with the database before the client closes
+    app.state.snapshot_task.cancel()
+    await asyncio.gather(app.state.snapshot_task, return_exceptions=True)
+    await admin_digest.stop()
+    await notification_outbox.stop()
+    await notification_audit.stop()
+    await http_pool.aclose()
+    await asyncio.to_thread(smtp_pool.close)
     client.close()
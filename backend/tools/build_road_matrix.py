@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Build the offline road distance/duration matrix used by the pricing engine
+
+Input is a road-graph extract as a CSV edge list (for example exported from
+an OpenStreetMap extract of Switzerland) with the columns:
+
+    from_lat,from_lon,to_lat,to_lon,distance_km,duration_min[,oneway]
+
+Switzerland is cut into a uniform lat/lon grid. Each cell is anchored on
+the graph node closest to its centre, and a Dijkstra search (fastest
+route) from every anchored cell fills one row of the matrix. The output
+directory contains:
+
+    meta.json         grid definition read by the API server
+    distance_km.npy   float32 [cells x cells], NaN when unreachable
+    duration_min.npy  float32 [cells x cells], NaN when unreachable
+
+Point ROAD_MATRIX_PATH at that directory; the server memory-maps the .npy
+files read-only so all uvicorn workers share the same pages.
+
+Usage (from backend/):
+    python tools/build_road_matrix.py edges.csv data/road_matrix --cell-deg 0.05
+"""
+
+import argparse
+import csv
+import heapq
+import json
+import math
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+SWISS_BBOX = (45.8, 5.9, 47.85, 10.5)  # lat_min, lon_min, lat_max, lon_max
+
+
+def load_graph(edges_path: Path):
+    """Read the edge list into an adjacency list keyed by node id"""
+    node_ids = {}
+    coords = []
+    adjacency = []
+
+    def node(lat, lon):
+        key = (round(lat, 6), round(lon, 6))
+        if key not in node_ids:
+            node_ids[key] = len(coords)
+            coords.append(key)
+            adjacency.append([])
+        return node_ids[key]
+
+    with open(edges_path, newline="") as handle:
+        for row in csv.DictReader(handle):
+            a = node(float(row["from_lat"]), float(row["from_lon"]))
+            b = node(float(row["to_lat"]), float(row["to_lon"]))
+            distance = float(row["distance_km"])
+            duration = float(row["duration_min"])
+            adjacency[a].append((b, duration, distance))
+            if row.get("oneway", "").lower() not in ("1", "true", "yes"):
+                adjacency[b].append((a, duration, distance))
+
+    return np.array(coords, dtype=float), adjacency
+
+
+def anchor_nodes(coords, bbox, cell_deg):
+    """Graph node closest to each grid cell centre (-1 for empty cells)"""
+    lat_min, lon_min, lat_max, lon_max = bbox
+    rows = math.ceil((lat_max - lat_min) / cell_deg)
+    cols = math.ceil((lon_max - lon_min) / cell_deg)
+    anchors = np.full(rows * cols, -1, dtype=np.int64)
+    best = np.full(rows * cols, np.inf)
+
+    r = np.floor((coords[:, 0] - lat_min) / cell_deg).astype(int)
+    c = np.floor((coords[:, 1] - lon_min) / cell_deg).astype(int)
+    inside = (r >= 0) & (r < rows) & (c >= 0) & (c < cols)
+
+    centre_lat = lat_min + (r + 0.5) * cell_deg
+    centre_lon = lon_min + (c + 0.5) * cell_deg
+    offset = (coords[:, 0] - centre_lat) ** 2 + (coords[:, 1] - centre_lon) ** 2
+
+    for node in np.flatnonzero(inside):
+        cell = r[node] * cols + c[node]
+        if offset[node] < best[cell]:
+            best[cell] = offset[node]
+            anchors[cell] = node
+
+    return rows, cols, anchors
+
+
+def fastest_routes(adjacency, source):
+    """Single-source Dijkstra on duration, tracking the distance driven"""
+    duration = {source: 0.0}
+    distance = {source: 0.0}
+    queue = [(0.0, source)]
+    while queue:
+        current, node = heapq.heappop(queue)
+        if current > duration[node]:
+            continue
+        for neighbour, edge_duration, edge_distance in adjacency[node]:
+            candidate = current + edge_duration
+            if candidate < duration.get(neighbour, math.inf):
+                duration[neighbour] = candidate
+                distance[neighbour] = distance[node] + edge_distance
+                heapq.heappush(queue, (candidate, neighbour))
+    return duration, distance
+
+
+def build(edges_path: Path, output_dir: Path, cell_deg: float, bbox=SWISS_BBOX):
+    coords, adjacency = load_graph(edges_path)
+    rows, cols, anchors = anchor_nodes(coords, bbox, cell_deg)
+    cells = rows * cols
+    anchored = np.flatnonzero(anchors >= 0)
+    print(f"{len(coords)} nodes, {cells} cells, {len(anchored)} with road access")
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    distance_km = np.lib.format.open_memmap(
+        output_dir / "distance_km.npy", mode="w+", dtype=np.float32, shape=(cells, cells)
+    )
+    duration_min = np.lib.format.open_memmap(
+        output_dir / "duration_min.npy", mode="w+", dtype=np.float32, shape=(cells, cells)
+    )
+    distance_km[:] = np.nan
+    duration_min[:] = np.nan
+
+    for n, cell in enumerate(anchored, 1):
+        duration, distance = fastest_routes(adjacency, anchors[cell])
+        for target in anchored:
+            node = anchors[target]
+            if node in duration:
+                distance_km[cell, target] = distance[node]
+                duration_min[cell, target] = duration[node]
+        if n % 100 == 0:
+            print(f"  {n}/{len(anchored)} cells routed")
+
+    distance_km.flush()
+    duration_min.flush()
+
+    meta = {
+        "lat_min": bbox[0],
+        "lon_min": bbox[1],
+        "cell_deg": cell_deg,
+        "rows": rows,
+        "cols": cols,
+        "source": edges_path.name,
+        "built_at": datetime.now(timezone.utc).isoformat()
+    }
+    (output_dir / "meta.json").write_text(json.dumps(meta, indent=2))
+    print(f"Road matrix written to {output_dir}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("edges", type=Path, help="CSV edge list of the road graph")
+    parser.add_argument("output", type=Path, help="Output directory (ROAD_MATRIX_PATH)")
+    parser.add_argument("--cell-deg", type=float, default=0.05, help="Grid cell size in degrees")
+    args = parser.parse_args()
+    build(args.edges, args.output, args.cell_deg)
+
+
+if __name__ == "__main__":
+    main()
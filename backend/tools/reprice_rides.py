@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Historical re-pricing simulator for tariff changes
+
+Streams the rides collection into columnar arrays and prices every ride
+twice with the vectorized pricing core (server.price_arrays): once under
+the live tariff and once under a candidate tariff. Reports revenue deltas
+per vehicle category and per fixed-price zone.
+
+The candidate tariff is a JSON file; every key is optional and overrides
+the live tariff snapshot (vehicle rates, discounts, peak hours) and zone
+prices:
+
+    {
+        "vehicle_types": {"eco": {"rate_per_km": 2.8, "base_fare": 7.0}},
+        "discount_rates": {"off_peak": 0.05},
+        "peak_hours": {"morning": [7, 10], "evening": [16, 19]},
+        "zone_prices": {"gva_lausanne": {"eco": 99, "berline": 135}}
+    }
+
+Rides do not record the customer's age or whether the ride was shared,
+so the youth and ride-sharing discounts are not simulated. Off-peak
+discounts follow each ride's scheduled_time in local time: live quotes use
+the hour of the client's local timestamp, while MongoDB stores it in UTC,
+so stored times are converted to --timezone (Europe/Zurich by default)
+before taking the hour.
+
+Usage (from backend/):
+    python tools/reprice_rides.py candidate.json [--status completed] [--timezone Europe/Zurich] [--json]
+    python tools/reprice_rides.py candidate.json --synthetic 2000000
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import server  # noqa: E402
+
+CHUNK_SIZE = 50_000
+NO_ZONE = "hybrid"
+CELL_OFFSET = 1 << 31
+LOCAL_TIMEZONE = "Europe/Zurich"
+
+
+# =============================================================================
+# LOADING
+# =============================================================================
+
+async def load_rides(status: str) -> pd.DataFrame:
+    """Stream rides from MongoDB into a DataFrame, CHUNK_SIZE documents at a time"""
+    query = {"status": status} if status != "all" else {}
+    projection = {
+        "_id": 0, "vehicle_type": 1, "distance_km": 1, "duration_minutes": 1,
+        "price": 1, "scheduled_time": 1, "pickup": 1, "destination": 1
+    }
+
+    chunks = []
+    columns = {name: [] for name in (
+        "vehicle_type", "distance_km", "duration_minutes", "price", "scheduled_time",
+        "pickup_lat", "pickup_lon", "dest_lat", "dest_lon"
+    )}
+
+    async for ride in server.db.rides.find(query, projection).batch_size(CHUNK_SIZE):
+        columns["vehicle_type"].append(ride.get("vehicle_type"))
+        columns["distance_km"].append(ride.get("distance_km"))
+        columns["duration_minutes"].append(ride.get("duration_minutes"))
+        columns["price"].append(ride.get("price"))
+        columns["scheduled_time"].append(ride.get("scheduled_time"))
+        columns["pickup_lat"].append(ride["pickup"]["latitude"])
+        columns["pickup_lon"].append(ride["pickup"]["longitude"])
+        columns["dest_lat"].append(ride["destination"]["latitude"])
+        columns["dest_lon"].append(ride["destination"]["longitude"])
+
+        if len(columns["price"]) >= CHUNK_SIZE:
+            chunks.append(pd.DataFrame(columns))
+            columns = {name: [] for name in columns}
+
+    chunks.append(pd.DataFrame(columns))
+    return pd.concat(chunks, ignore_index=True)
+
+
+def synthetic_rides(count: int, seed: int = 42) -> pd.DataFrame:
+    """Random rides around the default zones, for timing the simulator"""
+    rng = np.random.default_rng(seed)
+    zones = server.DEFAULT_FIXED_ZONES
+    zone = rng.integers(0, len(zones), count)
+    in_zone = rng.random(count) < 0.3
+    jitter = lambda: rng.normal(0, 0.01, count)  # noqa: E731
+
+    origin = np.array([[z["origin"]["lat"], z["origin"]["lon"]] for z in zones])[zone]
+    destination = np.array([[z["destination"]["lat"], z["destination"]["lon"]] for z in zones])[zone]
+    pickup_lat = np.where(in_zone, origin[:, 0] + jitter(), rng.uniform(46.1, 47.6, count))
+    pickup_lon = np.where(in_zone, origin[:, 1] + jitter(), rng.uniform(6.0, 8.7, count))
+    dest_lat = np.where(in_zone, destination[:, 0] + jitter(), rng.uniform(46.1, 47.6, count))
+    dest_lon = np.where(in_zone, destination[:, 1] + jitter(), rng.uniform(6.0, 8.7, count))
+
+    scheduled = pd.Timestamp("2026-01-01", tz="UTC") + pd.to_timedelta(rng.integers(0, 24 * 365, count), unit="h")
+    return pd.DataFrame({
+        "vehicle_type": rng.choice(list(server.tariffs.current.categories), count),
+        "distance_km": rng.gamma(2.0, 12.0, count),
+        "duration_minutes": np.where(rng.random(count) < 0.5, np.nan, rng.gamma(2.0, 15.0, count)),
+        "price": rng.gamma(2.0, 40.0, count),
+        "scheduled_time": pd.Series(scheduled).where(rng.random(count) < 0.7),
+        "pickup_lat": pickup_lat,
+        "pickup_lon": pickup_lon,
+        "dest_lat": dest_lat,
+        "dest_lon": dest_lon
+    })
+
+
+# =============================================================================
+# TARIFFS
+# =============================================================================
+
+def live_tariff() -> dict:
+    tariff = server.tariffs.current.to_dict()
+    return {
+        "vehicle_types": tariff["vehicle_types"],
+        "discount_rates": tariff["discount_rates"],
+        "peak_hours": tariff["peak_hours"],
+        "zone_prices": {
+            zone.get("zone_id"): dict(zone.get("prices", {}))
+            for zone in server.zone_index.zones
+        }
+    }
+
+
+def candidate_tariff(overrides: dict) -> dict:
+    tariff = live_tariff()
+    for vehicle_type, rates in overrides.get("vehicle_types", {}).items():
+        tariff["vehicle_types"][vehicle_type].update(rates)
+    tariff["discount_rates"].update(overrides.get("discount_rates", {}))
+    if "peak_hours" in overrides:
+        tariff["peak_hours"] = {k: tuple(v) for k, v in overrides["peak_hours"].items()}
+    for zone_id, prices in overrides.get("zone_prices", {}).items():
+        tariff["zone_prices"].setdefault(zone_id, {}).update(prices)
+    return tariff
+
+
+# =============================================================================
+# VECTORIZED ZONE RESOLUTION
+# =============================================================================
+
+def _cell_keys(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Grid cells of ZoneIndex packed into one int64 per point"""
+    lat_cell = np.floor(lat / server.ZONE_GRID_CELL_DEG).astype(np.int64)
+    lon_cell = np.floor(lon / server.ZONE_GRID_CELL_DEG).astype(np.int64)
+    return (lat_cell << 32) + (lon_cell + CELL_OFFSET)
+
+
+def _unpack_cell(key: int) -> tuple:
+    return (key >> 32, (key & 0xFFFFFFFF) - CELL_OFFSET)
+
+
+def zone_candidate_pairs(rides: pd.DataFrame):
+    """(ride, zone) pairs whose grid cells cover the route, plus their direction masks.
+
+    Only rides whose pickup and destination both fall in zone-covered cells
+    are considered; candidates are looked up once per distinct cell pair and
+    every pair is then tested with one pairwise kernel call.
+    """
+    index = server.zone_index
+    pickup_keys = _cell_keys(rides["pickup_lat"].to_numpy(dtype=float), rides["pickup_lon"].to_numpy(dtype=float))
+    dest_keys = _cell_keys(rides["dest_lat"].to_numpy(dtype=float), rides["dest_lon"].to_numpy(dtype=float))
+
+    covered = np.array([(i << 32) + (j + CELL_OFFSET) for i, j in set(index.origin_grid) | set(index.dest_grid)],
+                       dtype=np.int64)
+    relevant = np.flatnonzero(np.isin(pickup_keys, covered) & np.isin(dest_keys, covered))
+
+    combo_codes, combos = pd.MultiIndex.from_arrays([pickup_keys[relevant], dest_keys[relevant]]).factorize()
+
+    empty = set()
+    combo_zones = []
+    for pickup_key, dest_key in combos:
+        pickup_cell, dest_cell = _unpack_cell(int(pickup_key)), _unpack_cell(int(dest_key))
+        forward = index.origin_grid.get(pickup_cell, empty) & index.dest_grid.get(dest_cell, empty)
+        reverse = index.dest_grid.get(pickup_cell, empty) & index.origin_grid.get(dest_cell, empty)
+        combo_zones.append(sorted(forward | reverse))
+
+    # Expand each ride into one row per candidate zone of its cell pair
+    combo_lengths = np.array([len(z) for z in combo_zones], dtype=np.intp)
+    combo_starts = np.cumsum(combo_lengths) - combo_lengths
+    combo_flat = np.array([z for zones in combo_zones for z in zones], dtype=np.intp)
+
+    lengths = combo_lengths[combo_codes]
+    route_ids = np.repeat(relevant, lengths)
+    within = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    zone_ids = combo_flat[np.repeat(combo_starts[combo_codes], lengths) + within]
+
+    forward, reverse = index.match_masks(
+        rides["pickup_lat"].to_numpy(dtype=float)[route_ids],
+        rides["pickup_lon"].to_numpy(dtype=float)[route_ids],
+        rides["dest_lat"].to_numpy(dtype=float)[route_ids],
+        rides["dest_lon"].to_numpy(dtype=float)[route_ids],
+        zone_ids,
+        pairwise=True
+    )
+    return route_ids, zone_ids, forward, reverse
+
+
+def resolve_fixed_prices(rides, vehicle_codes, vehicle_order, pairs, zone_prices):
+    """First matching zone with a price for each ride's vehicle (select_fixed_zone order)"""
+    route_ids, zone_ids, forward, reverse = pairs
+    zones = server.zone_index.zones
+    price_matrix = np.array([
+        [zone_prices.get(zone.get("zone_id"), {}).get(v, np.nan) for v in vehicle_order]
+        for zone in zones
+    ], dtype=float).reshape(len(zones), len(vehicle_order))
+
+    fixed = np.full(len(rides), np.nan)
+    zone_of_ride = np.full(len(rides), -1, dtype=np.intp)
+    if not len(route_ids):
+        return fixed, zone_of_ride
+
+    pair_prices = price_matrix[zone_ids, vehicle_codes[route_ids]]
+    priced = ~np.isnan(pair_prices)
+
+    # Forward beats reverse within a zone, and zones keep their index order
+    order = np.concatenate([np.flatnonzero(forward & priced) * 2,
+                            np.flatnonzero(reverse & priced) * 2 + 1])
+    order.sort()
+    pair = order // 2
+    first_rides, first = np.unique(route_ids[pair], return_index=True)
+    fixed[first_rides] = pair_prices[pair[first]]
+    zone_of_ride[first_rides] = zone_ids[pair[first]]
+    return fixed, zone_of_ride
+
+
+# =============================================================================
+# SIMULATION
+# =============================================================================
+
+def price_rides(rides, vehicle_codes, vehicle_order, hours, pairs, tariff):
+    vehicles = [tariff["vehicle_types"][v] for v in vehicle_order]
+    fixed, zone_of_ride = resolve_fixed_prices(rides, vehicle_codes, vehicle_order, pairs, tariff["zone_prices"])
+    prices = server.price_arrays(
+        base_fare=np.array([v["base_fare"] for v in vehicles])[vehicle_codes],
+        rate_per_km=np.array([v["rate_per_km"] for v in vehicles])[vehicle_codes],
+        rate_per_minute=np.array([v["rate_per_minute"] for v in vehicles])[vehicle_codes],
+        distance_km=rides["distance_km"].to_numpy(dtype=float),
+        duration_minutes=rides["duration_minutes"].to_numpy(dtype=float),
+        fixed_zone_price=fixed,
+        youth=np.zeros(len(rides), dtype=bool),
+        hour=hours,
+        discount_rates=tariff["discount_rates"],
+        peak_hours=tariff["peak_hours"]
+    )
+    return np.round(prices["final_price"], 2), zone_of_ride
+
+
+def summarize(frame: pd.DataFrame, key: str) -> pd.DataFrame:
+    summary = frame.groupby(key).agg(
+        rides=("actual", "size"),
+        actual=("actual", "sum"),
+        baseline=("baseline", "sum"),
+        candidate=("candidate", "sum")
+    )
+    summary["delta"] = summary["candidate"] - summary["baseline"]
+    summary["delta_percent"] = (summary["delta"] / summary["baseline"] * 100).round(2)
+    return summary.round(2)
+
+
+def local_hours(scheduled_time: pd.Series, timezone: str = LOCAL_TIMEZONE) -> np.ndarray:
+    """Local hour of each stored (UTC) scheduled_time, -1 when unset"""
+    scheduled = pd.to_datetime(scheduled_time, utc=True).dt.tz_convert(timezone)
+    return scheduled.dt.hour.fillna(-1).to_numpy(dtype=int)
+
+
+def simulate(rides: pd.DataFrame, overrides: dict, timezone: str = LOCAL_TIMEZONE) -> dict:
+    known = rides["vehicle_type"].isin(list(server.tariffs.current.categories)) & rides["distance_km"].notna()
+    skipped = int((~known).sum())
+    rides = rides[known].reset_index(drop=True)
+
+    vehicle_order = list(server.tariffs.current.categories)
+    vehicle_codes = pd.Categorical(rides["vehicle_type"], categories=vehicle_order).codes.astype(np.intp)
+    hours = local_hours(rides["scheduled_time"], timezone)
+
+    pairs = zone_candidate_pairs(rides)
+    baseline, zone_of_ride = price_rides(rides, vehicle_codes, vehicle_order, hours, pairs, live_tariff())
+    candidate, _ = price_rides(rides, vehicle_codes, vehicle_order, hours, pairs, candidate_tariff(overrides))
+
+    zone_ids = np.array([zone.get("zone_id") for zone in server.zone_index.zones] + [NO_ZONE], dtype=object)
+    frame = pd.DataFrame({
+        "vehicle_type": rides["vehicle_type"],
+        "zone_id": zone_ids[zone_of_ride],
+        "actual": rides["price"].to_numpy(dtype=float),
+        "baseline": baseline,
+        "candidate": candidate
+    })
+
+    totals = frame[["actual", "baseline", "candidate"]].sum()
+    return {
+        "rides": len(frame),
+        "skipped": skipped,
+        "totals": {
+            "actual": round(float(totals["actual"]), 2),
+            "baseline": round(float(totals["baseline"]), 2),
+            "candidate": round(float(totals["candidate"]), 2),
+            "delta": round(float(totals["candidate"] - totals["baseline"]), 2)
+        },
+        "by_vehicle_type": summarize(frame, "vehicle_type"),
+        "by_zone": summarize(frame, "zone_id")
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Re-price ride history under a candidate tariff")
+    parser.add_argument("tariff", type=Path, help="Candidate tariff JSON file")
+    parser.add_argument("--status", default="completed", help="Ride status to include, or 'all'")
+    parser.add_argument("--timezone", default=LOCAL_TIMEZONE, help="Time zone of the peak-hour table")
+    parser.add_argument("--synthetic", type=int, help="Use N synthetic rides instead of MongoDB")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    overrides = json.loads(args.tariff.read_text())
+
+    start = time.perf_counter()
+    if args.synthetic:
+        rides = synthetic_rides(args.synthetic)
+    else:
+        await server.zone_index.reload()
+        await server.tariffs.reload()
+        rides = await load_rides(args.status)
+    loaded = time.perf_counter()
+
+    report = simulate(rides, overrides, args.timezone)
+    done = time.perf_counter()
+
+    if args.json:
+        report["by_vehicle_type"] = report["by_vehicle_type"].reset_index().to_dict("records")
+        report["by_zone"] = report["by_zone"].reset_index().to_dict("records")
+        print(json.dumps(report, indent=2, default=float))
+        return
+
+    print(f"Rides: {report['rides']} (skipped {report['skipped']})")
+    print(f"Loaded in {loaded - start:.2f}s, simulated in {done - loaded:.2f}s\n")
+    print(f"Totals (CHF): {report['totals']}\n")
+    print("By vehicle type:")
+    print(report["by_vehicle_type"].to_string(), "\n")
+    print("By zone:")
+    print(report["by_zone"].to_string())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -61,6 +61,7 @@ function App() {
   const [selectedVehicle, setSelectedVehicle] = useState('berline');
   const [distanceKm, setDistanceKm] = useState(null);
   const [prices, setPrices] = useState({});
+  const [quote, setQuote] = useState(null); // signed price for selectedVehicle
   const [paymentMethod, setPaymentMethod] = useState('cash');
   const [pricingLoading, setPricingLoading] = useState(false);
   const [pricingError, setPricingError] = useState(null);
@@ -91,6 +92,7 @@ function App() {
     } else {
       setDistanceKm(null);
       setPrices({});
+      setQuote(null);
     }
   }, [pickupLocation, destinationLocation]);
 
@@ -105,6 +107,7 @@ function App() {
     const loadPricing = async () => {
       setPricingLoading(true);
       setPricingError(null);
+      setQuote(null);
       try {
         const response = await rideApi.calculate({
           pickup: {
@@ -129,6 +132,12 @@ function App() {
           ...allPrices,
           [selectedVehicle]: finalPrice,
         });
+        // Only the requested vehicle's final_price is bookable with the token
+        setQuote({
+          vehicleType: selectedVehicle,
+          price: finalPrice,
+          token: response.data.quote_token,
+        });
       } catch (error) {
         console.error('Failed to load pricing:', error);
         if (isActive) {
@@ -238,6 +247,11 @@ function App() {
       return;
     }
 
+    if (!quote || quote.vehicleType !== selectedVehicle) {
+      setBookingError('Le tarif est en cours de calcul, veuillez patienter.');
+      return;
+    }
+
     setBookingLoading(true);
     setBookingError(null);
 
@@ -255,7 +269,8 @@ function App() {
         },
         vehicle_type: selectedVehicle,
         distance_km: distanceKm,
-        price: prices[selectedVehicle] || 0,
+        price: quote.price,
+        quote_token: quote.token,
         payment_method: paymentMethod,
         contact: {
           name: guestName,
@@ -271,7 +286,11 @@ function App() {
       setCurrentView(VIEWS.TRACKING);
     } catch (error) {
       console.error('Failed to create booking:', error);
-      setBookingError('Impossible de confirmer la réservation pour le moment.');
+      if (error.response?.status === 400) {
+        setBookingError('Le tarif a expiré ou changé, veuillez recalculer votre trajet.');
+      } else {
+        setBookingError('Impossible de confirmer la réservation pour le moment.');
+      }
     } finally {
       setBookingLoading(false);
     }
@@ -283,7 +302,7 @@ function App() {
     destinationText,
     selectedVehicle,
     paymentMethod,
-    prices,
+    quote,
     guestName,
     guestEmail,
     guestPhone,
@@ -682,7 +701,7 @@ function App() {
           <button
             type="button"
             onClick={handleConfirmBooking}
-            disabled={bookingLoading}
+            disabled={bookingLoading || pricingLoading || !quote}
             className="btn-gold w-full flex items-center justify-center gap-2 disabled:opacity-60"
           >
             <CreditCard className="w-5 h-5" />
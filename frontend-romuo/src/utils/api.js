@@ -30,6 +30,7 @@ export const zoneApi = {
 
 export const rideApi = {
   calculate: (data) => api.post('/rides/calculate', data),
+  calculateBatch: (quotes) => api.post('/rides/calculate/batch', { quotes }),
   create: (data) => api.post('/rides', data),
   createGuest: (data) => api.post('/rides/guest', data),
   getById: (rideId) => api.get(`/rides/${rideId}`),
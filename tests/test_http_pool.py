@@ -0,0 +1,131 @@
+"""
+Connection reuse of the pooled HTTP client (backend/server.py HTTPPool)
+
+Starts a local stand-in for the auth backend and Twilio, sends several
+requests through the pool and counts the TCP connections the stand-in
+accepted.
+
+Usage (from the repository root):
+    python -m pytest tests/test_http_pool.py
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import httpx
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "test")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+import server  # noqa: E402
+
+REQUESTS = 5
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self._reply(200, {
+            "id": "stand-in",
+            "email": "driver@romuo.ch",
+            "name": "Stand-in Driver",
+            "session_token": "stand_in_token"
+        })
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._reply(201, {"sid": "SM_stand_in"})
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stand_in():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    httpd.connections = 0
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd, f"http://127.0.0.1:{httpd.server_address[1]}"
+
+
+def test_sms_notifications_reuse_one_connection(monkeypatch):
+    httpd, base_url = start_stand_in()
+    monkeypatch.setattr(server, "TWILIO_API_URL", base_url)
+    monkeypatch.setattr(server, "TWILIO_ACCOUNT_SID", "AC_test")
+    monkeypatch.setattr(server, "TWILIO_AUTH_TOKEN", "secret")
+    monkeypatch.setattr(server, "TWILIO_FROM_NUMBER", "+41000000000")
+
+    async def send_all():
+        try:
+            return [await server.send_sms_notification("+41790000000", "Test") for _ in range(REQUESTS)]
+        finally:
+            await server.http_pool.aclose()
+
+    results = asyncio.run(send_all())
+    httpd.shutdown()
+
+    assert results == [{"status": "sent"}] * REQUESTS
+    assert httpd.connections == 1
+
+
+def test_auth_exchange_reuses_one_connection():
+    httpd, base_url = start_stand_in()
+    url = f"{base_url}/auth/v1/env/oauth/session-data"
+
+    async def exchange_all():
+        try:
+            for _ in range(REQUESTS):
+                response = await server.http_pool.client(url).get(url, headers={"X-Session-ID": "s"})
+                assert response.json()["session_token"] == "stand_in_token"
+        finally:
+            await server.http_pool.aclose()
+
+    asyncio.run(exchange_all())
+    httpd.shutdown()
+    assert httpd.connections == 1
+
+
+def test_client_per_call_opens_a_connection_each_time():
+    """Baseline: the previous per-call AsyncClient pattern"""
+    httpd, base_url = start_stand_in()
+
+    async def exchange_all():
+        for _ in range(REQUESTS):
+            async with httpx.AsyncClient() as http_client:
+                await http_client.get(f"{base_url}/auth/v1/env/oauth/session-data")
+
+    asyncio.run(exchange_all())
+    httpd.shutdown()
+    assert httpd.connections == REQUESTS
+
+
+def test_pool_keeps_one_client_per_host():
+    async def check():
+        try:
+            first = server.http_pool.client("https://api.twilio.com/2010-04-01/Accounts/x/Messages.json")
+            second = server.http_pool.client("https://api.twilio.com")
+            other = server.http_pool.client("https://demobackend.emergentagent.com/auth")
+            assert first is second
+            assert first is not other
+        finally:
+            await server.http_pool.aclose()
+
+    asyncio.run(check())
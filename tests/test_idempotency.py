@@ -0,0 +1,152 @@
+"""
+A booking retried after its idempotency claim was left unfinished is not
+executed twice (backend/server.py IdempotencyStore)
+
+Runs against an in-memory stand-in for db.idempotency_keys whose
+completion write can be made to fail, with the booking recorded in a list
+that the recover callback reads back.
+
+Usage (from the repository root):
+    python -m pytest tests/test_idempotency.py
+"""
+
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+from pymongo.errors import AutoReconnect, DuplicateKeyError
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "test")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+import server  # noqa: E402
+
+KEY = "retry-0123456789abcdef"
+
+
+class StandInKeys:
+    """Just enough of db.idempotency_keys, unique on key"""
+
+    def __init__(self):
+        self.docs = {}
+        self.fail_updates = False
+
+    def _match(self, doc, query):
+        for field, value in query.items():
+            if isinstance(value, dict) and "$lt" in value:
+                if not doc.get(field) < value["$lt"]:
+                    return False
+            elif doc.get(field) != value:
+                return False
+        return True
+
+    async def insert_one(self, doc):
+        if doc["key"] in self.docs:
+            raise DuplicateKeyError("E11000 duplicate key")
+        self.docs[doc["key"]] = dict(doc)
+
+    async def find_one(self, query, projection=None):
+        doc = self.docs.get(query["key"])
+        return dict(doc) if doc and self._match(doc, query) else None
+
+    async def find_one_and_update(self, query, update):
+        doc = self.docs.get(query["key"])
+        if doc is None or not self._match(doc, query):
+            return None
+        before = dict(doc)
+        doc.update(update["$set"])
+        return before
+
+    async def update_one(self, query, update):
+        if self.fail_updates:
+            raise AutoReconnect("primary stepped down")
+        self.docs[query["key"]].update(update["$set"])
+
+    async def delete_one(self, query):
+        doc = self.docs.get(query["key"])
+        if doc and self._match(doc, query):
+            del self.docs[query["key"]]
+
+
+class StandInDB:
+    def __init__(self):
+        self.idempotency_keys = StandInKeys()
+
+
+@pytest.fixture
+def store(monkeypatch):
+    monkeypatch.setattr(server, "db", StandInDB())
+    monkeypatch.setattr(server, "IDEMPOTENCY_COMPLETE_ATTEMPTS", 2)
+    return server.IdempotencyStore(ttl_hours=1, lock_seconds=0, cache_size=100)
+
+
+def booking(rides, fail_after_insert=False):
+    async def book():
+        rides.append(f"ride_{len(rides)}")
+        if fail_after_insert:
+            raise HTTPException(status_code=503, detail="notifications unavailable")
+        return {"ride_id": rides[-1]}
+
+    async def recover(full_key):
+        return {"ride_id": rides[0]} if rides else None
+
+    return book, recover
+
+
+def test_unfinished_claim_is_recovered_not_rerun(store):
+    async def check():
+        rides = []
+        book, recover = booking(rides)
+
+        server.db.idempotency_keys.fail_updates = True
+        first, replayed = await store.run("rides:user", KEY, "fp", book, recover)
+        assert not replayed
+        claim = server.db.idempotency_keys.docs[f"rides:user:{KEY}"]
+        assert claim["status"] == "processing"
+
+        # Another worker: no in-memory replay, the claim is stale
+        server.db.idempotency_keys.fail_updates = False
+        store._recent.clear()
+        second, replayed = await store.run("rides:user", KEY, "fp", book, recover)
+
+        assert replayed and second == first
+        assert rides == ["ride_0"]
+        assert claim["status"] == "completed"
+
+    asyncio.run(check())
+
+
+def test_failure_after_booking_completes_the_claim(store):
+    async def check():
+        rides = []
+        book, recover = booking(rides, fail_after_insert=True)
+
+        with pytest.raises(HTTPException):
+            await store.run("rides:user", KEY, "fp", book, recover)
+        assert server.db.idempotency_keys.docs[f"rides:user:{KEY}"]["status"] == "completed"
+
+        store._recent.clear()
+        response, replayed = await store.run("rides:user", KEY, "fp", book, recover)
+        assert replayed and response == {"ride_id": "ride_0"}
+        assert rides == ["ride_0"]
+
+    asyncio.run(check())
+
+
+def test_failure_without_booking_releases_the_claim(store):
+    async def check():
+        async def book():
+            raise HTTPException(status_code=400, detail="Invalid quote")
+
+        async def recover(full_key):
+            return None
+
+        with pytest.raises(HTTPException):
+            await store.run("rides:user", KEY, "fp", book, recover)
+        assert server.db.idempotency_keys.docs == {}
+
+    asyncio.run(check())
@@ -0,0 +1,184 @@
+"""
+Concurrent logins for one email create exactly one user (backend/server.py)
+
+The stand-in tests run everywhere: an in-memory collection with a unique
+email index yields to the event loop between its read and its write, so
+concurrent upserts really race. The remaining tests run against the
+MongoDB at MONGO_URL in a throwaway database and are skipped when no
+server is reachable.
+
+Usage (from the repository root):
+    MONGO_URL=mongodb://localhost:27017 python -m pytest tests/test_login_upsert.py
+"""
+
+import asyncio
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import DuplicateKeyError
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "test")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+import server  # noqa: E402
+
+LOGINS = 50
+
+
+def session_data(token):
+    return server.SessionDataResponse(
+        id="oauth_user",
+        email="race@romuo.ch",
+        name="Race Condition",
+        session_token=token
+    )
+
+
+class StandInCollection:
+    """Just enough of a Motor collection, with an optional unique field"""
+
+    def __init__(self, unique=None):
+        self.unique = unique
+        self.docs = []
+        self.duplicate_key_errors = 0
+
+    def _match(self, query):
+        return next((d for d in self.docs if all(d.get(k) == v for k, v in query.items())), None)
+
+    async def find_one(self, query, projection=None):
+        await asyncio.sleep(0)
+        doc = self._match(query)
+        return dict(doc) if doc else None
+
+    async def insert_one(self, doc):
+        await asyncio.sleep(0)
+        if self.unique and any(d[self.unique] == doc[self.unique] for d in self.docs):
+            self.duplicate_key_errors += 1
+            raise DuplicateKeyError("E11000 duplicate key")
+        self.docs.append(dict(doc))
+
+    async def find_one_and_update(self, query, update, upsert=False, projection=None, return_document=None):
+        # Read and write are separate steps, like a server-side upsert racing others
+        existing = await self.find_one(query)
+        if existing or not upsert:
+            return existing
+        doc = {**query, **update["$setOnInsert"]}
+        await self.insert_one(doc)
+        return dict(doc)
+
+    async def count_documents(self, query):
+        return sum(1 for d in self.docs if all(d.get(k) == v for k, v in query.items()))
+
+
+class StandInDB:
+    def __init__(self):
+        self.users = StandInCollection(unique="email")
+        self.user_sessions = StandInCollection()
+
+
+def with_stand_in_db(check):
+    original_db = server.db
+    server.db = StandInDB()
+    try:
+        asyncio.run(check(server.db))
+    finally:
+        server.db = original_db
+
+
+def test_concurrent_logins_create_one_user_stand_in():
+    async def check(db):
+        users = await asyncio.gather(*[
+            server.upsert_login_user(session_data(f"token_{i}")) for i in range(LOGINS)
+        ])
+
+        assert len({user["user_id"] for user in users}) == 1
+        assert await db.users.count_documents({"email": "race@romuo.ch"}) == 1
+        # The race was real: losers hit the unique index and re-read the winner
+        assert db.users.duplicate_key_errors > 0
+
+    with_stand_in_db(check)
+
+
+async def with_test_db(check):
+    client = AsyncIOMotorClient(os.environ["MONGO_URL"], serverSelectionTimeoutMS=1000)
+    try:
+        await client.admin.command("ping")
+    except Exception:
+        pytest.skip("MongoDB is not reachable")
+
+    name = f"test_login_{uuid.uuid4().hex[:8]}"
+    original_db = server.db
+    server.db = client[name]
+    try:
+        await server.db.users.create_index("email", unique=True)
+        await check()
+    finally:
+        server.db = original_db
+        await client.drop_database(name)
+        client.close()
+
+
+def test_concurrent_logins_create_one_user():
+    async def check():
+        users = await asyncio.gather(*[
+            server.upsert_login_user(session_data(f"token_{i}")) for i in range(LOGINS)
+        ])
+
+        assert len({user["user_id"] for user in users}) == 1
+        assert await server.db.users.count_documents({"email": "race@romuo.ch"}) == 1
+
+    asyncio.run(with_test_db(check))
+
+
+class StandInAuthClient:
+    """Answers the session-data call with the same account for every session ID"""
+
+    async def get(self, url, headers):
+        data = session_data(f"token_{headers['X-Session-ID']}").dict()
+        return type("Response", (), {
+            "raise_for_status": lambda self: None,
+            "json": lambda self: data
+        })()
+
+
+def test_concurrent_session_exchanges_share_one_user(monkeypatch):
+    monkeypatch.setattr(server.http_pool, "client", lambda url: StandInAuthClient())
+
+    async def check():
+        results = await asyncio.gather(*[
+            server.exchange_session(f"sid_{i}") for i in range(LOGINS)
+        ])
+
+        assert len({result["user_id"] for result in results}) == 1
+        assert await server.db.users.count_documents({}) == 1
+        assert await server.db.user_sessions.count_documents({}) == LOGINS
+        assert await server.db.user_sessions.count_documents({"user_id": results[0]["user_id"]}) == LOGINS
+
+        user, _ = await server.load_session_user(results[0]["session_token"])
+        assert user.user_id == results[0]["user_id"]
+
+    asyncio.run(with_test_db(check))
+
+
+def test_concurrent_session_exchanges_stand_in(monkeypatch):
+    monkeypatch.setattr(server.http_pool, "client", lambda url: StandInAuthClient())
+
+    async def check(db):
+        results = await asyncio.gather(*[
+            server.exchange_session(f"sid_{i}") for i in range(LOGINS)
+        ])
+
+        user_id = results[0]["user_id"]
+        assert {result["user_id"] for result in results} == {user_id}
+        assert len(db.users.docs) == 1
+        assert [session["user_id"] for session in db.user_sessions.docs] == [user_id] * LOGINS
+
+        user, _ = await server.load_session_user(results[0]["session_token"])
+        assert user.user_id == user_id
+
+    with_stand_in_db(check)
@@ -0,0 +1,71 @@
+"""
+Columnar pricing matches calculate_hybrid_price ride by ride (backend/server.py)
+
+Prices a random sample of rides with calculate_hybrid_prices() and
+hybrid_price_row() and compares every row with the scalar
+calculate_hybrid_price(): fixed zone prices, estimated durations, youth
+and ride-sharing discounts and scheduled times in several UTC offsets.
+
+Usage (from the repository root):
+    python -m pytest tests/test_price_arrays.py
+"""
+
+import os
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pandas as pd
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "test")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+import server  # noqa: E402
+from tools import reprice_rides  # noqa: E402
+
+SAMPLE = 2000
+OFFSETS = [timezone.utc, timezone(timedelta(hours=1)), timezone(timedelta(hours=2)), timezone(timedelta(hours=-5))]
+
+
+def random_ride(rng):
+    scheduled_time = None
+    if rng.random() < 0.7:
+        scheduled_time = datetime(2026, 1, 1, tzinfo=rng.choice(OFFSETS)) + timedelta(minutes=rng.randrange(365 * 24 * 60))
+    return {
+        "vehicle_type": rng.choice(server.tariffs.current.categories),
+        "distance_km": rng.uniform(0.5, 250),
+        "duration_minutes": rng.choice([None, 0, rng.uniform(5, 240)]),
+        "user_age": rng.choice([None, 0, 18, 25, 26, 40]),
+        "is_ride_sharing": rng.random() < 0.3,
+        "scheduled_time": scheduled_time,
+        "fixed_zone_price": rng.choice([None, None, 0, float(rng.randrange(60, 400))])
+    }
+
+
+def test_columnar_prices_match_scalar():
+    rides = [random_ride(random.Random(seed)) for seed in range(SAMPLE)]
+    prices = server.calculate_hybrid_prices(
+        vehicle_types=[r["vehicle_type"] for r in rides],
+        distance_km=[r["distance_km"] for r in rides],
+        duration_minutes=[r["duration_minutes"] for r in rides],
+        user_ages=[r["user_age"] for r in rides],
+        scheduled_times=[r["scheduled_time"] for r in rides],
+        fixed_zone_prices=[r["fixed_zone_price"] for r in rides],
+        ride_sharing=[r["is_ride_sharing"] for r in rides]
+    )
+
+    for i, ride in enumerate(rides):
+        assert server.hybrid_price_row(prices, i) == server.calculate_hybrid_price(**ride), ride
+
+
+def test_ride_sharing_defaults_to_off():
+    prices = server.calculate_hybrid_prices(["eco"], [20.0], [None], [None], [None], [None])
+    assert server.hybrid_price_row(prices, 0) == server.calculate_hybrid_price("eco", 20.0)
+
+
+def test_reprice_uses_local_hour():
+    # 06:30 UTC in summer and 07:30 UTC in winter are 08:30 in Zurich
+    stored = pd.Series([datetime(2026, 7, 1, 6, 30), datetime(2026, 1, 15, 7, 30), None])
+    assert reprice_rides.local_hours(stored).tolist() == [8, 8, -1]